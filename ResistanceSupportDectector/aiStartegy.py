@@ -1,131 +1,13 @@
 import pandas as pd
-from ResistanceSupportDectector.detector import is_price_near_bollinger_band, is_price_near_ma, is_bollinger_band_support_resistance, is_support_resistance
-from utils.indicators import Indicator
+from ResistanceSupportDectector.detector import detect_trend, trend_from_emas
+from ResistanceSupportDectector.pivots import calculate_pivot_points, get_pivot_point_data
+from ResistanceSupportDectector.spikeDectector import detect_spike
+from ResistanceSupportDectector.features import FeatureFrame
+from ResistanceSupportDectector.strength import strength_series
 from config import Config
 
 
 
-def detect_spike(df, window=20, threshold=1.5):
-    """
-    Detects spikes in the price data based on the size of the price movement compared to recent history.
-
-    Args:
-    - df: DataFrame containing price data with a 'close' column.
-    - window: Number of periods to calculate the average volatility.
-    - threshold: Multiplier to determine if the current price movement is a spike.
-
-    Returns:
-    - A list of indices where spikes were detected.
-    """
-    spikes = []
-    
-    # Calculate the recent volatility
-    df['price_change'] = df['close'].diff()
-    df['abs_change'] = df['price_change'].abs()
-    df['rolling_volatility'] = df['abs_change'].rolling(window=window).mean()
-
-    # Detect spikes
-    for i in range(window, len(df)):
-        current_change = df['price_change'].iloc[i]
-        rolling_volatility = df['rolling_volatility'].iloc[i]
-        if abs(current_change) > threshold * rolling_volatility:
-            spikes.append(i)
-    
-    return spikes
-
-
-def calculate_pivot_points(df):
-    """
-    Calculates pivot points, support, and resistance levels.
-
-    Args:
-    - df: DataFrame containing 'high', 'low', 'close' prices.
-
-    Returns:
-    - A DataFrame with pivot points, support, and resistance levels.
-    """
-
-    # Calculate Pivot Point (PP), Support, and Resistance levels
-    pivot_point = (df['high'] + df['low'] + df['close']) / 3
-    support1 = (2 * pivot_point) - df['high']
-    resistance1 = (2 * pivot_point) - df['low']
-    support2 = pivot_point - (df['high'] - df['low'])
-    resistance2 = pivot_point + (df['high'] - df['low'])
-    support3 = df['low'] - 2 * (df['high'] - pivot_point)
-    resistance3 = df['high'] + 2 * (pivot_point - df['low'])
-
-    # Create a new DataFrame for storing pivot points, support, and resistance levels
-    pivot_points_df = pd.DataFrame({
-        'pivot_point': pivot_point,
-        'support1': support1,
-        'resistance1': resistance1,
-        'support2': support2,
-        'resistance2': resistance2,
-        'support3': support3,
-        'resistance3': resistance3
-    })
-
-    return pivot_points_df
-
-
-def get_pivot_point_data(df, current_price, tolerance=0.005):
-    """
-    Determines if the current price is near pivot points, support, or resistance levels.
-
-    Args:
-    - df: DataFrame containing 'high', 'low', 'close' prices.
-    - current_price: The current price of the asset.
-    - tolerance: The allowed deviation from the pivot/support/resistance levels (default: 0.5%).
-
-    Returns:
-    - A dictionary indicating if the current price is near support or resistance levels.
-    """
-
-    # Calculate pivot points and levels
-    pivot_points_df = calculate_pivot_points(df)
-
-    # Get the last row of pivot points (for the most recent data)
-    latest_pivot = pivot_points_df.iloc[-1]
-
-    # Determine if the current price is near any key levels
-    near_support = False
-    near_resistance = False
-
-    # Check if the current price is near any of the supports or resistances
-    if abs(current_price - latest_pivot['support1']) / latest_pivot['support1'] <= tolerance:
-        near_support = True
-    elif abs(current_price - latest_pivot['support2']) / latest_pivot['support2'] <= tolerance:
-        near_support = True
-    elif abs(current_price - latest_pivot['support3']) / latest_pivot['support3'] <= tolerance:
-        near_support = True
-
-    if abs(current_price - latest_pivot['resistance1']) / latest_pivot['resistance1'] <= tolerance:
-        near_resistance = True
-    elif abs(current_price - latest_pivot['resistance2']) / latest_pivot['resistance2'] <= tolerance:
-        near_resistance = True
-    elif abs(current_price - latest_pivot['resistance3']) / latest_pivot['resistance3'] <= tolerance:
-        near_resistance = True
-
-    return {
-        'near_support': near_support,
-        'near_resistance': near_resistance,
-        'pivot_point': latest_pivot['pivot_point'],
-        'support_levels': [latest_pivot['support1'], latest_pivot['support2'], latest_pivot['support3']],
-        'resistance_levels': [latest_pivot['resistance1'], latest_pivot['resistance2'], latest_pivot['resistance3']]
-    }
-
-def detect_trend(df):
-    short_ema = df['close'].ewm(span=50, adjust=False).mean()
-    long_ema = df['close'].ewm(span=200, adjust=False).mean()
-    
-    if short_ema.iloc[-1] > long_ema.iloc[-1]:
-        return 'uptrend'
-    elif short_ema.iloc[-1] < long_ema.iloc[-1]:
-        return 'downtrend'
-    else:
-        return 'sideways'
-
-
 # def calculate_signal_strength(trend, rsi_value, pivot_point_data, ma_proximity, bb_signal, ma_support_resistance, bb_support_resistance, spike_indices, current_index):
 #     """
 #     Calculate the strength of the buy/sell signal based on trend, RSI, proximity to pivot points,
@@ -271,7 +153,9 @@ def calculate_signal_strength(
 
 
 
-    pivot_point_data = get_pivot_point_data(df, current_price=df['close'].iloc[-1])
+    # Callers that already hold the near-support/resistance dict pass it through; otherwise derive it here
+    if not isinstance(pivot_point_data, dict):
+        pivot_point_data = get_pivot_point_data(df, current_price=df['close'].iloc[-1])
 
     if pivot_point_data['near_support']:
         strength += 0.15  # Stronger buy signal if price is near support levels
@@ -296,39 +180,56 @@ def calculate_signal_strength(
 
 
 class MyStrategy():
-    def __init__(self, data):
+    # Tunables of run(); same names as strength_series' keyword arguments
+    PARAMS = {
+        'ma_period': 10,
+        'ma48_period': 48,
+        'ma_tolerance': 0.01,
+        'bb_period': 20,
+        'bb_std': 2,
+        'bb_tolerance': 0.01,
+        'rsi_period': 14,
+        'spike_window': 20,
+        'spike_threshold': 1.5,
+        'pivot_tolerance': 0.005,
+    }
+
+    def __init__(self, data, stream=None, features=None, **params):
         self.data = data
-        bt = Indicator(self.data)
-        # Initialization of indicators and price data
-        self.ma = bt.moving_average(period=10)
-        self.rsi = bt.rsi(period=14)
+        self.params = {**self.PARAMS, **params}
+        # Shared, memoised features of the frame (see FeatureFrame)
+        self.features = features if features is not None else FeatureFrame(data, stream=stream)
         self.df = self.data  # Placeholder for DataFrame with price data
         
     async def run(self):
+        features = self.features
+        params = self.params
+
         # 1. Calculate pivot points
-        pivot_point_data = calculate_pivot_points(self.data)
+        pivot_point_data = features.pivot_point_data(tolerance=params['pivot_tolerance'])
 
-        spike_indices = detect_spike(self.df, window=20, threshold=1.5)
         current_index = len(self.df) - 1
+        # The strength only looks at whether the current bar is a spike
+        is_spike = features.last_bar_spike(window=params['spike_window'], threshold=params['spike_threshold'])
+        spike_indices = [current_index] if is_spike else []
         
         # 2. Detect the current trend
-        trend = detect_trend(self.df)
+        trend = features.trend()
         
         # 3. Check RSI
-        
-        rsi_value = self.rsi.iloc[-1]
+        rsi_value = features.rsi(period=params['rsi_period'])
         
         # 4. Check if price is near MA
-        ma_proximity = await is_price_near_ma(self.df, ma_period=10, tolerance=0.01)
+        ma_proximity = features.near_ma(ma_period=params['ma_period'], tolerance=params['ma_tolerance'])
 
-        ma48_proximity = await is_price_near_ma(self.df, ma_period=48, tolerance=0.01)
+        ma48_proximity = features.near_ma(ma_period=params['ma48_period'], tolerance=params['ma_tolerance'])
         
         # 5. Check Bollinger Band signal
-        bb_signal = await is_price_near_bollinger_band(self.df, period=20, std_dev=2, tolerance=0.01)
+        bb_signal = features.near_bb(period=params['bb_period'], std_dev=params['bb_std'], tolerance=params['bb_tolerance'])
 
-        bb_support_resistance = await is_bollinger_band_support_resistance(self.df)
-        ma_support_resistance  = await is_support_resistance(self.df, 10)
-        ma48_support_resistance  = await is_support_resistance(self.df, 48)
+        bb_support_resistance = features.bb_support_resistance(period=params['bb_period'], std_dev=params['bb_std'])
+        ma_support_resistance  = features.support_resistance(params['ma_period'])
+        ma48_support_resistance  = features.support_resistance(params['ma48_period'])
         
         # 6. Calculate the signal strength
         signal_strength = calculate_signal_strength(
@@ -355,6 +256,12 @@ class MyStrategy():
         #     # Strong sell signal
         #     return "SELL"
         return signal_strength
+
+    def strength_series(self):
+        """
+        Signal strength of every bar in the frame, identical to calling run() on each prefix.
+        """
+        return pd.Series(strength_series(self.df, engine=self.features.engine, **self.params), index=self.df.index)
     
 
 async def combine_timeframe_signals(timeframes, weights=None):
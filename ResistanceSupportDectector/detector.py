@@ -1,72 +1,202 @@
 import pandas as pd
 import numpy as np
-from utils.indicators import Indicator
+from utils.indicators import Indicator, IndicatorEngine
 import asyncio
 
-async def is_support_resistance(df, ma_period=10):
+
+def ma_crossings(close, ma, lookback):
     """
-    Determines whether the moving average (MA) is acting as support, resistance, or neutral.
+    Counts price/MA crossings over the last `lookback` bars (excluding the forming bar).
 
     Parameters:
-    - df: DataFrame containing at least the 'close' price column.
-    - ma_period: Length of the moving average.
+    - close: Array of close prices.
+    - ma: Array with the moving average of close, aligned with it.
+    - lookback: Number of bars to scan.
 
     Returns:
-    - 'support' if the MA is acting as support, 'resistance' if acting as resistance,
-      or 'neutral' if neither.
+    - (crossing count, direction of the latest crossing: 1 up / -1 down / 0 none, MA slope on the last bar)
     """
-
-    # Calculate the Moving Average (MA)
-    indicator = Indicator(df)
-    #df['MA'] = df['close'].rolling(window=ma_period).mean()
-    df['MA'] = indicator.moving_average(ma_period)
-
-    # Calculate the slope of the MA (using the difference between the last two MAs)
-    df['MA_slope'] = df['MA'].diff()
-
+    count, direction = _crossings(np.asarray(close, dtype=float)[None, -lookback - 1:-1], np.asarray(ma, dtype=float)[None, -lookback - 1:-1])
+    return int(count[0]), int(direction[0]), ma[-1] - ma[-2]
+
+
+def _crossings(close, ma):
+    # close/ma are (k, m) windows; a crossing at column j compares it with column j-1
+    above = close > ma
+    below = close < ma
+    up = above[:, 1:] & below[:, :-1]
+    down = below[:, 1:] & above[:, :-1]
+    crossed = up | down
+    count = crossed.sum(axis=1)
+    # Direction of the right-most crossing in each row
+    has_cross = count > 0
+    last = crossed.shape[1] - 1 - np.argmax(crossed[:, ::-1], axis=1)
+    direction = np.where(has_cross, np.where(up[np.arange(len(up)), last], 1, -1), 0)
+    return count, direction
+
+
+def _classify(close, ma, ma_slope, bounce_count):
     # Set initial state as neutral
     support_resistance = 'neutral'
 
     # Determine if the price is above or below the MA
-    if df['close'].iloc[-1] > df['MA'].iloc[-1]:
+    if close[-1] > ma[-1]:
         # Price is above the MA, possible resistance
-        if df['close'].iloc[-2] < df['MA'].iloc[-2]:
+        if close[-2] < ma[-2]:
             support_resistance = 'resistance'
 
-    elif df['close'].iloc[-1] < df['MA'].iloc[-1]:
+    elif close[-1] < ma[-1]:
         # Price is below the MA, possible support
-        if df['close'].iloc[-2] > df['MA'].iloc[-2]:
+        if close[-2] > ma[-2]:
             support_resistance = 'support'
 
     # Refine the determination by considering the slope of the MA
-    if support_resistance == 'resistance' and df['MA_slope'].iloc[-1] > 0:
+    if support_resistance == 'resistance' and ma_slope > 0:
         # Price is above MA, but MA is sloping upward (indicating an uptrend)
         # More likely to be support in an uptrend
         support_resistance = 'neutral'
 
-    elif support_resistance == 'support' and df['MA_slope'].iloc[-1] < 0:
+    elif support_resistance == 'support' and ma_slope < 0:
         # Price is below MA, but MA is sloping downward (indicating a downtrend)
         # More likely to be resistance in a downtrend
         support_resistance = 'neutral'
 
-    # Further refine by checking for bounces
-    # Count the number of bounces off the MA in recent periods
-    bounce_count = 0
-    for i in range(-ma_period, -1):
-        if (df['close'].iloc[i] > df['MA'].iloc[i] and df['close'].iloc[i-1] < df['MA'].iloc[i-1]) or \
-           (df['close'].iloc[i] < df['MA'].iloc[i] and df['close'].iloc[i-1] > df['MA'].iloc[i-1]):
-            bounce_count += 1
-
     # If the bounce count is high, it suggests a strong support/resistance level
     if bounce_count >= 2:
-        if support_resistance == 'neutral' and df['close'].iloc[-1] > df['MA'].iloc[-1]:
+        if support_resistance == 'neutral' and close[-1] > ma[-1]:
             support_resistance = 'resistance'
-        elif support_resistance == 'neutral' and df['close'].iloc[-1] < df['MA'].iloc[-1]:
+        elif support_resistance == 'neutral' and close[-1] < ma[-1]:
             support_resistance = 'support'
 
     return support_resistance
 
 
+def ma_support_resistance(close, ma, ma_period=10):
+    """
+    Array version of is_support_resistance.
+
+    Parameters:
+    - close: Array of close prices.
+    - ma: Array with the moving average of close, aligned with it.
+    - ma_period: Length of the moving average (also the bounce lookback).
+
+    Returns:
+    - 'support', 'resistance' or 'neutral'.
+    """
+    # Count the number of bounces off the MA in recent periods
+    bounce_count, _, ma_slope = ma_crossings(close, ma, ma_period)
+    return _classify(close, ma, ma_slope, bounce_count)
+
+
+def support_resistance_batch(close, periods, engine=None):
+    """
+    Evaluates is_support_resistance for many MA periods at once.
+
+    Parameters:
+    - close: Array of close prices.
+    - periods: Iterable of MA periods (each is also its bounce lookback).
+    - engine: Optional IndicatorEngine over close, to reuse its moving averages.
+
+    Returns:
+    - A dict of {period: {'label', 'crossings', 'last_cross', 'slope'}}.
+    """
+    close = np.asarray(close, dtype=float)
+    periods = list(periods)
+    if engine is None:
+        engine = IndicatorEngine(close)
+    mas = np.vstack([engine.sma(period) for period in periods])
+    lookbacks = np.asarray(periods)
+    width = int(lookbacks.max())
+
+    # One (periods x width) crossing matrix; each row only counts its own lookback
+    close_window = np.broadcast_to(close[-width - 1:-1], (len(periods), len(close[-width - 1:-1])))
+    ma_window = mas[:, -width - 1:-1]
+    in_range = np.arange(close_window.shape[1]) >= close_window.shape[1] - lookbacks[:, None]
+    masked = np.where(in_range, ma_window, np.nan)
+    counts, directions = _crossings(close_window, masked)
+
+    results = {}
+    for row, period in enumerate(periods):
+        ma = mas[row]
+        slope = ma[-1] - ma[-2]
+        results[period] = {
+            'label': _classify(close, ma, slope, counts[row]),
+            'crossings': int(counts[row]),
+            'last_cross': int(directions[row]),
+            'slope': slope,
+        }
+    return results
+
+
+def shift(values):
+    """Previous-bar values (NaN for the first bar)."""
+    values = np.asarray(values, dtype=float)
+    return np.concatenate(([np.nan], values[:-1]))
+
+
+def ma_support_resistance_series(close, ma, ma_period=10):
+    """
+    ma_support_resistance evaluated as if each bar were the last one.
+
+    Returns:
+    - An int array per bar: 1 for 'support', -1 for 'resistance', 0 for 'neutral'.
+    """
+    close = np.asarray(close, dtype=float)
+    ma = np.asarray(ma, dtype=float)
+    prev_close, prev_ma = shift(close), shift(ma)
+    slope = ma - prev_ma
+
+    crossed_up = (close > ma) & (prev_close < prev_ma)
+    crossed_down = (close < ma) & (prev_close > prev_ma)
+    resistance = crossed_up & ~(slope > 0)
+    support = crossed_down & ~(slope < 0)
+
+    # Crossings at bars t - ma_period + 1 .. t - 1, from a running count
+    crossings = np.concatenate(([0], np.cumsum(crossed_up | crossed_down)))
+    bars = np.arange(len(close))
+    bounce_count = crossings[bars] - crossings[np.maximum(bars - ma_period + 1, 0)]
+
+    strong = (bounce_count >= 2) & ~resistance & ~support
+    resistance |= strong & (close > ma)
+    support |= strong & (close < ma)
+    return support.astype(int) - resistance.astype(int)
+
+
+def bollinger_support_resistance_series(close, upper_band, lower_band):
+    """
+    bollinger_support_resistance for every bar: 1 support, -1 resistance, 0 neutral.
+    """
+    prev_close = shift(close)
+    support = (close <= lower_band) & (prev_close > shift(lower_band))
+    resistance = ~support & (close >= upper_band) & (prev_close < shift(upper_band))
+    return support.astype(int) - resistance.astype(int)
+
+
+def price_near_bands_series(close, upper_band, lower_band, tolerance=0.005):
+    """
+    price_near_bands for every bar: 1 near the upper band, -1 near the lower band, 0 otherwise.
+    """
+    upper = np.abs(close - upper_band) <= tolerance * upper_band
+    lower = ~upper & (np.abs(close - lower_band) <= tolerance * lower_band)
+    return upper.astype(int) - lower.astype(int)
+
+
+async def is_support_resistance(df, ma_period=10):
+    """
+    Determines whether the moving average (MA) is acting as support, resistance, or neutral.
+
+    Parameters:
+    - df: DataFrame containing at least the 'close' price column.
+    - ma_period: Length of the moving average.
+
+    Returns:
+    - 'support' if the MA is acting as support, 'resistance' if acting as resistance,
+      or 'neutral' if neither.
+    """
+    engine = Indicator(df).engine
+    return ma_support_resistance(engine.close, engine.sma(ma_period), ma_period)
+
+
 async def is_price_near_ma(df, ma_period=10, tolerance=0.005):
   """
   Checks if the current price is within a tolerance of the MA.
@@ -80,16 +210,39 @@ async def is_price_near_ma(df, ma_period=10, tolerance=0.005):
     True if the price is within tolerance of the MA, False otherwise.
   """
 
-  indicator = Indicator(df)
-    #df['MA'] = df['close'].rolling(window=ma_period).mean()
-  df['MA'] = indicator.moving_average(ma_period)
-  last_price = df['close'].iloc[-1]
-  last_ma = df['MA'].iloc[-1]
-  return abs(last_price - last_ma) / last_ma <= tolerance
+  engine = Indicator(df).engine
+  return price_near_value(engine.close[-1], engine.sma(ma_period)[-1], tolerance)
 
 
+def price_near_value(price, ma_value, tolerance=0.005):
+  """
+  Checks if a price is within a percentage tolerance of an MA value.
+  """
+  return abs(price - ma_value) / ma_value <= tolerance
 
 
+def price_near_bands(price, upper_band_value, lower_band_value, tolerance=0.005):
+  """
+  Returns 'upper_band', 'lower_band' or 'neutral' for a price and the current band values.
+  """
+  if abs(price - upper_band_value) <= tolerance * upper_band_value:
+    return 'upper_band'
+  elif abs(price - lower_band_value) <= tolerance * lower_band_value:
+    return 'lower_band'
+  else:
+    return 'neutral'
+
+
+def bollinger_support_resistance(close, upper_band, lower_band):
+  """
+  Array version of is_bollinger_band_support_resistance.
+  """
+  if close[-1] <= lower_band[-1] and close[-2] > lower_band[-2]:
+    return 'support'
+  elif close[-1] >= upper_band[-1] and close[-2] < upper_band[-2]:
+    return 'resistance'
+  else:
+    return 'neutral'
 
 
 async def is_bollinger_band_support_resistance(df, period=20, std_dev=2):
@@ -106,20 +259,10 @@ async def is_bollinger_band_support_resistance(df, period=20, std_dev=2):
     'neutral' if neither.
   """
 
-  # Calculate Bollinger Bands
-  df['MA'] = df['close'].rolling(window=period).mean()
-  df['std'] = df['close'].rolling(window=period).std()
-  df['upper_band'] = df['MA'] + (df['std'] * std_dev)
-  df['lower_band'] = df['MA'] - (df['std'] * std_dev)
+  engine = Indicator(df).engine
+  _, upper_band, lower_band = engine.bollinger_bands(period, std_dev)
+  return bollinger_support_resistance(engine.close, upper_band, lower_band)
 
-  # Determine support or resistance
-  if df['close'].iloc[-1] <= df['lower_band'].iloc[-1] and df['close'].iloc[-2] > df['lower_band'].iloc[-2]:
-    return 'support'
-  elif df['close'].iloc[-1] >= df['upper_band'].iloc[-1] and df['close'].iloc[-2] < df['upper_band'].iloc[-2]:
-    return 'resistance'
-  else:
-    return 'neutral'
-  
 
 
 async def is_price_near_bollinger_band(df, period=20, std_dev=2, tolerance=0.005):
@@ -137,21 +280,21 @@ async def is_price_near_bollinger_band(df, period=20, std_dev=2, tolerance=0.005
     'neutral' otherwise.
   """
 
-  # Calculate Bollinger Bands
-  df['MA'] = df['close'].rolling(window=period).mean()
-  df['std'] = df['close'].rolling(window=period).std()
-  df['upper_band'] = df['MA'] + (df['std'] * std_dev)
-  df['lower_band'] = df['MA'] - (df['std'] * std_dev)
+  engine = Indicator(df).engine
+  _, upper_band, lower_band = engine.bollinger_bands(period, std_dev)
+  return price_near_bands(engine.close[-1], upper_band[-1], lower_band[-1], tolerance)
 
-  # Check if price is near upper or lower band
-  last_price = df['close'].iloc[-1]
-  upper_band_value = df['upper_band'].iloc[-1]
-  lower_band_value = df['lower_band'].iloc[-1]
 
-  if abs(last_price - upper_band_value) <= tolerance * upper_band_value:
-    return 'upper_band'
-  elif abs(last_price - lower_band_value) <= tolerance * lower_band_value:
-    return 'lower_band'
-  else:
-    return 'neutral'
+def detect_trend(df, engine=None):
+    if engine is None:
+        engine = Indicator(df).engine
+    return trend_from_emas(engine.ema(50)[-1], engine.ema(200)[-1])
+
 
+def trend_from_emas(short_ema, long_ema):
+    if short_ema > long_ema:
+        return 'uptrend'
+    elif short_ema < long_ema:
+        return 'downtrend'
+    else:
+        return 'sideways'
@@ -0,0 +1,129 @@
+from utils.indicators import IndicatorEngine
+from ResistanceSupportDectector.detector import ma_support_resistance, bollinger_support_resistance, price_near_value, price_near_bands, trend_from_emas
+from ResistanceSupportDectector.pivots import get_pivot_point_data
+from ResistanceSupportDectector.spikeDectector import detect_spike, last_bar_is_spike
+
+
+class FeatureFrame:
+    """
+    Derived features of one price frame, each computed at most once.
+
+    MyStrategy and Strategy.rsiStrategy both read from the same FeatureFrame,
+    so the MA, Bollinger and support/resistance work is shared between them.
+    Nothing is written back into the DataFrame.
+
+    When a StreamingIndicators state is given, last-bar MA/std/RSI/EMA values
+    come from it instead of the full-window arrays.
+    """
+
+    def __init__(self, df, stream=None):
+        self.df = df
+        self.engine = IndicatorEngine.from_frame(df)
+        self.stream = stream
+        self._cache = {}
+
+    def _memo(self, key, func):
+        if key not in self._cache:
+            self._cache[key] = func()
+        return self._cache[key]
+
+    @property
+    def price(self):
+        return self.engine.close[-1]
+
+    def _stream_values(self):
+        return self._memo('stream', lambda: self.stream.sync(self.df))
+
+    def last_sma(self, period):
+        if self.stream is not None and period in self.stream.sma:
+            return self._stream_values()['sma'][period]
+        return self.engine.sma(period)[-1]
+
+    def last_std(self, period):
+        if self.stream is not None and period in self.stream.std:
+            return self._stream_values()['std'][period]
+        return self.engine.std(period)[-1]
+
+    def rsi(self, period=14):
+        if self.stream is not None and period == self.stream.rsi.period:
+            return self._stream_values()['rsi']
+        return self.engine.rsi(period)[-1]
+
+    def trend(self):
+        def build():
+            if self.stream is not None and 50 in self.stream.ema and 200 in self.stream.ema:
+                values = self._stream_values()['ema']
+                return trend_from_emas(values[50], values[200])
+            return trend_from_emas(self.engine.ema(50)[-1], self.engine.ema(200)[-1])
+        return self._memo('trend', build)
+
+    def near_ma(self, ma_period=10, tolerance=0.005):
+        return self._memo(
+            ('near_ma', ma_period, tolerance),
+            lambda: price_near_value(self.price, self.last_sma(ma_period), tolerance),
+        )
+
+    def near_bb(self, period=20, std_dev=2, tolerance=0.005):
+        def build():
+            mid = self.last_sma(period)
+            band = self.last_std(period) * std_dev
+            return price_near_bands(self.price, mid + band, mid - band, tolerance)
+        return self._memo(('near_bb', period, std_dev, tolerance), build)
+
+    def support_resistance(self, ma_period=10):
+        return self._memo(
+            ('support_resistance', ma_period),
+            lambda: ma_support_resistance(self.engine.close, self.engine.sma(ma_period), ma_period),
+        )
+
+    def bb_support_resistance(self, period=20, std_dev=2):
+        def build():
+            _, upper_band, lower_band = self.engine.bollinger_bands(period, std_dev)
+            return bollinger_support_resistance(self.engine.close, upper_band, lower_band)
+        return self._memo(('bb_support_resistance', period, std_dev), build)
+
+    def pivot_point_data(self, tolerance=0.005):
+        # Pivot levels are per bar, so only the last row is needed
+        return self._memo(
+            ('pivot', tolerance),
+            lambda: get_pivot_point_data(self.df.iloc[-1:], current_price=self.price, tolerance=tolerance),
+        )
+
+    def spike_indices(self, window=20, threshold=1.5):
+        return self._memo(('spikes', window, threshold), lambda: detect_spike(self.df, window=window, threshold=threshold))
+
+    def last_bar_spike(self, window=20, threshold=1.5):
+        return self._memo(
+            ('last_spike', window, threshold),
+            lambda: last_bar_is_spike(self.engine.close, window=window, threshold=threshold),
+        )
+
+
+class FeatureCache:
+    """
+    Holds one FeatureFrame per (symbol, timeframe) and reuses it for as long as
+    the frame's last bar is unchanged.
+
+    The last bar is usually still forming, so its close is part of the key as
+    well as its open time; a tick that moves the close invalidates the features.
+    """
+
+    def __init__(self):
+        self._frames = {}
+
+    def frame(self, symbol, timeframe, df, stream=None):
+        key = (symbol, timeframe)
+        bar = (df['time'].iloc[-1], df['close'].iloc[-1], len(df))
+        cached = self._frames.get(key)
+        if cached is not None and cached[0] == bar and cached[1].stream is stream:
+            return cached[1]
+        features = FeatureFrame(df, stream=stream)
+        self._frames[key] = (bar, features)
+        return features
+
+    def clear(self, symbol=None):
+        if symbol is None:
+            self._frames.clear()
+            return
+        for key in [key for key in self._frames if key[0] == symbol]:
+            del self._frames[key]
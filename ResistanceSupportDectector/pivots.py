@@ -0,0 +1,103 @@
+import pandas as pd
+import numpy as np
+
+
+def calculate_pivot_points(df):
+    """
+    Calculates pivot points, support, and resistance levels.
+
+    Args:
+    - df: DataFrame containing 'high', 'low', 'close' prices.
+
+    Returns:
+    - A DataFrame with pivot points, support, and resistance levels.
+    """
+
+    # Calculate Pivot Point (PP), Support, and Resistance levels
+    pivot_point = (df['high'] + df['low'] + df['close']) / 3
+    support1 = (2 * pivot_point) - df['high']
+    resistance1 = (2 * pivot_point) - df['low']
+    support2 = pivot_point - (df['high'] - df['low'])
+    resistance2 = pivot_point + (df['high'] - df['low'])
+    support3 = df['low'] - 2 * (df['high'] - pivot_point)
+    resistance3 = df['high'] + 2 * (pivot_point - df['low'])
+
+    # Create a new DataFrame for storing pivot points, support, and resistance levels
+    pivot_points_df = pd.DataFrame({
+        'pivot_point': pivot_point,
+        'support1': support1,
+        'resistance1': resistance1,
+        'support2': support2,
+        'resistance2': resistance2,
+        'support3': support3,
+        'resistance3': resistance3
+    })
+
+    return pivot_points_df
+
+
+def get_pivot_point_data(df, current_price, tolerance=0.005):
+    """
+    Determines if the current price is near pivot points, support, or resistance levels.
+
+    Args:
+    - df: DataFrame containing 'high', 'low', 'close' prices.
+    - current_price: The current price of the asset.
+    - tolerance: The allowed deviation from the pivot/support/resistance levels (default: 0.5%).
+
+    Returns:
+    - A dictionary indicating if the current price is near support or resistance levels.
+    """
+
+    # Calculate pivot points and levels
+    pivot_points_df = calculate_pivot_points(df)
+
+    # Get the last row of pivot points (for the most recent data)
+    latest_pivot = pivot_points_df.iloc[-1]
+
+    # Determine if the current price is near any key levels
+    near_support = False
+    near_resistance = False
+
+    # Check if the current price is near any of the supports or resistances
+    if abs(current_price - latest_pivot['support1']) / latest_pivot['support1'] <= tolerance:
+        near_support = True
+    elif abs(current_price - latest_pivot['support2']) / latest_pivot['support2'] <= tolerance:
+        near_support = True
+    elif abs(current_price - latest_pivot['support3']) / latest_pivot['support3'] <= tolerance:
+        near_support = True
+
+    if abs(current_price - latest_pivot['resistance1']) / latest_pivot['resistance1'] <= tolerance:
+        near_resistance = True
+    elif abs(current_price - latest_pivot['resistance2']) / latest_pivot['resistance2'] <= tolerance:
+        near_resistance = True
+    elif abs(current_price - latest_pivot['resistance3']) / latest_pivot['resistance3'] <= tolerance:
+        near_resistance = True
+
+    return {
+        'near_support': near_support,
+        'near_resistance': near_resistance,
+        'pivot_point': latest_pivot['pivot_point'],
+        'support_levels': [latest_pivot['support1'], latest_pivot['support2'], latest_pivot['support3']],
+        'resistance_levels': [latest_pivot['resistance1'], latest_pivot['resistance2'], latest_pivot['resistance3']]
+    }
+
+
+def pivot_proximity_series(df, tolerance=0.005):
+    """
+    get_pivot_point_data evaluated at every bar, using each bar's close as the current price.
+
+    Returns:
+    - An int array per bar: 1 near a support level, -1 near a resistance level
+      (support wins when both apply, as in get_pivot_point_data), 0 otherwise.
+    """
+    levels = calculate_pivot_points(df)
+    price = df['close'].to_numpy(dtype=float)
+
+    def near(columns):
+        values = levels[columns].to_numpy(dtype=float)
+        return (np.abs(price[:, None] - values) / values <= tolerance).any(axis=1)
+
+    near_support = near(['support1', 'support2', 'support3'])
+    near_resistance = ~near_support & near(['resistance1', 'resistance2', 'resistance3'])
+    return near_support.astype(int) - near_resistance.astype(int)
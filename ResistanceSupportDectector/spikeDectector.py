@@ -1,5 +1,97 @@
 import pandas as pd
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from utils.indicators import IndicatorEngine
+
+MEAN_ABS = 'mean_abs'
+STD = 'std'
+
+
+def _spike_reference(change, window, method):
+  """
+  Rolling reference move for each bar: the mean absolute change (MEAN_ABS) or
+  the standard deviation of changes (STD) over `window` bars. change[0] is
+  NaN, so the first valid value is at index `window`, as with pandas' rolling().
+  """
+  reference = np.full(len(change), np.nan)
+  if len(change) > 1:
+    if method == MEAN_ABS:
+      reference[1:] = IndicatorEngine(np.abs(change[1:])).sma(window)
+    elif method == STD:
+      reference[1:] = IndicatorEngine(change[1:]).std(window)
+    else:
+      raise ValueError(f"Unknown spike method: {method}")
+  return reference
+
+
+def spike_mask(close, window=20, threshold=1.5, method=MEAN_ABS):
+  """
+  Flags spikes in a close-price array with array operations.
+
+  Args:
+    close: Array of close prices.
+    window: Number of bars for the reference move.
+    threshold: A bar is a spike when its absolute change exceeds threshold * reference.
+    method: MEAN_ABS (mean absolute change) or STD (standard deviation of changes).
+
+  Returns:
+    (mask, magnitude): a boolean spike mask and each bar's absolute change
+    expressed in multiples of its reference move (NaN where undefined).
+  """
+  close = np.asarray(close, dtype=float)
+  change = np.full(len(close), np.nan)
+  change[1:] = np.diff(close)
+  reference = _spike_reference(change, window, method)
+  with np.errstate(divide='ignore', invalid='ignore'):
+    magnitude = np.abs(change) / reference
+    mask = np.abs(change) > threshold * reference
+  return mask, magnitude
+
+
+def last_bar_is_spike(close, window=20, threshold=1.5, method=MEAN_ABS):
+  """
+  Returns True if the last bar is a spike. Only the last window + 1 prices are read.
+  """
+  close = np.asarray(close, dtype=float)
+  if len(close) <= window:
+    return False
+  mask, _ = spike_mask(close[-window - 1:], window, threshold, method)
+  return bool(mask[-1])
+
+
+def prefix_spike_mask(close, window=20, threshold=1.5, method=MEAN_ABS):
+  """
+  last_bar_is_spike(close[:t + 1]) for every bar t, as one boolean array.
+
+  spike_mask over the whole array measures every window from the array's
+  first change, so near the threshold its rounding can differ from the
+  window + 1 slice last_bar_is_spike reads. Here each bar's reference move is
+  summed from its own window alone, in the same order IndicatorEngine does.
+  """
+  close = np.asarray(close, dtype=float)
+  flags = np.zeros(len(close), dtype=bool)
+  if len(close) <= window:
+    return flags
+  change = np.diff(close)
+  if method == MEAN_ABS:
+    windows = sliding_window_view(np.abs(change), window)
+  elif method == STD:
+    windows = sliding_window_view(change, window)
+  else:
+    raise ValueError(f"Unknown spike method: {method}")
+  # Row j holds the `window` changes up to bar j + window, offset by its first change like IndicatorEngine._sums
+  first = windows[:, 0]
+  shifted = windows - first[:, None]
+  total = np.cumsum(shifted, axis=1)[:, -1]
+  if method == MEAN_ABS:
+    reference = total / window + first
+  else:
+    total_sq = np.cumsum(shifted * shifted, axis=1)[:, -1]
+    reference = np.sqrt(np.maximum((total_sq - total * total / window) / (window - 1), 0.0))
+  with np.errstate(invalid='ignore'):
+    flags[window:] = np.abs(change[window - 1:]) > threshold * reference
+  return flags
+
 
 def detect_spikes(df, spike_threshold=2):
   """
@@ -10,11 +102,24 @@ def detect_spikes(df, spike_threshold=2):
     spike_threshold: Number of standard deviations for a spike.
 
   Returns:
-    A DataFrame with a 'spike' column indicating whether a spike occurred.
+    The rows of df where a spike occurred.
   """
 
-  df['price_change'] = df['close'].diff()
-  df['std'] = df['price_change'].rolling(window=20).std()
-  df['spike'] = abs(df['price_change']) > spike_threshold * df['std']
+  mask, _ = spike_mask(df['close'].to_numpy(), window=20, threshold=spike_threshold, method=STD)
+  return df[mask]
+
+
+def detect_spike(df, window=20, threshold=1.5):
+    """
+    Detects spikes in the price data based on the size of the price movement compared to recent history.
+
+    Args:
+    - df: DataFrame containing price data with a 'close' column.
+    - window: Number of periods to calculate the average volatility.
+    - threshold: Multiplier to determine if the current price movement is a spike.
 
-  return df[df['spike'] == True]
\ No newline at end of file
+    Returns:
+    - A list of indices where spikes were detected.
+    """
+    mask, _ = spike_mask(df['close'].to_numpy(), window=window, threshold=threshold, method=MEAN_ABS)
+    return np.flatnonzero(mask).tolist()
@@ -0,0 +1,151 @@
+import numpy as np
+from utils.indicators import IndicatorEngine
+from ResistanceSupportDectector.detector import ma_support_resistance_series, bollinger_support_resistance_series, price_near_bands_series
+from ResistanceSupportDectector.pivots import pivot_proximity_series
+from ResistanceSupportDectector.spikeDectector import prefix_spike_mask
+
+
+def strength_series(
+    df,
+    ma_period=10,
+    ma48_period=48,
+    ma_tolerance=0.01,
+    bb_period=20,
+    bb_std=2,
+    bb_tolerance=0.01,
+    rsi_period=14,
+    spike_window=20,
+    spike_threshold=1.5,
+    pivot_tolerance=0.005,
+    engine=None,
+):
+    """
+    Computes MyStrategy's signal strength for every bar of a history in one vectorised pass.
+
+    Bar t gets the value MyStrategy(df.iloc[:t + 1]).run() would return: every
+    indicator is causal, and the adjustments are applied in the same order as
+    calculate_signal_strength so the floating point result is identical.
+
+    Args:
+    - df: DataFrame with 'high', 'low' and 'close' columns.
+    - engine: Optional IndicatorEngine over df, to reuse already computed indicators.
+    - The remaining arguments are the parameters MyStrategy.run uses.
+
+    Returns:
+    - A float array of strengths in [0, 1], one per bar.
+    """
+    if engine is None:
+        engine = IndicatorEngine.from_frame(df)
+    close = engine.close
+    n = len(close)
+
+    ma = engine.sma(ma_period)
+    ma48 = engine.sma(ma48_period)
+    with np.errstate(invalid='ignore'):
+        ma_proximity = np.abs(close - ma) / ma <= ma_tolerance
+        ma48_proximity = np.abs(close - ma48) / ma48 <= ma_tolerance
+    ma_support_resistance = ma_support_resistance_series(close, ma, ma_period)
+    ma48_support_resistance = ma_support_resistance_series(close, ma48, ma48_period)
+
+    mid, upper_band, lower_band = engine.bollinger_bands(bb_period, bb_std)
+    bb_signal = price_near_bands_series(close, upper_band, lower_band, bb_tolerance)
+    bb_support_resistance = bollinger_support_resistance_series(close, upper_band, lower_band)
+
+    # Per-bar windows, exactly as MyStrategy reads the spike flag of its last bar
+    spikes = prefix_spike_mask(close, window=spike_window, threshold=spike_threshold)
+    rsi = engine.rsi(rsi_period)
+    pivots = pivot_proximity_series(df, tolerance=pivot_tolerance)
+    short_ema, long_ema = engine.ema(50), engine.ema(200)
+
+    strength = np.full(n, 0.5)
+    strength += np.where(ma_proximity, 0.1 * ma_support_resistance, 0.0)
+    strength += np.where(ma48_proximity, 0.1 * ma48_support_resistance, 0.0)
+    strength += 0.15 * bb_support_resistance
+    strength -= 0.1 * bb_signal
+    strength -= np.where(spikes, 0.2, 0.0)
+    strength += np.where(rsi < 30, 0.1, np.where(rsi > 70, -0.1, 0.0))
+    strength += 0.15 * pivots
+    strength += np.where(short_ema > long_ema, 0.1, np.where(short_ema < long_ema, -0.1, 0.0))
+    return np.clip(strength, 0, 1)
+
+
+def rsi_strategy_series(df, ma_period=10, tolerance=0.02, std_dev=2, bb_period=20, bb_tolerance=0.005, engine=None):
+    """
+    Strategy.rsiStrategy evaluated at every bar.
+
+    Returns:
+    - An int array per bar: 1 for "BUY", -1 for "SELL", 0 for "HOLD".
+    """
+    if engine is None:
+        engine = IndicatorEngine.from_frame(df)
+    close = engine.close
+
+    buy = np.zeros(len(close), dtype=bool)
+    sell = np.zeros(len(close), dtype=bool)
+    for period in (ma_period, 48):
+        ma = engine.sma(period)
+        with np.errstate(invalid='ignore'):
+            near = np.abs(close - ma) / ma <= tolerance
+        behavior = ma_support_resistance_series(close, ma, period)
+        buy |= (behavior == 1) & near
+        sell |= (behavior == -1) & near
+
+    _, upper_band, lower_band = engine.bollinger_bands(bb_period, std_dev)
+    bb_behavior = bollinger_support_resistance_series(close, upper_band, lower_band)
+    near_bb = price_near_bands_series(close, upper_band, lower_band, bb_tolerance)
+    buy |= (bb_behavior == 1) | (near_bb == -1)
+    sell |= (bb_behavior == -1) | (near_bb == 1)
+
+    return (buy & ~sell).astype(int) - (sell & ~buy).astype(int)
+
+
+def decide(strength, results, buy_threshold=0.65, strong_buy_threshold=0.7, sell_threshold=0.52, strong_sell_threshold=0.4):
+    """
+    Final decision of Strategy.process_multiple_timeframes: 1 buy, -1 sell, 0 hold.
+
+    Args:
+    - strength: Combined signal strength.
+    - results: rsiStrategy result ("BUY"/"SELL"/"HOLD") for every timeframe.
+    """
+    if strength >= buy_threshold and all(result == "BUY" for result in results):
+        return 1
+    elif strength >= strong_buy_threshold:
+        return 1
+    elif strength <= sell_threshold and all(result == "SELL" for result in results):
+        return -1
+    elif strength <= strong_sell_threshold:
+        return -1
+    else:
+        return 0
+
+
+def decision_series(strengths, rsi_codes, weights, buy_threshold=0.65, strong_buy_threshold=0.7, sell_threshold=0.52, strong_sell_threshold=0.4):
+    """
+    decide() for every bar.
+
+    Args:
+    - strengths: (bars x timeframes) MyStrategy strengths.
+    - rsi_codes: (bars x timeframes) rsi_strategy_series codes.
+    - weights: One weight per timeframe.
+
+    Returns:
+    - (decisions, combined strength) arrays.
+    """
+    # Summed in the same order as combine_timeframe_signals so ties fall the same way
+    combined = np.zeros(len(strengths))
+    for column, weight in enumerate(weights):
+        combined = combined + strengths[:, column] * weight
+
+    all_buy = (rsi_codes == 1).all(axis=1)
+    all_sell = (rsi_codes == -1).all(axis=1)
+    decisions = np.select(
+        [
+            (combined >= buy_threshold) & all_buy,
+            combined >= strong_buy_threshold,
+            (combined <= sell_threshold) & all_sell,
+            combined <= strong_sell_threshold,
+        ],
+        [1, 1, -1, -1],
+        default=0,
+    )
+    return decisions, combined
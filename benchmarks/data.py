@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+from utils.storage import CandleStore
+
+RATES_DTYPE = np.dtype(list(CandleStore.COLUMNS.items()))
+
+# Bar lengths in seconds of Config.TIME_FRAMES (M1, M5, M15)
+FRAME_SECONDS = (60, 300, 900)
+START = 1_700_006_400  # 2023-11-15 00:00 UTC
+
+
+def synthetic_rates(bars, step=60, seed=0, start=START):
+    """
+    Boom/Crash-like candles: a small random walk with occasional large spikes.
+
+    Returns:
+    - A rates array shaped like mt5.copy_rates_range output.
+    """
+    rng = np.random.default_rng(seed)
+    moves = rng.normal(0, 0.3, bars)
+    spikes = rng.random(bars) < 0.002
+    moves[spikes] += rng.choice([-20.0, 20.0], int(spikes.sum()))
+    close = 1000 + np.cumsum(moves)
+
+    rates = np.zeros(bars, dtype=RATES_DTYPE)
+    rates['time'] = start + np.arange(bars) * step
+    rates['open'] = np.concatenate(([close[0]], close[:-1]))
+    rates['close'] = close
+    rates['high'] = np.maximum(rates['open'], close) + 0.1
+    rates['low'] = np.minimum(rates['open'], close) - 0.1
+    rates['tick_volume'] = step
+    rates['spread'] = 50
+    return rates
+
+
+def resample(rates, factor):
+    """Aggregates M1 rates into bars of `factor` M1 bars."""
+    bars = len(rates) // factor
+    groups = rates[:bars * factor].reshape(bars, factor)
+    out = np.zeros(bars, dtype=RATES_DTYPE)
+    out['time'] = groups['time'][:, 0]
+    out['open'] = groups['open'][:, 0]
+    out['high'] = groups['high'].max(axis=1)
+    out['low'] = groups['low'].min(axis=1)
+    out['close'] = groups['close'][:, -1]
+    out['tick_volume'] = groups['tick_volume'].sum(axis=1)
+    out['spread'] = groups['spread'][:, -1]
+    return out
+
+
+def synthetic_frames(bars, seed=0):
+    """
+    One DataFrame per timeframe, each with `bars` bars, like TradingBot.fetch_all_timeframes returns.
+    """
+    return [pd.DataFrame(synthetic_rates(bars, step, seed=seed + i)) for i, step in enumerate(FRAME_SECONDS)]
+
+
+def synthetic_store(root, symbols, minutes, seed=0):
+    """
+    Writes `minutes` of M1 history (and the M5/M15 bars built from it) for each symbol into a CandleStore.
+    """
+    store = CandleStore(root)
+    for i, symbol in enumerate(symbols):
+        rates = synthetic_rates(minutes, 60, seed=seed + i)
+        store.append(symbol, 1, rates)
+        store.append(symbol, 5, resample(rates, 5))
+        store.append(symbol, 15, resample(rates, 15))
+    return store
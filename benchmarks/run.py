@@ -0,0 +1,263 @@
+"""
+Benchmarks for the signal pipeline.
+
+Every component is timed over frames of 500 to 50k bars, and the full main.py
+cycle over 1 to 500 symbols against the MT5 replay simulator, so nothing needs
+a terminal. Results are written as JSON to diff between commits.
+
+Usage (from the repository root):
+    python -m benchmarks.run [--quick] [--bars 500 5000] [--symbols 1 10] [--out results.json]
+    python -m benchmarks.run --compare old.json new.json
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+# The full cycle always runs against the replay simulator and a scratch database
+os.environ['MT5_BACKEND'] = 'replay'
+os.environ['CANDLE_STORE_PATH'] = ''
+os.environ['SIGNAL_CACHE_FILE'] = ''
+os.environ.setdefault('MT5_LOGIN', '0')
+os.environ.setdefault('MT5_PASSWORD', '')
+os.environ.setdefault('MT5_SERVER', 'replay')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+
+import numpy as np
+
+BARS = (500, 2000, 10000, 50000)
+SYMBOLS = (1, 10, 100, 500)
+QUICK_BARS = (500, 2000)
+QUICK_SYMBOLS = (1, 10)
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+
+
+def measure(func, repeat):
+    """
+    Calls func() once to warm up, then `repeat` more times.
+
+    Returns:
+    - The per-call latencies in seconds.
+    """
+    func()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def summary(name, group, timings, work, unit, **params):
+    timings = np.asarray(timings) * 1000
+    median = float(np.median(timings))
+    return {
+        'name': name,
+        'group': group,
+        **params,
+        'repeat': len(timings),
+        'min_ms': float(timings.min()),
+        'median_ms': median,
+        'p95_ms': float(np.percentile(timings, 95)),
+        'mean_ms': float(timings.mean()),
+        'throughput': work / (median / 1000) if median else None,
+        'unit': unit,
+    }
+
+
+def run_async(loop, coroutine_function, *args, **kwargs):
+    return lambda: loop.run_until_complete(coroutine_function(*args, **kwargs))
+
+
+def component_cases(frames, loop):
+    """
+    (name, group, callable) for every component, on fresh objects so no memoised result is reused.
+    """
+    from utils.indicators import Indicator
+    from ResistanceSupportDectector import detector, spikeDectector, pivots
+    from ResistanceSupportDectector.aiStartegy import MyStrategy, combine_timeframe_signals
+    from utils.strategies import Strategy
+
+    df = frames[0]
+    price = float(df['close'].iloc[-1])
+    return [
+        ('Indicator.rsi', 'indicators', lambda: Indicator(df).rsi()),
+        ('Indicator.macd', 'indicators', lambda: Indicator(df).macd()),
+        ('Indicator.bollinger_bands', 'indicators', lambda: Indicator(df).bollinger_bands()),
+        ('Indicator.moving_average', 'indicators', lambda: Indicator(df).moving_average()),
+        ('Indicator.calculate_atr', 'indicators', lambda: Indicator(df).calculate_atr()),
+        ('is_support_resistance', 'detectors', run_async(loop, detector.is_support_resistance, df)),
+        ('is_price_near_ma', 'detectors', run_async(loop, detector.is_price_near_ma, df)),
+        ('is_bollinger_band_support_resistance', 'detectors', run_async(loop, detector.is_bollinger_band_support_resistance, df)),
+        ('is_price_near_bollinger_band', 'detectors', run_async(loop, detector.is_price_near_bollinger_band, df)),
+        ('detect_trend', 'detectors', lambda: detector.detect_trend(df)),
+        ('detect_spikes', 'detectors', lambda: spikeDectector.detect_spikes(df)),
+        ('detect_spike', 'detectors', lambda: spikeDectector.detect_spike(df)),
+        ('get_pivot_point_data', 'detectors', lambda: pivots.get_pivot_point_data(df, current_price=price)),
+        ('MyStrategy.run', 'strategies', lambda: loop.run_until_complete(MyStrategy(df).run())),
+        ('MyStrategy.strength_series', 'strategies', lambda: MyStrategy(df).strength_series()),
+        ('Strategy.rsiStrategy', 'strategies', run_async(loop, Strategy.rsiStrategy, df)),
+        ('Strategy.process_multiple_timeframes', 'strategies', run_async(loop, Strategy.process_multiple_timeframes, frames)),
+        ('combine_timeframe_signals', 'strategies', run_async(loop, combine_timeframe_signals, [0.6, 0.7, 0.8])),
+    ]
+
+
+def bench_components(bars_list, repeat):
+    from benchmarks.data import synthetic_frames
+
+    results = []
+    loop = asyncio.new_event_loop()
+    try:
+        for bars in bars_list:
+            frames = synthetic_frames(bars)
+            for name, group, func in component_cases(frames, loop):
+                with open(os.devnull, 'w') as sink, contextlib.redirect_stdout(sink):
+                    timings = measure(func, repeat)
+                results.append(summary(name, group, timings, bars, 'bars/s', bars=bars, symbols=1))
+                print(f"{name:40s} bars={bars:<6d} median={results[-1]['median_ms']:9.3f} ms")
+    finally:
+        loop.close()
+    return results
+
+
+def bench_cycles(symbol_counts, repeat, workdir):
+    """
+    Times main.run_cycle against the replay simulator. The first cycle downloads the whole
+    window ('cold'); later cycles one bar later only fetch new bars ('warm').
+    """
+    from django.conf import settings
+    settings.DATABASES['default']['NAME'] = os.path.join(workdir, 'bench.sqlite3')
+
+    from django.core.management import call_command
+    from benchmarks.data import synthetic_store, START
+    from bot import TradingBot
+    from main import run_cycle
+    from utils import mt5_backend, mt5_replay
+    from utils.metrics import metrics
+
+    call_command('migrate', verbosity=0)
+    window = 3600
+    results = []
+    for count in symbol_counts:
+        symbols = [f"Bench {i} Index" for i in range(count)]
+        root = os.path.join(workdir, f'store-{count}')
+        synthetic_store(root, symbols, window + 60 * (repeat + 2))
+        mt5_replay.configure(store=root, start=START + (window + 1) * 60)
+
+        bot = TradingBot(0, '', 'replay')
+        bot.connect()
+        loop = asyncio.new_event_loop()
+
+        def cycle():
+            with open(os.devnull, 'w') as sink, contextlib.redirect_stdout(sink):
+                loop.run_until_complete(run_cycle(bot, symbols))
+                # Queued orders execute while the clock advances; their prints stay out of the table too
+                loop.run_until_complete(mt5_backend.sleep(60))
+
+        try:
+            started = time.perf_counter()
+            cycle()
+            cold = [time.perf_counter() - started]
+            metrics.reset()
+            warm = measure(cycle, repeat)
+            stages = {stage: {key: values[key] for key in ('count', 'p50_ms', 'p95_ms', 'p99_ms')} for stage, values in metrics.snapshot()['stages'].items()}
+        finally:
+            with open(os.devnull, 'w') as sink, contextlib.redirect_stdout(sink):
+                loop.run_until_complete(bot.orders.close())
+                loop.run_until_complete(bot.writer.flush())
+            loop.close()
+            bot.disconnect()
+            bot.gateway.close()
+
+        results.append(summary('main.run_cycle', 'cycle_cold', cold, count, 'symbols/s', bars=window, symbols=count))
+        results.append(summary('main.run_cycle', 'cycle_warm', warm, count, 'symbols/s', bars=window, symbols=count))
+        # Per-stage latencies of the warm cycles (including the warm-up one)
+        results[-1]['stages'] = stages
+        print(f"{'main.run_cycle':40s} symbols={count:<4d} cold={cold[0] * 1000:9.1f} ms warm={results[-1]['median_ms']:9.1f} ms")
+    return results
+
+
+def metadata():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ''
+    import pandas as pd
+    return {
+        'commit': commit or 'unknown',
+        'created': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def compare(old_path, new_path):
+    """
+    Prints the median latency of every benchmark in two result files and the new/old ratio.
+    """
+    def load(path):
+        with open(path) as handle:
+            data = json.load(handle)
+        return data['meta'], {(r['name'], r['group'], r['bars'], r['symbols']): r for r in data['results']}
+
+    old_meta, old = load(old_path)
+    new_meta, new = load(new_path)
+    print(f"{'benchmark':52s} {'bars':>6s} {'syms':>5s} {old_meta['commit']:>12s} {new_meta['commit']:>12s} {'ratio':>7s}")
+    for key in sorted(old.keys() | new.keys()):
+        name, group, bars, symbols = key
+        before = old.get(key, {}).get('median_ms')
+        after = new.get(key, {}).get('median_ms')
+        ratio = f"{after / before:7.2f}" if before and after else f"{'-':>7s}"
+        label = name if group not in ('cycle_cold', 'cycle_warm') else f"{name} ({group})"
+        print(f"{label:52s} {bars:6d} {symbols:5d} {_ms(before):>12s} {_ms(after):>12s} {ratio}")
+
+
+def _ms(value):
+    return '-' if value is None else f"{value:.3f}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--bars', type=int, nargs='+', help='bars per frame for the component benchmarks')
+    parser.add_argument('--symbols', type=int, nargs='+', help='symbol counts for the full-cycle benchmark')
+    parser.add_argument('--repeat', type=int, default=5, help='timed runs per benchmark (after one warm-up run)')
+    parser.add_argument('--quick', action='store_true', help='small grid for a fast smoke run')
+    parser.add_argument('--skip-cycle', action='store_true', help='only run the component benchmarks')
+    parser.add_argument('--out', help='result file (defaults to benchmarks/results/<commit>.json)')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='compare two result files and exit')
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    bars = args.bars or (QUICK_BARS if args.quick else BARS)
+    symbols = args.symbols or (QUICK_SYMBOLS if args.quick else SYMBOLS)
+    meta = metadata()
+    meta['argv'] = sys.argv[1:] if argv is None else list(argv)
+
+    results = bench_components(bars, args.repeat)
+    if not args.skip_cycle:
+        with tempfile.TemporaryDirectory() as workdir:
+            results += bench_cycles(symbols, args.repeat, workdir)
+
+    out = args.out or os.path.join(RESULTS_DIR, f"{meta['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w') as handle:
+        json.dump({'meta': meta, 'results': results}, handle, indent=2)
+    print("results written to", out)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,13 +8,26 @@ import os
 import django
 from asgiref.sync import sync_to_async
 import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from utils.candle_cache import CandleCache, history_bars
+from utils.storage import CandleStore
+from utils.metrics import metrics
+from utils.db_writer import WriteBehindQueue
+from utils.dedup_cache import DedupCache
+from utils.mt5_gateway import MT5Gateway
+from utils.order_executor import OrderExecutor, OrderIntent
+from utils.position_book import PositionBook
+from utils.signal_engine import SignalEngine
 
 
 # Django setup
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
 django.setup()
 from traderbot.models import Market, Indicator as IndicatorModel, Signal
-import MetaTrader5 as mt5
+from traderbot.stream import hub
+from utils import mt5_backend
+from utils.mt5_backend import mt5
 
 class TradingBot:
     def __init__(self, login, password, server):
@@ -22,57 +35,100 @@ class TradingBot:
         self.password = password
         self.server = server
         self.connected = False
-        self.signals_cache = {} 
+        # (symbol, type) of recently emitted signals, timed by the terminal's clock so a replay expires them too
+        self.signals_cache = DedupCache(
+            max_entries=Config.SIGNAL_CACHE_MAX_ENTRIES,
+            ttl=Config.SIGNAL_CACHE_TTL,
+            path=Config.SIGNAL_CACHE_FILE or None,
+            clock=lambda: mt5_backend.now(timezone.utc).timestamp(),
+        )
+        self.candles = CandleCache(max_bars=history_bars(Config.TIME_FRAMES, Config.CANDLE_HISTORY_MINUTES))
+        self.store = CandleStore(Config.CANDLE_STORE_PATH) if Config.CANDLE_STORE_PATH else None
+        # Store appends are file I/O; one thread keeps them off the event loop and in order
+        self._store_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="store")
+        self.gateway = MT5Gateway(timeout=Config.MT5_CALL_TIMEOUT)
+        self.positions = PositionBook(self.gateway)
+        self.orders = OrderExecutor(self.gateway, max_retries=Config.ORDER_MAX_RETRIES, deviation=Config.ORDER_DEVIATION)
+        self.engine = SignalEngine(Config.TIME_FRAMES)
+        self.writer = WriteBehindQueue(batch_size=Config.DB_BATCH_SIZE, max_pending=Config.DB_MAX_PENDING)
+        self.markets = {}
     
     def connect(self):
-        if not mt5.initialize(): # type: ignore
-            print("initialize() failed, error code =", mt5.last_error()) # type: ignore
-            mt5.shutdown() # type: ignore
+        if not self.gateway.call_sync("initialize"):
+            print("initialize() failed, error code =", self.gateway.call_sync("last_error"))
+            self.gateway.call_sync("shutdown")
             self.connected = False
             return self.connected
-        authorized = mt5.login(self.login, password=self.password, server=self.server) # type: ignore
+        authorized = self.gateway.call_sync("login", self.login, password=self.password, server=self.server)
         self.connected = authorized
+        if self.connected:
+            # Warm restart: don't emit again the signals the previous run already saved
+            restored = self.signals_cache.load()
+            if restored:
+                print("restored", restored, "recent signals")
         return self.connected
 
     def disconnect(self):
-        mt5.shutdown() # type: ignore
+        self.gateway.call_sync("shutdown")
         self.connected = False
 
     async def fetch_data(self, symbol, timeframe, start, end):
         if not self.connected:
             raise Exception("Not connected to MT5")
-        rates = mt5.copy_rates_range(symbol, timeframe, start, end) # type: ignore
-        df = pd.DataFrame(rates)
+        # Once history is cached, only ask for bars from the last cached (possibly still forming) one onwards
+        last_time = self.candles.last_time(symbol, timeframe)
+        if last_time is not None:
+            start = datetime.fromtimestamp(last_time, tz=timezone.utc)
+        rates = await self.gateway.copy_rates_range(symbol, timeframe, start, end)
+        df = self.candles.update(symbol, timeframe, rates)
+        if self.store is not None and len(df) > 1:
+            # Every bar but the last one has closed; the store skips bars it already holds
+            await self.store_bars(symbol, timeframe, df.iloc[:-1])
         return df
 
+    async def store_bars(self, symbol, timeframe, rates):
+        """
+        Appends closed bars to the candle store on the store thread.
+        """
+        loop = asyncio.get_running_loop()
+        with metrics.span("store"):
+            await loop.run_in_executor(self._store_executor, self.store.append, symbol, timeframe, rates)
+
     async def fetch_multiple_data(self, symbols, timeframe, start, end):
         if not self.connected:
             raise Exception("Not connected to MT5")
         data_tasks = [self.fetch_data(symbol, timeframe, start, end) for symbol in symbols]
         return await asyncio.gather(*data_tasks)
     
-    async def fetch_all_timeframes(self, market, start, end):
+    async def fetch_all_timeframes(self, market, start, end, timeframes=None):
         if not self.connected:
             raise Exception("Not connected to MT5")
-        data_tasks = [self.fetch_data(market, timeframe, start, end) for timeframe in Config.TIME_FRAMES]
+        data_tasks = [
+            self.fetch_data(market, timeframe, start, end) if self._needs_fetch(market, timeframe, timeframes) else self._cached_frame(market, timeframe)
+            for timeframe in Config.TIME_FRAMES
+        ]
         return await asyncio.gather(*data_tasks)
-    
 
+    def _needs_fetch(self, market, timeframe, timeframes):
+        return timeframes is None or timeframe in timeframes or self.candles.last_time(market, timeframe) is None
+
+    async def _cached_frame(self, market, timeframe):
+        return self.candles.get(market, timeframe)
 
-    async def fetch_data_for_multiple_markets(self, markets, start, end):
+    async def fetch_data_for_multiple_markets(self, markets, start, end, timeframes=None):
         """Fetches data for multiple markets and timeframes concurrently.
 
         Args:
             markets: A list of market symbols.
             start: Start date for data retrieval.
             end: End date for data retrieval.
-            timeframes: A list of timeframes.
+            timeframes: Timeframes to refresh (all by default); the others come from the candle cache.
 
         Returns:
             A dictionary of dataframes, where keys are market symbols and values are lists of dataframes (one for each timeframe).
         """
 
-        data_tasks = [asyncio.create_task(self.fetch_all_timeframes(market, start, end)) for market in markets]
+        data_tasks = [asyncio.create_task(self.fetch_all_timeframes(market, start, end, timeframes)) for market in markets]
         return await asyncio.gather(*data_tasks)
             
     def apply_strategy(self, data, strategy):
@@ -81,87 +137,134 @@ class TradingBot:
         last_indicator_value = calc.tail(1).values[0]
         print(last_indicator_value)
 
-    async def generate_signal(self, data, strategy="rsistrategy", symbol=None):
+    async def generate_signal(self, data, strategy="rsistrategy", symbol=None, timeframes=None):
+        """
+        Evaluates the strategy on every timeframe of a symbol and returns a new signal, or None.
+
+        Timeframes not in `timeframes` (when given) reuse their last evaluation,
+        since their bar hasn't closed since.
+        """
         for time_frame_data in data:
                 if time_frame_data is None:
                     return None
                 # else:
                 #     #last_data = time_frame_data.tail(1)["close"].values[0]
-        price = mt5.symbol_info_tick(symbol)._asdict()['ask'] # type: ignore
+        tick = await self.gateway.symbol_info_tick(symbol)
+        price = tick._asdict()['ask']
         signal = {"symbol": symbol, "price": price, "type": None, "strength": None}
 
         if strategy == "rsistrategy":
             # stra = Strategy.rsiStrategy(data)
-            stra, strength = await Strategy.process_multiple_timeframes(data)
-     
-            signal["strength"] = round(strength, 2)
-            if stra == 1:
-                signal["type"] = "BUY"
-            elif stra == -1:
-                signal["type"] = "SELL"
-            elif stra == 0:
-                signal["type"] = "HOLD"
-            else:
-                return None
+            with metrics.span("strategy"):
+                stra, strength = await self.engine.evaluate(symbol, data, timeframes)
+            return await self.emit_signal(signal, stra, strength)
+
+    async def emit_signal(self, signal, stra, strength):
+        """
+        Turns a strategy decision into a signal: queues it for the database and
+        returns it, or returns None if the same signal was emitted recently.
 
-            #Check for duplicate signals
-            signal_key = (symbol, signal["type"])
-            if signal_key in self.signals_cache:
-                return None  # Duplicate found
+        Args:
+            signal: {"symbol", "price"} of the evaluated market.
+            stra: 1 buy, -1 sell, 0 hold.
+            strength: Combined strength.
+        """
+        symbol = signal["symbol"]
+        signal["strength"] = round(strength, 2)
+        if stra == 1:
+            signal["type"] = "BUY"
+        elif stra == -1:
+            signal["type"] = "SELL"
+        elif stra == 0:
+            signal["type"] = "HOLD"
+        else:
+            return None
 
-            # Save the signal to the database
-            saved_signal = await self.save_to_database("Signal", symbol, signal)
-                
-            # Update cache
-            self.signals_cache[signal_key] = saved_signal
-            return signal
+        #Check for duplicate signals
+        signal_key = (symbol, signal["type"])
+        if signal_key in self.signals_cache:
+            return None  # Duplicate found
+
+        # Save the signal to the database
+        with metrics.span("db_save"):
+            await self.save_to_database("Signal", symbol, signal)
             
+        # Update cache
+        self.signals_cache.add(signal_key)
+        return signal
+        
 
-    async def process_multiple_signals(self, data_list, market_list):
-            signals = await asyncio.gather(*(self.generate_signal(data, symbol=market) for data, market in zip(data_list, market_list)))
+    async def process_multiple_signals(self, data_list, market_list, timeframes=None):
+            signals = await asyncio.gather(*(self.generate_signal(data, symbol=market, timeframes=timeframes) for data, market in zip(data_list, market_list)))
             return signals
 
     async def save_to_database(self, model, symbol, data):
+        """
+        Queues a Market, Indicator or Signal row on the write-behind queue.
+
+        Rows are written in batches by self.writer; the returned instance has no
+        primary key until its batch is flushed. Returns None for a duplicate.
+        """
         if model == "Market":
-            market, created = await sync_to_async(Market.objects.get_or_create)(
-                symbol=symbol, 
-                defaults={
-                    'open': data["open"], 
-                    'high': data["high"], 
-                    'low': data["low"], 
-                    'close': data["close"], 
-                    'volume': data["volume"]
-                }
+            market = await self.get_market(symbol)
+            if market is not None:
+                return market
+            market = Market(
+                symbol=symbol,
+                open=data["open"],
+                high=data["high"],
+                low=data["low"],
+                close=data["close"],
+                volume=data["volume"],
             )
-            if created:
-                await sync_to_async(market.save)()
+            self.markets[symbol] = market
+            await self.writer.add(market, key=("Market", symbol))
             return market
 
         elif model == "Indicator":
-            indicator, created = await sync_to_async(IndicatorModel.objects.get_or_create)(
-                market=symbol, 
-                defaults={
-                    'rsi': data["rsi"], 
-                    'macd': data["macd"], 
-                    'bollinger_bands': data["bollinger_bands"], 
-                    'moving_average': data["moving_average"]
-                }
+            market = await self.get_market(symbol)
+            if market is None:
+                print(f"No market saved for {symbol}, indicator not saved")
+                return None
+            indicator = IndicatorModel(
+                market=market,
+                rsi=data["rsi"],
+                macd=data["macd"],
+                bollinger_bands=data["bollinger_bands"],
+                moving_average=data["moving_average"],
             )
-            if created:
-                await sync_to_async(indicator.save)()
+            if not await self.writer.add(indicator, key=("Indicator", symbol)):
+                return None
             return indicator
 
         elif model == "Signal":
-            signal, created = await sync_to_async(Signal.objects.get_or_create)(
-                symbol=symbol, 
-                price = data["price"],
-                type = data["type"], 
-                strength = data["strength"],
+            signal = Signal(
+                symbol=symbol,
+                price=data["price"],
+                type=data["type"],
+                strength=data["strength"],
             )
-            if created:
-                await sync_to_async(signal.save)()
+            # Same identity the old get_or_create lookup used
+            if not await self.writer.add(signal, key=("Signal", symbol, data["type"], data["price"], data["strength"])):
+                return None
+            # Stream clients get the signal now rather than after the next flush
+            hub.publish({
+                "symbol": symbol,
+                "type": data["type"],
+                "price": float(data["price"]),
+                "strength": float(data["strength"]),
+                "time": mt5_backend.now(timezone.utc).isoformat(),
+            })
             return signal
 
+    async def get_market(self, symbol):
+        """
+        The Market row of a symbol, looked up in the database at most once per symbol.
+        """
+        if symbol not in self.markets:
+            self.markets[symbol] = await sync_to_async(Market.objects.filter(symbol=symbol).first)()
+        return self.markets[symbol]
+
     def signal_toString(self, signal):
         if signal is None:
             return None
@@ -169,12 +272,15 @@ class TradingBot:
     
 
     async def open_trade(self, signal, catch_spikes=False):
+        """
+        Queues the order of a BUY or SELL signal on self.orders; it is sent in the background.
+        """
         #await asyncio.sleep(180)
         symbol = signal["symbol"]
-        lot_size = 0.2  # Lot size can be dynamic based on account balance or risk management strategy
+        lot_size = Config.ORDER_LOT_SIZE  # Lot size can be dynamic based on account balance or risk management strategy
 
         # Tolerance for order placement
-        tolerance = signal["price"] * 0.007
+        tolerance = signal["price"] * Config.ORDER_PRICE_TOLERANCE
         price = signal["price"]
         
 
@@ -188,39 +294,32 @@ class TradingBot:
             await self.catch_spikes(signal)
         else:
             if signal["type"] == "BUY":
-                order_type = mt5.ORDER_TYPE_BUY  # Buy limit order below the current price
                 newprice = min(signal["price"] + tolerance, price) 
                 
             elif signal["type"] == "SELL":
-                order_type = mt5.ORDER_TYPE_SELL  # Sell limit order above the current price
                 newprice = min(signal["price"] - tolerance, price)  # Sell limit price should be above the current price
             else:
                 # print(f"Unknown signal type: {signal['type']}")
                 return
 
+            # The dedup key can expire while its position is still open; don't stack another one
+            if self.positions.has(symbol, mt5.POSITION_TYPE_BUY if signal["type"] == "BUY" else mt5.POSITION_TYPE_SELL):
+                return
+
             # Define Stop Loss and Take Profit
             stop_loss = price - 0.0100 if signal["type"] == "BUY" else price + 0.0100
             take_profit = price + 0.0150 if signal["type"] == "BUY" else price - 0.0150
 
-            # Build the trade request
-            request = {
-                "action": mt5.TRADE_ACTION_DEAL,
-                "symbol": symbol,
-                "volume": lot_size,
-                "type": order_type,
-                "price": newprice,
-                # "sl": stop_loss,  # Adding stop loss to the request
-                # "tp": take_profit,  # Adding take profit to the request
-            }
-
-            # Send the order
-            result = mt5.order_send(request)  # type: ignore
-            #print("Order result:", result)
-
-            if result.retcode != mt5.TRADE_RETCODE_DONE:
-                print(f"Order failed for {symbol}, retcode={result.retcode}, error_desc={result.retcode}")
-            else:
-                print(f"{signal['type']} Order successfully placed for {symbol} at price {price}!")
+            # Queue the order; volume and price are normalised to the symbol's rules by the executor
+            intent = OrderIntent(
+                symbol,
+                signal["type"],
+                lot_size,
+                price=newprice,
+                # sl=stop_loss,  # Adding stop loss to the request
+                # tp=take_profit,  # Adding take profit to the request
+            )
+            return self.orders.submit(intent)
 
             
             #print(self.signals_cache)
@@ -235,15 +334,16 @@ class TradingBot:
             await self.open_trade(signal)
 
 
-    def close_position(self, signal=None):
+    async def close_position(self, signal=None):
         """
-        Closes an open position based on the given signal.
+        Closes the open positions of the signal's symbol (of every symbol without a signal),
+        as found in the position book.
 
         Args:
             signal (dict, optional): A dictionary containing signal information. Defaults to None.
         """
 
-        positions = mt5.positions_get() if signal is None else mt5.positions_get(symbol=signal["symbol"]) # type: ignore
+        positions = self.positions.get(None if signal is None else signal["symbol"])
         #print(mt5.positions_total())
         if len(positions) == 0:
             print("No open positions")
@@ -258,52 +358,41 @@ class TradingBot:
             if pos is None:
                 print("None")
                 break
-            #print("positions",mt5.symbol_info_tick(pos.symbol))
-            point = mt5.symbol_info_tick(pos.symbol)._asdict()['ask'] if pos.type == mt5.ORDER_TYPE_BUY else mt5.symbol_info_tick(pos.symbol)._asdict()['bid'] # type: ignore
-            deviation = 20
-            request = {
-                "action": mt5.TRADE_ACTION_DEAL,
-                "symbol": pos.symbol,
-                "volume": pos.volume,
-                "type": mt5.ORDER_TYPE_BUY if pos.type == mt5.ORDER_TYPE_SELL else mt5.ORDER_TYPE_SELL,
-                "price": point,
-                "deviation": deviation,
-                "magic": 234000,
-                "position": pos.ticket,
-                "comment": "Python script close",
-                "type_time": mt5.ORDER_TIME_GTC,
-           
-            }
-
-            result = mt5.order_send(request) # type: ignore
-            #print(result)
-            if result.retcode != mt5.TRADE_RETCODE_DONE:
-                print(f"order_send failed, retcode =", result.retcode)
-            else:
-                # print(mt5.positions_total())
-                print(f"Close order successfully placed: {result.order}, profit = {pos.profit}")
+            # The opposite deal at the current price; the executor prices it from the batch's tick
+            self.positions.remove(pos)
+            self.orders.submit(OrderIntent(
+                pos.symbol,
+                "BUY" if pos.type == mt5.ORDER_TYPE_SELL else "SELL",
+                pos.volume,
+                position=pos.ticket,
+                comment="Python script close",
+            ))
+
 
 
+    async def process_close_trade(self, signal):
+        """
+        Closes the symbol's positions if the signal goes against one of them.
 
-    def process_close_trade(self, signal):
+        Reads the position book, which run_cycle refreshes once per cycle, so no
+        terminal call is made here.
+        """
         #print(self.signals_cache)
         type = "SELL" if signal["type"] == "BUY" else "BUY"
-        positions = mt5.positions_get(symbol=signal["symbol"]) # type: ignore
+        buys = self.positions.has(signal["symbol"], mt5.POSITION_TYPE_BUY)
+        sells = self.positions.has(signal["symbol"], mt5.POSITION_TYPE_SELL)
         #print(positions)    
         sig_key = (signal['symbol'], type)
         
-        for pos in positions:
-            if pos._asdict()['type'] == 0 and signal['type'] == "SELL" and pos._asdict()['symbol'] == signal['symbol']:
-                self.close_position(signal=signal)
-                self.signals_cache.pop(sig_key)
-            elif pos._asdict()['type'] == 1 and signal['type'] == "BUY" and pos._asdict()['symbol'] == signal['symbol']:
-                self.close_position(signal=signal)
-                self.signals_cache.pop(sig_key)
-            elif signal["strength"] < 0.65 and pos._asdict()['type'] == 0:
-                self.close_position(signal=signal)
-
-            elif signal["strength"] > 0.5 and pos._asdict()['type'] == 1:
-                self.close_position(signal=signal)
+        # Any matching position closes every position of the symbol, as close_position did per match
+        if buys and signal['type'] == "SELL":
+            await self.close_position(signal=signal)
+            self.signals_cache.discard(sig_key)
+        elif sells and signal['type'] == "BUY":
+            await self.close_position(signal=signal)
+            self.signals_cache.discard(sig_key)
+        elif (buys and signal["strength"] < 0.65) or (sells and signal["strength"] > 0.5):
+            await self.close_position(signal=signal)
             # elif trailing_stop:
             #     trailing_stop_price = df['close'].iloc[-1] - (atr * 2) if pos_type == 0 else df['close'].iloc[-1] + (atr * 2)
             #     if df['close'].iloc[-1] < trailing_stop_price and pos_type == 0:  # Close BUY if below trailing stop
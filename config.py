@@ -1,7 +1,7 @@
 
 from dotenv import load_dotenv
 import os
-import MetaTrader5 as mt5
+from utils.mt5_backend import mt5
 
 load_dotenv()
 
@@ -21,4 +21,42 @@ class Config:
     TIME_FRAMES = [mt5.TIMEFRAME_M1, mt5.TIMEFRAME_M5, mt5.TIMEFRAME_M15]
 
     CONNECTION_TIMEOUT = 3
+    # Minutes of history fetched and kept in memory for every timeframe (3600 M1, 720 M5, 240 M15 bars)
+    CANDLE_HISTORY_MINUTES = 3600
+    MT5_CALL_TIMEOUT = 10
+    # Closed bars are appended here for backtests and optimizer runs; empty disables the store
+    CANDLE_STORE_PATH = os.environ.get('CANDLE_STORE_PATH', 'data/candles')
+
+    # Stage latency histograms are dumped to METRICS_FILE every METRICS_DUMP_INTERVAL seconds,
+    # and served on http://127.0.0.1:METRICS_PORT/metrics when the port is set
+    METRICS_FILE = os.environ.get('METRICS_FILE', 'data/metrics.json')
+    METRICS_DUMP_INTERVAL = 60
+    METRICS_PORT = int(os.environ.get('METRICS_PORT', 0))
+
+    # The REST API and the live signal stream (/api/stream/signals) are served from the bot
+    # process on http://API_HOST:API_PORT when the port is set, so the stream sees every signal
+    API_HOST = os.environ.get('API_HOST', '127.0.0.1')
+    API_PORT = int(os.environ.get('API_PORT', 0))
+
+    # Write-behind database queue: rows per bulk insert, and queued rows before add() waits for a flush
+    DB_BATCH_SIZE = 500
+    DB_MAX_PENDING = 10000
+
+    # A (symbol, type) signal isn't emitted again within SIGNAL_CACHE_TTL seconds (240 M1 bars) unless its
+    # position is closed; the live keys are snapshotted to SIGNAL_CACHE_FILE (empty disables it) every cycle
+    SIGNAL_CACHE_TTL = 240 * 60
+    SIGNAL_CACHE_MAX_ENTRIES = 10000
+    SIGNAL_CACHE_FILE = os.environ.get('SIGNAL_CACHE_FILE', 'data/signal_cache.json')
+
+    # Signals are computed in SHARD_WORKERS processes when set (see shards.py), and the
+    # symbols re-packed by measured cost every SHARD_REBALANCE_CYCLES cycles
+    SHARD_WORKERS = int(os.environ.get('SHARD_WORKERS', 0))
+    SHARD_REBALANCE_CYCLES = 15
+
+    # Orders: lots per trade, price tolerance (fraction of the price), allowed slippage (points)
+    # and sends per order when the terminal requotes
+    ORDER_LOT_SIZE = 0.2
+    ORDER_PRICE_TOLERANCE = 0.007
+    ORDER_DEVIATION = 20
+    ORDER_MAX_RETRIES = 3
     WEIGHTS = {"M1": 0.2, "M5": 0.3, "M15": 0.5}
\ No newline at end of file
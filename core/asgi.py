@@ -13,4 +13,14 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from traderbot.stream import STREAM_PATH, signal_stream
+
+
+async def application(scope, receive, send):
+    # The live signal stream is served outside Django so a long-lived response doesn't hold a worker thread
+    if scope['type'] == 'http' and scope['path'].rstrip('/') == STREAM_PATH:
+        await signal_stream(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
@@ -1,13 +1,98 @@
 import asyncio
 from bot import TradingBot
 from config import Config
-from datetime import datetime, timedelta
+from datetime import timedelta
 import pytz
-import MetaTrader5 as mt5
+from utils import mt5_backend
+from utils.metrics import metrics
+from utils.scheduler import BarScheduler
 import threading
 # Initialize bot with credentials from config
 bot = TradingBot(Config.MT5_LOGIN, Config.MT5_PASSWORD, Config.MT5_SERVER)
 
+
+def serve_api(port, host='127.0.0.1'):
+    """
+    Serves core.asgi (the REST API and the live signal stream) with uvicorn from a daemon thread.
+
+    Running in the bot's process lets the stream publish signals straight from the bot's hub.
+    """
+    import uvicorn
+    from core.asgi import application
+
+    server = uvicorn.Server(uvicorn.Config(application, host=host, port=port, log_level="warning", lifespan="off"))
+    threading.Thread(target=server.run, name="api", daemon=True).start()
+    return server
+
+
+async def run_cycle(bot, markets, i=0, timeframes=None, supervisor=None):
+    """
+    One pass of the trading loop: fetch every market, generate signals and act on them.
+
+    Args:
+        bot: A connected TradingBot.
+        markets: Market symbols to process.
+        i: Cycle counter, only used in the log output.
+        timeframes: Timeframes with a newly closed bar to refresh and re-evaluate (all by default);
+            the others reuse their cached candles and strengths.
+        supervisor: Optional ShardSupervisor that computes the signals in worker processes.
+
+    Returns:
+        The generated signals (None for markets without one).
+    """
+    with metrics.span("cycle"):
+        # Define timezone and calculate time range for data fetching
+        print("fetching data...")
+        timezone = pytz.timezone("Etc/UTC")
+        end_time = mt5_backend.now(tz=timezone)
+        start_time = end_time - timedelta(minutes=Config.CANDLE_HISTORY_MINUTES)  # 60 hours ago
+    
+        # Fetch data for multiple markets
+    
+        #data_coroutines = await bot.fetch_multiple_data(Config.MARKETS_LIST, Config.TIME_FRAMES[0], start_time, end_time)
+        #data_list = await asyncio.gather(*i)
+        #print(data_coroutines)
+        if supervisor is None:
+            with metrics.span("fetch"):
+                data_coroutines = await bot.fetch_data_for_multiple_markets(markets, start_time, end_time, timeframes)
+            # Generate signals for each market
+    
+            with metrics.span("signals"):
+                signals = await bot.process_multiple_signals(data_coroutines, markets, timeframes)
+        else:
+            # Downloads and shard evaluations overlap, so "signals" covers both
+            with metrics.span("signals"):
+                signals = await supervisor.process(markets, start_time, end_time, timeframes)
+        # print(signals)
+        # One positions snapshot for every close decision of this cycle
+        with metrics.span("positions"):
+            await bot.positions.refresh()
+        #bot.close_position()
+        catch_spikes = True
+        all_tasks = []
+        for signal in signals:
+            #print(signal)
+            if signal is None:
+                continue
+            if signal["type"] != "HOLD":
+                print(bot.signal_toString(signal), i, "seconds")
+            # tasks = asyncio.create_task(bot.open_trade(signal, catch_spikes=catch_spikes))
+            # all_tasks.append(tasks)
+
+            with metrics.span("open_trade"):
+                await bot.open_trade(signal, catch_spikes=True)
+            with metrics.span("close_trade"):
+                await bot.process_close_trade(signal)
+            #pint("postions", mt5.positions_total())
+              # Print each signal
+        await asyncio.gather(*all_tasks)
+        # This cycle's signals are written in the background while the next one waits
+        bot.writer.flush_soon()
+        bot.signals_cache.save()
+    metrics.maybe_dump()
+    return signals
+
+
 async def main():
     # Attempt to connect the bot
     connect = bot.connect()
@@ -27,51 +112,49 @@ async def main():
         # 
         
     print("bot connected")
+    metrics.dump_path = Config.METRICS_FILE
+    metrics.dump_interval = Config.METRICS_DUMP_INTERVAL
+    if Config.METRICS_PORT:
+        metrics.serve(Config.METRICS_PORT)
+        print("metrics on port", Config.METRICS_PORT)
+    if Config.API_PORT:
+        serve_api(Config.API_PORT, Config.API_HOST)
+        print("api on port", Config.API_PORT)
     i = 1
+    scheduler = BarScheduler(Config.TIME_FRAMES)
+    supervisor = None
+    if Config.SHARD_WORKERS:
+        from shards import ShardSupervisor
+        supervisor = ShardSupervisor(bot, Config.MARKETS_LIST, Config.SHARD_WORKERS, rebalance_every=Config.SHARD_REBALANCE_CYCLES)
+        print("signals computed in", Config.SHARD_WORKERS, "worker processes")
     #print("account balance", mt5.account_info().equity, ": ", "profit", mt5.account_info().profit)
     #print(mt5.account_info())
     while True:
         # try:
-            # Define timezone and calculate time range for data fetching
-            print("fetching data...")
-            timezone = pytz.timezone("Etc/UTC")
-            end_time = datetime.now(tz=timezone)
-            start_time = end_time - timedelta(minutes=3600)  # 34 hours ago
-            
-            # Fetch data for multiple markets
-            
-            #data_coroutines = await bot.fetch_multiple_data(Config.MARKETS_LIST, Config.TIME_FRAMES[0], start_time, end_time)
-            #data_list = await asyncio.gather(*i)
-            #print(data_coroutines)
-            data_coroutines = await bot.fetch_data_for_multiple_markets(Config.MARKETS_LIST, start_time, end_time)
-            # Generate signals for each market
-            
-            signals = await bot.process_multiple_signals(data_coroutines, Config.MARKETS_LIST)
-            # print(signals)
-            #bot.close_position()
-            catch_spikes = True
-            all_tasks = []
-            for signal in signals:
-                #print(signal)
-                if signal is None:
-                    continue
-                if signal["type"] != "HOLD":
-                    print(bot.signal_toString(signal), i, "seconds")
-                # tasks = asyncio.create_task(bot.open_trade(signal, catch_spikes=catch_spikes))
-                # all_tasks.append(tasks)
+            if mt5_backend.finished():
+                await bot.orders.drain()
+                account = bot.gateway.call_sync("account_info")
+                print("replay finished, account balance", account.balance, ": ", "profit", account.profit)
+                await bot.writer.flush()
+                if metrics.dump_path:
+                    metrics.dump()
+                if supervisor is not None:
+                    supervisor.close()
+                break
 
-                await bot.open_trade(signal, catch_spikes=True)
-                bot.process_close_trade(signal)
-                #pint("postions", mt5.positions_total())
-                  # Print each signal
-            await asyncio.gather(*all_tasks)
+            due = scheduler.due()
+            if not due:
+                # Woke before the bar closed (the sleep and the wall clock drifted apart); sleep again
+                await scheduler.wait()
+                continue
+            await run_cycle(bot, Config.MARKETS_LIST, i, timeframes=due, supervisor=supervisor)
             #print("========================================================", i)
             i = i + 1
             #print("========================================================")
 
 
-            # Wait for 60 seconds before fetching new data
-            await asyncio.sleep(60)
+            # Wait for the next bar to close, whatever time this cycle took
+            await scheduler.wait()
         # except Exception as e:
         #     print("Error:", e)
         #     break
@@ -82,7 +165,13 @@ if __name__ == "__main__":
         asyncio.run(main())  # Run the main function using asyncio
         
     except KeyboardInterrupt:
-        print("account balance", mt5.account_info().equity, ": ", "profit", mt5.account_info().profit) # type: ignore
+        account = bot.gateway.call_sync("account_info")
+        print("account balance", account.equity, ": ", "profit", account.profit)
         print("Shutting down bot...")
+        bot.writer.flush_sync()
+        bot.signals_cache.save()
         bot.disconnect()  # Disconnect the bot on exit
+        bot.gateway.close()
+        if metrics.dump_path:
+            metrics.dump()
         print("Bot disconnected.")
\ No newline at end of file
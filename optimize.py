@@ -1,10 +1,13 @@
 from ResistanceSupportDectector.aiStartegy import MyStrategy, combine_timeframe_signals
 import asyncio
 import numpy as np
+import pandas as pd
 from bot import TradingBot
 from config import Config
-from datetime import datetime, timedelta
+from datetime import timedelta
 import pytz
+from utils import mt5_backend
+from utils.evaluation import weight_grid, align_to_bars, direction_accuracy, signal_scores, scores_frame
 
 bot = TradingBot(Config.MT5_LOGIN, Config.MT5_PASSWORD, Config.MT5_SERVER)
 
@@ -16,165 +19,138 @@ class Optimize:
         self.m5_df = dataframes[1]
         self.m15_df = dataframes[2]
         self.weights = {"M1": 0.2, "M5": 0.3, "M15": 0.5}
+        self._strengths = None
 
         connect = bot.connect()
         if not connect:
             print("cant connet")
 
+    def strength_matrix(self):
+        """
+        Per-timeframe signal strengths for every M15 bar, computed once.
+
+        Each column is MyStrategy's strength series for one timeframe (M1, M5, M15),
+        aligned to the M15 bars the evaluators score against. The strengths do not
+        depend on the weights, so every weight vector reuses this matrix.
+
+        Returns:
+        - A (bars x timeframes) array.
+        """
+        if self._strengths is None:
+            target_times = self.m15_df['time'].to_numpy()
+            columns = []
+            for df in self.df:
+                strengths = MyStrategy(df).strength_series().to_numpy()
+                columns.append(align_to_bars(df['time'].to_numpy(), strengths, target_times))
+            self._strengths = np.column_stack(columns)
+        return self._strengths
+
 
     async def calculate_combined_signal(self, weights=None):
         """
         Calculates the combined signal strength for the M1, M5, M15 timeframes using dynamic weights.
         
         Args:
-        - m1_df: DataFrame for M1 timeframe.
-        - m5_df: DataFrame for M5 timeframe.
-        - m15_df: DataFrame for M15 timeframe.
-        - weights: Dictionary of weights for each timeframe {'m1': 0.2, 'm5': 0.3, 'm15': 0.5}.
+        - weights: Weights for each timeframe, in M1, M5, M15 order.
         
         Returns:
         - Combined signal strength based on weighted timeframes.
         """
         
-        # Calculate individual signal strength
-
         if weights is None:
             weights = self.weights.values()
-        
-
-        tasks = []
-        for df in self.df:
-            startegy = MyStrategy(df)
-            tasks.append(asyncio.create_task(startegy.run()))
-
-        results = await asyncio.gather(*tasks)
-        combined_strength, signal = await combine_timeframe_signals(results, weights)
-        
 
+        # The last row holds the strengths of the latest bar of every timeframe
+        latest = self.strength_matrix()[-1]
+        combined_strength, signal = await combine_timeframe_signals(latest, weights)
         
         return float(combined_strength)
 
-    async def optimize_weights(self):
+    async def optimize_weights(self, step=0.1, threshold=0.65, lookahead=5, chunk_size=1024):
         """
-        Iteratively adjust the weights to find the optimal combination that provides the best accuracy.
+        Finds the timeframe weights whose combined signal has the best directional accuracy.
+
+        All weight vectors are scored at once: the cached (bars x 3) strength matrix is
+        multiplied by a (3 x K) weight grid and compared with forward returns, so a
+        finer grid only adds columns to that product.
         
         Args:
-        - m1_df: DataFrame for M1 timeframe.
-        - m5_df: DataFrame for M5 timeframe.
-        - m15_df: DataFrame for M15 timeframe.
+        - step: Grid step for the weights (e.g. 0.01).
+        - threshold: Threshold to consider strong buy/sell signals.
+        - lookahead: Number of candles to look ahead to evaluate if the signal was accurate.
+        - chunk_size: Number of weight vectors scored per product, to bound memory.
         
         Returns:
         - The optimal weights that give the highest signal strength accuracy.
         """
-        
-        best_weights = None
-        best_accuracy = -1
-        
+        strengths = self.strength_matrix()
+        close = self.m15_df['close'].to_numpy(dtype=float)
+        complete = ~np.isnan(strengths).any(axis=1)
+        strengths, close = strengths[complete], close[complete]
 
-        
-        # Iterate through potential weights combinations (you can refine the granularity of steps)
-        for m1_weight in np.arange(0, 1.1, 0.1):
-            for m5_weight in np.arange(0, 1.1, 0.1):
-                m15_weight = 1 - m1_weight - m5_weight  # The sum of weights should equal 1
-                if m15_weight < 0:
-                    continue
-                
-                # Calculate combined signal for this set of weights
-                weights = {'m1': m1_weight, 'm5': m5_weight, 'm15': m15_weight}
-                combined_signal = await self.calculate_combined_signal(weights.values())
-                
-                # Evaluate accuracy (this is a placeholder for your evaluation logic)
-                accuracy = self.evaluate_accuracy(combined_signal)  
-                
-                # Keep track of the best weights
-                if accuracy > best_accuracy:
-                    best_accuracy = accuracy
-                    best_weights = weights
-                    
-        return best_weights
+        grid = weight_grid(step, strengths.shape[1])
+        accuracy = np.concatenate([
+            direction_accuracy(strengths @ grid[:, start:start + chunk_size], close, threshold, lookahead)[0]
+            for start in range(0, grid.shape[1], chunk_size)
+        ])
+
+        best = int(np.argmax(accuracy))
+        m1_weight, m5_weight, m15_weight = grid[:, best]
+        self.weight_accuracy = accuracy
+        return {'m1': m1_weight, 'm5': m5_weight, 'm15': m15_weight}
 
 
 
 
+    def combined_series(self, weights=None):
+        """
+        Weighted combined strength for every M15 bar.
+
+        Args:
+        - weights: Weights for each timeframe, in M1, M5, M15 order.
+        """
+        if weights is None:
+            weights = self.weights.values()
+        strengths = self.strength_matrix()
+        combined = np.zeros(len(strengths))
+        for column, weight in enumerate(weights):
+            combined = combined + strengths[:, column] * weight
+        return pd.Series(combined, index=self.m15_df.index)
+
     def evaluate_accuracy(self, combined_signal, threshold=0.65, lookahead=5):
         """
         Evaluate accuracy of combined signal by comparing it to actual price movement.
 
         Args:
-        - df: DataFrame containing price data.
-        - combined_signal: Calculated signal strength (buy/sell strength).
-        - threshold: Threshold to consider strong buy/sell signals.
-        - lookahead: Number of candles to look ahead to evaluate if the signal was accurate.
+        - combined_signal: Signal strength per M15 bar (e.g. combined_series()), or a single value.
+        - threshold: Threshold(s) to consider strong buy/sell signals.
+        - lookahead: Number(s) of candles to look ahead to evaluate if the signal was accurate.
 
         Returns:
-        - Accuracy as a percentage of correct signals.
+        - A DataFrame indexed by (threshold, lookahead) with the signal and correct counts,
+          accuracy and return statistics.
         """
-        correct_signals = 0
-        total_signals = 0
-        df = self.df[2]
-
-        for i in range(len(df) - lookahead):
-            future_price = df['close'].iloc[i + lookahead]
-            current_price = df['close'].iloc[i]
-
-            # Buy signal
-            if combined_signal > threshold:
-                total_signals += 1
-                if future_price > current_price:  # Price increases
-                    correct_signals += 1
-
-            # Sell signal
-            elif combined_signal < (1 - threshold):
-                total_signals += 1
-                if future_price < current_price:  # Price decreases
-                    correct_signals += 1
-
-        if total_signals == 0:
-            return 0  # Avoid division by zero
-
-        accuracy = correct_signals / total_signals
-        return accuracy
+        thresholds = np.atleast_1d(np.asarray(threshold, dtype=float))
+        scores = signal_scores(combined_signal, self.m15_df['close'], thresholds, 1 - thresholds, lookahead)
+        return scores_frame(scores, thresholds, lookahead)
     
-    def evaluate_spike_accuracy(self, combined_signal, spike_threshold=1.5, lookahead=5):
+    def evaluate_spike_accuracy(self, combined_signal, spike_threshold=1.5, lookahead=5, buy_level=0.65, sell_level=0.45):
         """
         Evaluates the accuracy of detecting spikes in Boom/Crash markets.
 
         Args:
-        - df: DataFrame containing price data.
-        - combined_signal: Signal strength calculated.
-        - spike_threshold: Price change threshold to consider as a spike.
-        - lookahead: Number of candles to look ahead for spike detection.
+        - combined_signal: Signal strength per M15 bar (e.g. combined_series()), or a single value.
+        - spike_threshold: Relative price change(s) to consider as a spike.
+        - lookahead: Number(s) of candles to look ahead for spike detection.
+        - buy_level, sell_level: Signal levels for buy and sell signals.
 
         Returns:
-        - Spike detection accuracy as a percentage.
+        - A DataFrame indexed by (spike_threshold, lookahead); 'accuracy' is the share of
+          signals followed by a spike in their direction.
         """
-        correct_spikes = 0
-        total_signals = 0
-        df = self.df[2]
-
-        for i in range(len(df) - lookahead):
-            future_price = df['close'].iloc[i + lookahead]
-            current_price = df['close'].iloc[i]
-
-            price_change = (future_price - current_price) / current_price
-
-            # Buy signal and upward spike
-            if combined_signal > 0.65:
-                total_signals += 1
-                if price_change > spike_threshold:
-                    correct_spikes += 1
-
-            # Sell signal and downward spike
-            elif combined_signal < 0.45:
-                total_signals += 1
-                if price_change < -spike_threshold:
-                    correct_spikes += 1
-
-        if total_signals == 0:
-            return 0
-
-        accuracy = correct_spikes / total_signals
-        return accuracy
+        spike_thresholds = np.atleast_1d(np.asarray(spike_threshold, dtype=float))
+        scores = signal_scores(combined_signal, self.m15_df['close'], buy_level, sell_level, lookahead, min_moves=spike_thresholds)
+        return scores_frame(scores, spike_thresholds, lookahead, name='spike_threshold')
     
 
     def evaluate_profit(self, combined_signal, threshold=0.65, lookahead=10, profit_target=0.02):
@@ -182,40 +158,18 @@ class Optimize:
         Evaluate accuracy by checking if the trade based on the signal was profitable.
 
         Args:
-        - df: DataFrame containing price data.
-        - combined_signal: Calculated signal strength (buy/sell strength).
-        - threshold: Threshold to consider strong buy/sell signals.
-        - lookahead: Number of candles to evaluate the profit target.
+        - combined_signal: Signal strength per M15 bar (e.g. combined_series()), or a single value.
+        - threshold: Threshold(s) to consider strong buy/sell signals.
+        - lookahead: Number(s) of candles to evaluate the profit target.
         - profit_target: Percentage of price increase/decrease to consider as a profitable trade.
 
         Returns:
-        - Profit accuracy as a percentage of profitable trades.
+        - A DataFrame indexed by (threshold, lookahead); 'accuracy' is the share of trades
+          that reached the profit target.
         """
-        profitable_trades = 0
-        total_trades = 0
-        df = self.df
-
-        for i in range(len(df) - lookahead):
-            future_price = df['close'].iloc[i + lookahead]
-            current_price = df['close'].iloc[i]
-
-            # Buy signal
-            if combined_signal > threshold:
-                total_trades += 1
-                if future_price > current_price * (1 + profit_target):  # Price increases by target
-                    profitable_trades += 1
-
-            # Sell signal
-            elif combined_signal < (1 - threshold):
-                total_trades += 1
-                if future_price < current_price * (1 - profit_target):  # Price decreases by target
-                    profitable_trades += 1
-
-        if total_trades == 0:
-            return 0  # Avoid division by zero
-
-        profit_accuracy = profitable_trades / total_trades
-        return profit_accuracy
+        thresholds = np.atleast_1d(np.asarray(threshold, dtype=float))
+        scores = signal_scores(combined_signal, self.m15_df['close'], thresholds, 1 - thresholds, lookahead, min_moves=profit_target)
+        return scores_frame(scores, thresholds, lookahead)
     
 
     async def run(self):
@@ -240,6 +194,9 @@ class Optimize:
         combined_signal =  await self.calculate_combined_signal()
         print("Combined Signal Strength:", combined_signal)
 
+        # The evaluators score the combined strength of every bar, not only the latest one
+        combined_signal = self.combined_series()
+
         spike_accuracy = self.evaluate_spike_accuracy(combined_signal)
         print("Spike Detection Accuracy:", spike_accuracy)
 
@@ -265,7 +222,7 @@ async def main():
     market = 'Boom 1000 Index'
 
     timezone = pytz.timezone("Etc/UTC")
-    end_time = datetime.now(tz=timezone)
+    end_time = mt5_backend.now(tz=timezone)
     start_time = end_time - timedelta(minutes=3600) 
 
     # Initialize the optimizer with historical data
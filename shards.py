@@ -0,0 +1,251 @@
+"""
+Sharded signal generation for large symbol universes.
+
+The symbols are split over worker processes so the CPU-bound strategy work
+runs on several cores. This process keeps the only terminal session: it
+downloads every symbol's new bars and sends them to the worker that owns the
+symbol. Each worker keeps its symbols' candle history and SignalEngine state
+between cycles, so a cycle only ships the bars that changed. The decisions
+come back here and go through the bot like unsharded ones (dedup, database
+writes, orders).
+
+Enabled in main.py with SHARD_WORKERS=<number of workers>.
+"""
+import asyncio
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timezone
+from config import Config
+from utils.candle_cache import CandleCache, history_bars
+from utils.metrics import metrics
+from utils.signal_engine import SignalEngine
+
+_worker = None
+
+
+class ShardWorker:
+    """
+    What one worker process holds for the symbols it owns: candle history and the signal engine.
+    """
+
+    def __init__(self, timeframes, max_bars):
+        self.timeframes = list(timeframes)
+        self.candles = CandleCache(max_bars=max_bars)
+        self.engine = SignalEngine(self.timeframes)
+        self.loop = asyncio.new_event_loop()
+
+    def evaluate(self, symbol, rates, timeframes=None):
+        """
+        Merges the new bars of a symbol and evaluates it.
+
+        Args:
+            symbol: Market symbol.
+            rates: {timeframe: rates array} of the timeframes refreshed this cycle.
+            timeframes: Timeframes with a newly closed bar (all by default).
+
+        Returns:
+            [decision, strength], or None without history for every timeframe.
+        """
+        data = []
+        for tf in self.timeframes:
+            df = self.candles.update(symbol, tf, rates[tf]) if tf in rates else self.candles.get(symbol, tf)
+            if df is None or df.empty:
+                return None
+            data.append(df)
+        return self.loop.run_until_complete(self.engine.evaluate(symbol, data, timeframes))
+
+    def forget(self, symbol):
+        self.candles.clear(symbol)
+        self.engine.forget(symbol)
+
+
+def _init_worker(timeframes, max_bars):
+    global _worker
+    _worker = ShardWorker(timeframes, max_bars)
+
+
+def _evaluate_batch(batch, timeframes, forget=()):
+    """
+    Worker entry point: drops the symbols in `forget` (moved to another shard), then
+    evaluates every (symbol, rates) of the batch.
+
+    Returns:
+        (symbol, [decision, strength] or None, seconds spent) for every symbol.
+    """
+    for symbol in forget:
+        _worker.forget(symbol)
+    results = []
+    for symbol, rates in batch:
+        started = time.perf_counter()
+        result = _worker.evaluate(symbol, rates, timeframes)
+        results.append((symbol, result, time.perf_counter() - started))
+    return results
+
+
+class ShardSupervisor:
+    """
+    Owns the worker processes, the symbol-to-shard assignment and the per-symbol costs.
+
+    Symbols start round-robin. The evaluation time of every symbol is tracked
+    as an exponential moving average, and every `rebalance_every` cycles the
+    symbols are re-packed (costliest first, each onto the least loaded shard).
+    The new plan is only adopted if it cuts the slowest shard's load by at
+    least `min_gain`, so shards don't churn over noise. A moved symbol is
+    dropped by its old worker and its full history is downloaded again for
+    the new one.
+    """
+
+    def __init__(self, bot, symbols, workers, rebalance_every=15, min_gain=0.1, smoothing=0.2):
+        self.bot = bot
+        self.workers = workers
+        self.rebalance_every = rebalance_every
+        self.min_gain = min_gain
+        self.smoothing = smoothing
+        self.executors = [self._start_worker() for _ in range(workers)]
+        self.assignment = {}
+        self.costs = {}
+        self.cycles = 0
+        self._last_bar = {}
+        self._forget = [[] for _ in range(workers)]
+        for symbol in symbols:
+            self._assign(symbol)
+
+    def _start_worker(self):
+        return ProcessPoolExecutor(max_workers=1, initializer=_init_worker, initargs=(Config.TIME_FRAMES, history_bars(Config.TIME_FRAMES, Config.CANDLE_HISTORY_MINUTES)))
+
+    def _assign(self, symbol):
+        loads = self.loads()
+        counts = [0] * self.workers
+        for shard in self.assignment.values():
+            counts[shard] += 1
+        self.assignment[symbol] = min(range(self.workers), key=lambda shard: (loads[shard], counts[shard]))
+        self.costs.setdefault(symbol, 0.0)
+
+    def loads(self, assignment=None):
+        """Estimated seconds of evaluation per shard."""
+        loads = [0.0] * self.workers
+        for symbol, shard in (assignment or self.assignment).items():
+            loads[shard] += self.costs.get(symbol, 0.0)
+        return loads
+
+    def shards(self, symbols):
+        """The symbols of each shard, in the given order."""
+        shards = [[] for _ in range(self.workers)]
+        for symbol in symbols:
+            if symbol not in self.assignment:
+                self._assign(symbol)
+            shards[self.assignment[symbol]].append(symbol)
+        return shards
+
+    async def _fetch(self, symbol, timeframe, start, end):
+        # Like TradingBot.fetch_data, but only the new bars are kept, for the worker to merge
+        last_bar = self._last_bar.get((symbol, timeframe))
+        if last_bar is not None:
+            start = datetime.fromtimestamp(last_bar, tz=timezone.utc)
+        rates = await self.bot.gateway.copy_rates_range(symbol, timeframe, start, end)
+        if rates is None or len(rates) == 0:
+            return None
+        self._last_bar[(symbol, timeframe)] = int(rates['time'][-1])
+        if self.bot.store is not None and len(rates) > 1:
+            await self.bot.store_bars(symbol, timeframe, rates[:-1])
+        return rates
+
+    async def _fetch_symbol(self, symbol, start, end, timeframes):
+        # A timeframe is downloaded when its bar closed, or when the worker has no history for it yet
+        wanted = [
+            tf for tf in Config.TIME_FRAMES
+            if timeframes is None or tf in timeframes or (symbol, tf) not in self._last_bar
+        ]
+        fetched = await asyncio.gather(*(self._fetch(symbol, tf, start, end) for tf in wanted))
+        return {tf: rates for tf, rates in zip(wanted, fetched) if rates is not None}
+
+    async def _run_shard(self, shard, symbols, start, end, timeframes):
+        if not symbols and not self._forget[shard]:
+            return {}
+        loop = asyncio.get_running_loop()
+        with metrics.span("fetch"):
+            rates = await asyncio.gather(*(self._fetch_symbol(symbol, start, end, timeframes) for symbol in symbols))
+        forget, self._forget[shard] = self._forget[shard], []
+        try:
+            with metrics.span(f"shard.{shard}"):
+                results = await loop.run_in_executor(self.executors[shard], _evaluate_batch, list(zip(symbols, rates)), timeframes, forget)
+        except BrokenProcessPool:
+            print(f"Shard {shard} worker died, restarting it")
+            self.executors[shard] = self._start_worker()
+            for symbol in symbols:
+                self._reset(symbol)
+            return {}
+
+        signals = {}
+        for symbol, result, seconds in results:
+            previous = self.costs.get(symbol) or seconds
+            self.costs[symbol] = previous + self.smoothing * (seconds - previous)
+            if result is None:
+                continue
+            stra, strength = result
+            tick = await self.bot.gateway.symbol_info_tick(symbol)
+            signal = {"symbol": symbol, "price": tick._asdict()['ask'], "type": None, "strength": None}
+            signals[symbol] = await self.bot.emit_signal(signal, stra, strength)
+        return signals
+
+    def _reset(self, symbol):
+        for tf in Config.TIME_FRAMES:
+            self._last_bar.pop((symbol, tf), None)
+
+    async def process(self, markets, start, end, timeframes=None):
+        """
+        Fetches, evaluates and emits the signals of every market, one batch per shard.
+
+        Shards run concurrently; the terminal serves their downloads in order, so
+        the first shard is already evaluating while the next one downloads.
+
+        Returns:
+            The signals in `markets` order (None for markets without one).
+        """
+        shards = self.shards(markets)
+        results = await asyncio.gather(*(
+            self._run_shard(shard, symbols, start, end, timeframes) for shard, symbols in enumerate(shards)
+        ))
+        signals = {}
+        for shard_signals in results:
+            signals.update(shard_signals)
+
+        self.cycles += 1
+        if self.rebalance_every and self.cycles % self.rebalance_every == 0:
+            self.rebalance()
+        return [signals.get(market) for market in markets]
+
+    def plan(self):
+        """Costliest symbol first onto the least loaded shard, keeping a symbol's shard on ties."""
+        loads = [0.0] * self.workers
+        assignment = {}
+        for symbol in sorted(self.assignment, key=lambda s: -self.costs.get(s, 0.0)):
+            current = self.assignment[symbol]
+            shard = min(range(self.workers), key=lambda shard: (loads[shard], shard != current))
+            assignment[symbol] = shard
+            loads[shard] += self.costs.get(symbol, 0.0)
+        return assignment
+
+    def rebalance(self):
+        """
+        Adopts plan() if it lowers the slowest shard's load by at least min_gain.
+
+        Returns:
+            The symbols that moved.
+        """
+        planned = self.plan()
+        current_max = max(self.loads())
+        if not current_max or max(self.loads(planned)) > current_max * (1 - self.min_gain):
+            return []
+        moved = [symbol for symbol, shard in planned.items() if shard != self.assignment[symbol]]
+        for symbol in moved:
+            self._forget[self.assignment[symbol]].append(symbol)
+            self._reset(symbol)
+        self.assignment = planned
+        print(f"rebalanced shards, moved {len(moved)} symbols, loads (ms):", [round(load * 1000, 1) for load in self.loads()])
+        return moved
+
+    def close(self):
+        for executor in self.executors:
+            executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,204 @@
+"""
+Parameter sweep for the strategy tunables, spread over a process pool.
+
+Candle arrays are placed in shared memory once and every worker attaches to
+them at start-up, so a task only carries its parameter dict. Each task
+replays the whole history with the vectorised strategy series and scores the
+resulting decisions against forward returns.
+
+Parameter names match Strategy.process_multiple_timeframes; names prefixed
+with "strategy." are MyStrategy.PARAMS overrides.
+
+Usage:
+    python sweep.py [--out data/sweep_results.csv]
+"""
+import argparse
+import asyncio
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from functools import partial
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+import pytz
+from utils import mt5_backend
+from config import Config
+from ResistanceSupportDectector.strength import strength_series, rsi_strategy_series, decision_series
+from utils.evaluation import align_to_bars, decision_returns
+
+COLUMNS = ['time', 'high', 'low', 'close']
+STRATEGY_PREFIX = 'strategy.'
+RESULTS_FILE = os.path.join('data', 'sweep_results.csv')
+
+DEFAULT_GRID = {
+    'ma_period': [5, 10, 20],
+    'tolerance': [0.01, 0.02],
+    'std_dev': [2, 2.5],
+    'buy_threshold': [0.6, 0.65],
+    'strong_buy_threshold': [0.7, 0.75],
+    'sell_threshold': [0.45, 0.52],
+    'strong_sell_threshold': [0.35, 0.4],
+    'strategy.ma_period': [10, 20],
+    'strategy.bb_period': [20],
+    'strategy.bb_std': [2],
+    'strategy.spike_window': [20],
+    'strategy.spike_threshold': [1.5, 2],
+}
+
+SIGNAL_DEFAULTS = {
+    'ma_period': 10,
+    'tolerance': 0.02,
+    'std_dev': 2,
+    'buy_threshold': 0.65,
+    'strong_buy_threshold': 0.7,
+    'sell_threshold': 0.52,
+    'strong_sell_threshold': 0.4,
+}
+
+
+def expand_grid(grid):
+    """Every combination of a {name: [values]} grid, as a list of dicts."""
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+class SharedFrames:
+    """
+    Copies the candle columns of each timeframe into a shared memory block.
+    Only `specs` (block names and shapes) is sent to the workers.
+    """
+
+    def __init__(self, dataframes):
+        self._blocks = []
+        self.specs = []
+        for df in dataframes:
+            values = df[COLUMNS].to_numpy(dtype=float).T
+            block = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+            np.ndarray(values.shape, dtype=float, buffer=block.buf)[:] = values
+            self._blocks.append(block)
+            self.specs.append((block.name, values.shape))
+
+    def close(self):
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Per-worker views onto the shared candles, set by _attach
+_blocks = []
+_frames = []
+
+
+def _attach(specs):
+    global _blocks, _frames
+    _blocks = [shared_memory.SharedMemory(name=name) for name, _ in specs]
+    _frames = [
+        pd.DataFrame(np.ndarray(shape, dtype=float, buffer=block.buf).T, columns=COLUMNS, copy=False)
+        for block, (_, shape) in zip(_blocks, specs)
+    ]
+
+
+def evaluate(params, frames=None, weights=None, lookahead=5, eval_frame=0):
+    """
+    Replays the history with one parameter combination.
+
+    Args:
+        params: Parameter combination (see DEFAULT_GRID for names).
+        frames: Candle DataFrames per timeframe (defaults to the worker's shared frames).
+        weights: Timeframe weights (defaults to Config.WEIGHTS).
+        lookahead: Bars ahead used to score each decision.
+        eval_frame: Index of the timeframe whose bars are scored.
+
+    Returns:
+        The params merged with the decision_returns statistics.
+    """
+    frames = _frames if frames is None else frames
+    weights = list(Config.WEIGHTS.values()) if weights is None else weights
+    strategy_params = {name[len(STRATEGY_PREFIX):]: value for name, value in params.items() if name.startswith(STRATEGY_PREFIX)}
+    signal_params = {**SIGNAL_DEFAULTS, **{name: value for name, value in params.items() if not name.startswith(STRATEGY_PREFIX)}}
+
+    target_times = frames[eval_frame]['time'].to_numpy()
+    strengths, codes = [], []
+    for df in frames:
+        times = df['time'].to_numpy()
+        strengths.append(align_to_bars(times, strength_series(df, **strategy_params), target_times))
+        codes.append(align_to_bars(times, rsi_strategy_series(
+            df, ma_period=signal_params['ma_period'], tolerance=signal_params['tolerance'], std_dev=signal_params['std_dev'],
+        ), target_times))
+    strengths, codes = np.column_stack(strengths), np.column_stack(codes)
+
+    decisions, _ = decision_series(
+        strengths, codes, weights,
+        buy_threshold=signal_params['buy_threshold'],
+        strong_buy_threshold=signal_params['strong_buy_threshold'],
+        sell_threshold=signal_params['sell_threshold'],
+        strong_sell_threshold=signal_params['strong_sell_threshold'],
+    )
+    # Bars before every timeframe has history cannot be traded
+    decisions = np.where(np.isnan(strengths).any(axis=1), 0, decisions)
+    return {**params, **decision_returns(decisions, frames[eval_frame]['close'].to_numpy(), lookahead)}
+
+
+def run_sweep(dataframes, grid=None, workers=None, weights=None, lookahead=5, eval_frame=0, sort_by='mean_return'):
+    """
+    Evaluates every combination of `grid` on a process pool.
+
+    Args:
+        dataframes: Candle DataFrames, one per timeframe (M1, M5, M15).
+        grid: {name: [values]} search space (defaults to DEFAULT_GRID).
+        workers: Number of worker processes (defaults to the CPU count).
+        sort_by: Column the result table is ranked by.
+
+    Returns:
+        A DataFrame with one row per combination, best first, indexed by rank.
+    """
+    combos = expand_grid(DEFAULT_GRID if grid is None else grid)
+    workers = workers or os.cpu_count() or 1
+    weights = list(Config.WEIGHTS.values()) if weights is None else weights
+    task = partial(evaluate, weights=weights, lookahead=lookahead, eval_frame=eval_frame)
+
+    with SharedFrames(dataframes) as shared:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach, initargs=(shared.specs,)) as pool:
+            rows = list(pool.map(task, combos, chunksize=max(1, len(combos) // (workers * 4))))
+
+    table = pd.DataFrame(rows).sort_values([sort_by, 'accuracy'], ascending=False).reset_index(drop=True)
+    table.index = table.index + 1
+    table.index.name = 'rank'
+    return table
+
+
+async def main(out=RESULTS_FILE):
+    # Imported here so worker processes never set up Django or the terminal
+    from bot import TradingBot
+
+    market = 'Boom 1000 Index'
+    timezone = pytz.timezone("Etc/UTC")
+    end_time = mt5_backend.now(tz=timezone)
+    start_time = end_time - timedelta(minutes=3600)
+
+    bot = TradingBot(Config.MT5_LOGIN, Config.MT5_PASSWORD, Config.MT5_SERVER)
+    bot.connect()
+    dataframes = await bot.fetch_all_timeframes(market, start_time, end_time)
+    bot.disconnect()
+
+    table = run_sweep(dataframes)
+    print(table.head(20))
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    table.to_csv(out)
+    print("results written to", out)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--out', default=RESULTS_FILE, help=f'result table (defaults to {RESULTS_FILE})')
+    args = parser.parse_args()
+    asyncio.run(main(args.out))
@@ -0,0 +1,27 @@
+import os
+import sys
+import pytest
+
+# The tests run against the offline MT5 simulator; config.py needs the login variables to import
+os.environ.setdefault('MT5_BACKEND', 'replay')
+os.environ.setdefault('MT5_LOGIN', '0')
+os.environ.setdefault('MT5_PASSWORD', '')
+os.environ.setdefault('MT5_SERVER', 'replay')
+os.environ.setdefault('CANDLE_STORE_PATH', '')
+os.environ.setdefault('SIGNAL_CACHE_FILE', '')
+os.environ.setdefault('METRICS_FILE', '')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope='session')
+def django_db(tmp_path_factory):
+    """Django set up against a fresh, migrated SQLite file instead of db.sqlite3."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+    import django
+    from django.conf import settings
+    django.setup()
+    settings.DATABASES['default']['NAME'] = str(tmp_path_factory.mktemp('db') / 'test.sqlite3')
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+    return settings.DATABASES['default']['NAME']
@@ -0,0 +1,32 @@
+import pytest
+
+
+@pytest.fixture
+def client(django_db, monkeypatch):
+    from django.conf import settings
+    from rest_framework.test import APIClient
+    monkeypatch.setattr(settings, 'ALLOWED_HOSTS', ['testserver'])
+    return APIClient()
+
+
+@pytest.mark.parametrize('path', [
+    '/api/trades/?market=abc',
+    '/api/trades/?market=99999999999999999999',
+    '/api/signals/?since=inf',
+    '/api/signals/?since=1e20',
+    '/api/signals/?until=nan',
+    '/api/signals/?since=2024-13-45T00:00:00',
+    '/api/signals/?min_strength=high',
+])
+def test_invalid_filter_values_are_rejected(client, path):
+    response = client.get(path)
+    assert response.status_code == 400
+    assert response.json()
+
+
+@pytest.mark.parametrize('path', [
+    '/api/trades/?market=1',
+    '/api/signals/?since=1700000000&until=2024-01-01T00:00:00Z&min_strength=0.5&symbol=A,B',
+])
+def test_valid_filter_values_are_accepted(client, path):
+    assert client.get(path).status_code == 200
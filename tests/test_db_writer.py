@@ -0,0 +1,94 @@
+import asyncio
+import pytest
+
+
+@pytest.fixture
+def signals(django_db):
+    from traderbot.models import Signal
+    Signal.objects.all().delete()
+    return Signal
+
+
+def _queue(**kwargs):
+    from utils.db_writer import WriteBehindQueue
+    return WriteBehindQueue(retry_delay=0, **kwargs)
+
+
+def test_writes_batches_and_drops_duplicate_keys(signals):
+    from utils.db_writer import rows_written
+    queue = _queue(batch_size=4)
+    sent = []
+    receiver = lambda sender, instances, **kwargs: sent.append(len(instances))
+    rows_written.connect(receiver, sender=signals)
+
+    async def run():
+        added = [await queue.add(signals(symbol='X', price=i), key=('X', i % 6)) for i in range(10)]
+        await queue.flush()
+        return added
+
+    try:
+        added = asyncio.run(run())
+    finally:
+        rows_written.disconnect(receiver, sender=signals)
+    assert added == [True] * 6 + [False] * 4
+    assert signals.objects.count() == queue.written == 6
+    assert sum(sent) == 6
+    assert len(queue) == 0
+
+
+def test_back_pressure_bounds_pending(signals):
+    queue = _queue(batch_size=1000, max_pending=5)
+    sizes = []
+
+    async def run():
+        for i in range(23):
+            await queue.add(signals(symbol='X', price=i))
+            sizes.append(len(queue))
+        await queue.flush()
+
+    asyncio.run(run())
+    assert max(sizes) <= 5
+    assert signals.objects.count() == 23
+
+
+def test_failing_batch_is_retried_then_written_row_by_row(signals, capsys):
+    queue = _queue(batch_size=1000, max_retries=2)
+
+    async def run():
+        for i in range(10):
+            await queue.add(signals(symbol='X', price='bad' if i in (3, 7) else i))
+        await queue.flush()
+
+    asyncio.run(run())
+    assert queue.dropped == 2
+    assert queue.written == 8
+    assert sorted(signals.objects.values_list('price', flat=True)) == [0, 1, 2, 4, 5, 6, 8, 9]
+    assert len(queue) == 0
+    assert capsys.readouterr().out.count('attempt') == 2
+
+
+def test_cancelled_flush_keeps_rows_for_flush_sync(signals):
+    queue = _queue()
+
+    async def run():
+        await queue.add(signals(symbol='X', price=1))
+        task = queue.flush_soon()
+        await asyncio.sleep(0)
+        task.cancel()
+
+    asyncio.run(run())
+    assert len(queue) == 1
+    queue.flush_sync()
+    assert len(queue) == 0
+    assert signals.objects.count() == 1
+
+
+def test_flush_sync_skips_a_batch_that_already_committed(signals):
+    queue = _queue()
+    row = signals(symbol='X', price=1)
+    queue._pending.append(row)
+    # The write finished on its thread but the cancelled coroutine never removed the batch
+    queue._write(list(queue._pending))
+    queue.flush_sync()
+    assert signals.objects.count() == 1
+    assert len(queue) == 0
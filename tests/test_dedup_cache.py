@@ -0,0 +1,100 @@
+import json
+from utils.dedup_cache import DedupCache
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_keys_expire_after_ttl():
+    clock = Clock()
+    cache = DedupCache(ttl=60, clock=clock)
+    cache.add(('A', 'BUY'))
+    clock.now += 59
+    assert ('A', 'BUY') in cache
+    # A hit doesn't extend the ttl
+    clock.now += 1
+    assert ('A', 'BUY') not in cache
+    assert len(cache) == 0
+
+
+def test_re_adding_restarts_the_ttl():
+    clock = Clock()
+    cache = DedupCache(ttl=60, clock=clock)
+    cache.add('k')
+    clock.now += 50
+    cache.add('k')
+    clock.now += 50
+    assert 'k' in cache
+
+
+def test_evicts_least_recently_used():
+    cache = DedupCache(max_entries=3)
+    for key in 'abc':
+        cache.add(key)
+    assert 'a' in cache
+    cache.add('d')
+    assert 'b' not in cache
+    # Checking a, c, d in that order leaves a as the least recently used
+    assert all(key in cache for key in 'acd')
+    cache.add('e')
+    assert 'a' not in cache
+    assert len(cache) == 3
+
+
+def test_purge_and_discard():
+    clock = Clock()
+    cache = DedupCache(ttl=10, clock=clock)
+    cache.add('old')
+    clock.now += 5
+    cache.add('new')
+    cache.add('gone')
+    cache.discard('gone')
+    cache.discard('missing')
+    clock.now += 6
+    assert cache.purge() == 1
+    assert 'new' in cache and 'gone' not in cache
+
+
+def test_snapshot_round_trip(tmp_path):
+    path = str(tmp_path / 'signals.json')
+    clock = Clock()
+    cache = DedupCache(ttl=100, path=path, clock=clock)
+    cache.add(('A', 'BUY'))
+    clock.now += 50
+    cache.add(('B', 'SELL'))
+    cache.save()
+
+    clock.now += 60
+    restored = DedupCache(ttl=100, path=path, clock=clock)
+    # ('A', 'BUY') expired while the bot was down
+    assert restored.load() == 1
+    assert ('B', 'SELL') in restored and ('A', 'BUY') not in restored
+    clock.now += 41
+    assert ('B', 'SELL') not in restored
+
+
+def test_save_only_when_changed(tmp_path):
+    path = tmp_path / 'signals.json'
+    cache = DedupCache(path=str(path))
+    cache.save()
+    assert not path.exists()
+    cache.add('k')
+    cache.save()
+    saved = path.read_text()
+    path.write_text('sentinel')
+    cache.save()
+    assert path.read_text() == 'sentinel'
+    assert json.loads(saved)['entries'] == [[['k'], None]]
+
+
+def test_load_ignores_future_and_broken_snapshots(tmp_path):
+    path = tmp_path / 'signals.json'
+    path.write_text(json.dumps({'saved': 5000, 'entries': [[['A', 'BUY'], None]]}))
+    assert DedupCache(path=str(path), clock=Clock(1000)).load() == 0
+    path.write_text('{not json')
+    assert DedupCache(path=str(path)).load() == 0
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+from benchmarks.data import synthetic_rates
+from utils.indicators import IndicatorEngine
+from ResistanceSupportDectector.detector import ma_crossings, ma_support_resistance, support_resistance_batch
+
+
+def _loop_bounces(close, ma, ma_period):
+    # The per-bar loop ma_crossings replaced
+    bounce_count = 0
+    for i in range(-ma_period, -1):
+        if (close[i] > ma[i] and close[i-1] < ma[i-1]) or \
+           (close[i] < ma[i] and close[i-1] > ma[i-1]):
+            bounce_count += 1
+    return bounce_count
+
+
+def _loop_support_resistance(close, ma, ma_period=10):
+    # ma_support_resistance before vectorisation
+    support_resistance = 'neutral'
+    if close[-1] > ma[-1]:
+        if close[-2] < ma[-2]:
+            support_resistance = 'resistance'
+    elif close[-1] < ma[-1]:
+        if close[-2] > ma[-2]:
+            support_resistance = 'support'
+    ma_slope = ma[-1] - ma[-2]
+    if support_resistance == 'resistance' and ma_slope > 0:
+        support_resistance = 'neutral'
+    elif support_resistance == 'support' and ma_slope < 0:
+        support_resistance = 'neutral'
+    bounce_count = _loop_bounces(close, ma, ma_period)
+    if bounce_count >= 2:
+        if support_resistance == 'neutral' and close[-1] > ma[-1]:
+            support_resistance = 'resistance'
+        elif support_resistance == 'neutral' and close[-1] < ma[-1]:
+            support_resistance = 'support'
+    return support_resistance
+
+
+@pytest.fixture(scope='module')
+def close():
+    return synthetic_rates(400, seed=11)['close'].astype(float)
+
+
+@pytest.mark.parametrize('period', [2, 5, 10, 48])
+def test_ma_crossings_matches_loop(close, period):
+    ma = IndicatorEngine(close).sma(period)
+    labels = set()
+    # Every window end long enough for the loop, including ones whose lookback reaches the NaN head of the MA
+    for end in range(period + 1, len(close) + 1):
+        c, m = close[:end], ma[:end]
+        assert ma_crossings(c, m, period)[0] == _loop_bounces(c, m, period), end
+        label = ma_support_resistance(c, m, period)
+        assert label == _loop_support_resistance(c, m, period), end
+        labels.add(label)
+    assert labels == {'support', 'resistance', 'neutral'}
+
+
+def test_support_resistance_batch_matches_single_period(close):
+    periods = [3, 5, 10, 20, 48]
+    for end in range(60, len(close) + 1, 7):
+        c = close[:end]
+        engine = IndicatorEngine(c)
+        batch = support_resistance_batch(c, periods, engine=engine)
+        for period in periods:
+            ma = engine.sma(period)
+            count, direction, slope = ma_crossings(c, ma, period)
+            assert batch[period]['label'] == _loop_support_resistance(c, ma, period)
+            assert batch[period]['crossings'] == count == _loop_bounces(c, ma, period)
+            assert batch[period]['last_cross'] == direction
+            assert batch[period]['slope'] == slope
@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+
+
+@pytest.fixture
+def signals(django_db):
+    from traderbot.models import Signal
+    Signal.objects.all().delete()
+    return Signal
+
+
+def _save(signals, rows):
+    signals.objects.bulk_create([signals(symbol=symbol, type=type, price=1, strength=0.5) for symbol, type, _ in rows])
+    # timestamp is auto_now_add, so set it afterwards
+    for row, (_, _, timestamp) in zip(signals.objects.order_by('pk'), rows):
+        signals.objects.filter(pk=row.pk).update(timestamp=timestamp)
+
+
+def test_latest_per_symbol_returns_one_row_per_symbol(signals):
+    t = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    _save(signals, [
+        ('A', 'BUY', t),
+        ('A', 'SELL', t + timedelta(minutes=1)),
+        ('B', 'BUY', t + timedelta(minutes=2)),
+        # Same timestamp for every type: the last one saved wins
+        ('B', 'SELL', t + timedelta(minutes=2)),
+        ('B', 'HOLD', t + timedelta(minutes=2)),
+        ('C', 'HOLD', t),
+    ])
+    latest = list(signals.objects.latest_per_symbol())
+    assert [(row.symbol, row.type) for row in latest] == [('A', 'SELL'), ('B', 'HOLD'), ('C', 'HOLD')]
+
+    latest = signals.objects.latest_per_symbol(['B', 'C', 'missing'])
+    assert [(row.symbol, row.type) for row in latest] == [('B', 'HOLD'), ('C', 'HOLD')]
+    assert not signals.objects.latest_per_symbol(['missing']).exists()
+
+
+def test_latest_lookup_seeks_the_symbol_timestamp_index(signals):
+    from django.db import connection
+    query = signals.objects.filter(symbol='A').order_by('-timestamp', '-pk').values_list('pk', flat=True)[:1]
+    sql, params = query.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+        plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+    assert 'signal_symbol_ts_idx' in plan
+    assert 'TEMP B-TREE' not in plan
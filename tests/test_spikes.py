@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+from benchmarks.data import synthetic_rates
+from ResistanceSupportDectector.spikeDectector import detect_spike, detect_spikes, last_bar_is_spike, spike_mask
+
+
+def _loop_detect_spike(df, window=20, threshold=1.5):
+    # detect_spike before vectorisation
+    spikes = []
+    df['price_change'] = df['close'].diff()
+    df['abs_change'] = df['price_change'].abs()
+    df['rolling_volatility'] = df['abs_change'].rolling(window=window).mean()
+    for i in range(window, len(df)):
+        current_change = df['price_change'].iloc[i]
+        rolling_volatility = df['rolling_volatility'].iloc[i]
+        if abs(current_change) > threshold * rolling_volatility:
+            spikes.append(i)
+    return spikes
+
+
+def _pandas_detect_spikes(df, spike_threshold=2):
+    # detect_spikes before vectorisation
+    df['price_change'] = df['close'].diff()
+    df['std'] = df['price_change'].rolling(window=20).std()
+    df['spike'] = abs(df['price_change']) > spike_threshold * df['std']
+    return df[df['spike'] == True]
+
+
+@pytest.fixture(scope='module')
+def frame():
+    return pd.DataFrame(synthetic_rates(3000, seed=7))
+
+
+@pytest.mark.parametrize('window,threshold', [(20, 1.5), (10, 2.0), (50, 3.0)])
+def test_detect_spike_matches_loop(frame, window, threshold):
+    spikes = detect_spike(frame.copy(), window=window, threshold=threshold)
+    assert spikes
+    assert spikes == _loop_detect_spike(frame.copy(), window=window, threshold=threshold)
+
+
+def test_detect_spike_leaves_frame_untouched(frame):
+    df = frame.copy()
+    detect_spike(df)
+    detect_spikes(df)
+    assert list(df.columns) == list(frame.columns)
+
+
+@pytest.mark.parametrize('threshold', [2, 3])
+def test_detect_spikes_matches_pandas(frame, threshold):
+    expected = _pandas_detect_spikes(frame.copy(), spike_threshold=threshold)
+    assert len(expected)
+    assert detect_spikes(frame.copy(), spike_threshold=threshold).index.equals(expected.index)
+
+
+def test_last_bar_is_spike_matches_mask(frame):
+    close = frame['close'].to_numpy()
+    mask, _ = spike_mask(close)
+    assert [last_bar_is_spike(close[:t + 1]) for t in range(len(close))] == mask.tolist()
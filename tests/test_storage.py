@@ -0,0 +1,40 @@
+import os
+import numpy as np
+from benchmarks.data import synthetic_rates
+from utils.storage import CandleStore
+
+
+def _interrupt(store, symbol, timeframe, column, extra):
+    # A write cut off part-way through an item
+    day = store.days(symbol, timeframe)[-1]
+    with open(store._column_path(symbol, timeframe, day, column), 'ab') as handle:
+        handle.write(b'\x01' * extra)
+
+
+def test_round_trip(tmp_path):
+    rates = synthetic_rates(3000)
+    store = CandleStore(str(tmp_path))
+    assert store.append('X', 1, rates[:2000]) == 2000
+    assert store.append('X', 1, rates[1500:]) == 1000
+    data = store.read('X', 1)
+    assert np.array_equal(data['time'], rates['time'])
+    assert np.array_equal(data['close'], rates['close'])
+
+
+def test_interrupted_append_is_readable_and_repaired(tmp_path):
+    rates = synthetic_rates(500)
+    store = CandleStore(str(tmp_path))
+    store.append('X', 1, rates[:300])
+    _interrupt(store, 'X', 1, 'close', 8 + 3)
+    _interrupt(store, 'X', 1, 'time', 5)
+
+    reopened = CandleStore(str(tmp_path))
+    assert reopened.last_time('X', 1) == rates['time'][299]
+    assert np.array_equal(reopened.read('X', 1)['close'], rates['close'][:300])
+
+    assert reopened.append('X', 1, rates[300:]) == 200
+    data = CandleStore(str(tmp_path)).read('X', 1)
+    assert np.array_equal(data['time'], rates['time'])
+    assert np.array_equal(data['close'], rates['close'])
+    day = reopened.days('X', 1)[-1]
+    assert os.path.getsize(reopened._column_path('X', 1, day, 'time')) % 8 == 0
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+from benchmarks.data import synthetic_rates
+from utils.candle_cache import CandleCache
+from utils.indicators import IndicatorEngine
+from utils.streaming import StreamingIndicators
+
+RTOL = 1e-9
+
+
+def _close(actual, expected):
+    if np.isnan(expected):
+        return np.isnan(actual)
+    return actual == pytest.approx(expected, rel=RTOL, abs=1e-9)
+
+
+@pytest.mark.parametrize('max_bars', [3600, 240])
+def test_streamed_values_match_batch_every_bar(max_bars):
+    rates = synthetic_rates(1400, seed=3)
+    history = 800
+    cache = CandleCache(max_bars=max_bars)
+    stream = StreamingIndicators()
+
+    # Seed from history, then stream one bar per step; the last row of every frame is still forming
+    cache.update('X', 1, rates[:history])
+    for end in range(history, len(rates) + 1):
+        if end > history:
+            df = cache.update('X', 1, rates[end - 2:end])
+        else:
+            df = cache.get('X', 1)
+        values = stream.sync(df)
+        engine = IndicatorEngine(df['close'].to_numpy(dtype=float))
+
+        for period, value in values['sma'].items():
+            assert _close(value, engine.sma(period)[-1]), ('sma', period, end)
+        for period, value in values['std'].items():
+            assert _close(value, engine.std(period)[-1]), ('std', period, end)
+        assert _close(values['rsi'], engine.rsi(stream.rsi.period)[-1]), ('rsi', end)
+        for span, value in values['ema'].items():
+            assert _close(value, engine.ema(span)[-1]), ('ema', span, end)
+
+
+def test_reseeds_after_gap():
+    rates = synthetic_rates(600, seed=4)
+    stream = StreamingIndicators()
+    stream.sync(pd.DataFrame(rates[:300]))
+    df = pd.DataFrame(rates[400:])
+    values = stream.sync(df)
+    engine = IndicatorEngine(df['close'].to_numpy(dtype=float))
+    assert _close(values['ema'][200], engine.ema(200)[-1])
+    assert _close(values['sma'][48], engine.sma(48)[-1])
@@ -0,0 +1,27 @@
+import asyncio
+import pandas as pd
+import pytest
+from benchmarks.data import synthetic_rates
+from ResistanceSupportDectector.aiStartegy import MyStrategy
+from ResistanceSupportDectector.spikeDectector import STD, last_bar_is_spike, prefix_spike_mask
+from ResistanceSupportDectector.strength import strength_series
+
+
+@pytest.mark.parametrize('seed', [0, 5])
+def test_strength_series_matches_run_on_every_prefix(seed):
+    df = pd.DataFrame(synthetic_rates(700, seed=seed))
+    series = strength_series(df, **MyStrategy.PARAMS)
+    loop = asyncio.new_event_loop()
+    try:
+        for t in range(2, len(df)):
+            assert series[t] == loop.run_until_complete(MyStrategy(df.iloc[:t + 1]).run()), t
+    finally:
+        loop.close()
+
+
+@pytest.mark.parametrize('method', ['mean_abs', STD])
+def test_prefix_spike_mask_matches_last_bar(method):
+    close = synthetic_rates(3000, seed=7)['close'].astype(float)
+    flags = prefix_spike_mask(close, method=method)
+    assert flags.any()
+    assert flags.tolist() == [last_bar_is_spike(close[:t + 1], method=method) for t in range(len(close))]
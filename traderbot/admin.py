@@ -3,6 +3,15 @@ from .models import Signal, Trade,  Indicator
 
 # Register your models here.
 
-admin.site.register(Signal)
+
+@admin.register(Signal)
+class SignalAdmin(admin.ModelAdmin):
+    list_display = ('symbol', 'type', 'price', 'strength', 'timestamp')
+    list_filter = ('type',)
+    # Newest first through the timestamp index; skip the unfiltered COUNT(*) on every page
+    ordering = ('-timestamp',)
+    show_full_result_count = False
+
+
 admin.site.register(Trade)
 admin.site.register(Indicator)
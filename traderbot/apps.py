@@ -7,6 +7,11 @@ class TraderbotConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'traderbot'
 
+    def ready(self):
+        from . import cache
+        from .models import Market, Trade, Signal
+        cache.connect([Market, Trade, Signal])
+
 
     # def ready(self):
     #     from main import main as background_task
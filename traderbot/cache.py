@@ -0,0 +1,102 @@
+"""
+Read-through cache for the API's list and detail responses.
+
+Every cached model has a version number in the cache. A response is stored
+under a key made of the request and the versions of the models it reads, so
+a write only has to bump its model's version: the old entries are never
+read again and simply expire. The same key is the response's ETag, so a
+poller that already has the current response gets a 304 without a query.
+"""
+import hashlib
+import time
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from rest_framework import status
+from rest_framework.response import Response
+from utils.db_writer import rows_written
+
+# Seconds a cached response is kept; writes invalidate it sooner
+TIMEOUT = 300
+
+
+def _version_key(model):
+    return f'api:version:{model._meta.label_lower}'
+
+
+def versions(models):
+    """
+    The current version of each model.
+
+    A missing version (first use, or evicted) is started from the clock, so it
+    can't match a version that older entries were stored under.
+    """
+    keys = [_version_key(model) for model in models]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            found[key] = time.time_ns()
+            # add() so concurrent first requests agree on one value
+            if not cache.add(key, found[key], timeout=None):
+                found[key] = cache.get(key, found[key])
+    return tuple(found[key] for key in keys)
+
+
+def invalidate(model):
+    """Makes every cached response that reads `model` stale."""
+    try:
+        cache.incr(_version_key(model))
+    except ValueError:
+        cache.set(_version_key(model), time.time_ns(), timeout=None)
+
+
+class CachedResponseMixin:
+    """
+    Caches the serialized data of list and retrieve responses, with ETag/If-None-Match.
+
+    `cache_models` are the models whose writes change the response (the
+    viewset's model by default).
+    """
+    cache_models = ()
+
+    def list(self, request, *args, **kwargs):
+        return self.cached(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached(super().retrieve, request, *args, **kwargs)
+
+    def cache_key(self, request):
+        models = self.cache_models or (self.queryset.model,)
+        query = sorted(request.query_params.lists())
+        # The host is part of the key because paginated responses carry absolute next/previous links
+        raw = repr((versions(models), request.get_host(), request.path, query, request.accepted_renderer.format))
+        return 'api:response:' + hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+
+    def cached(self, view, request, *args, **kwargs):
+        key = self.cache_key(request)
+        etag = f'"{key[len("api:response:"):]}"'
+        headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+        if etag in (tag.strip() for tag in request.headers.get('If-None-Match', '').split(',')):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        data = cache.get(key)
+        if data is not None:
+            return Response(data, headers=headers)
+
+        response = view(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, TIMEOUT)
+            for name, value in headers.items():
+                response[name] = value
+        return response
+
+
+def _invalidate_sender(sender, **kwargs):
+    invalidate(sender)
+
+
+def connect(models):
+    """Invalidates the responses of `models` on save, delete and write-behind bulk inserts."""
+    for model in models:
+        post_save.connect(_invalidate_sender, sender=model, dispatch_uid=f'api-cache-save-{model._meta.label_lower}')
+        post_delete.connect(_invalidate_sender, sender=model, dispatch_uid=f'api-cache-delete-{model._meta.label_lower}')
+        rows_written.connect(_invalidate_sender, sender=model, dispatch_uid=f'api-cache-bulk-{model._meta.label_lower}')
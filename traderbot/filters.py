@@ -0,0 +1,82 @@
+from datetime import datetime, timezone as dt_timezone
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+
+
+def parse_time(value, name):
+    """
+    Parses an ISO 8601 datetime or epoch seconds from a query parameter (naive times are UTC).
+    """
+    try:
+        seconds = float(value)
+    except ValueError:
+        seconds = None
+    try:
+        if seconds is not None:
+            return datetime.fromtimestamp(seconds, tz=dt_timezone.utc)
+        parsed = parse_datetime(value)
+    except (ValueError, OverflowError, OSError):
+        # Out of range epoch (inf, 1e20) or a well-formed but impossible date (month 13)
+        parsed = None
+    if parsed is None:
+        raise ValidationError({name: f"Invalid datetime: {value}"})
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, dt_timezone.utc)
+    return parsed
+
+
+def parse_float(value, name):
+    try:
+        return float(value)
+    except ValueError:
+        raise ValidationError({name: f"Invalid number: {value}"})
+
+
+def parse_int(value, name):
+    """Parses an integer (e.g. a primary key) within the range of a 64-bit database column."""
+    try:
+        parsed = int(value)
+    except ValueError:
+        raise ValidationError({name: f"Invalid integer: {value}"})
+    if not -2 ** 63 <= parsed < 2 ** 63:
+        raise ValidationError({name: f"Integer out of range: {value}"})
+    return parsed
+
+
+def parse_list(value):
+    """Comma-separated query parameter values."""
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+def filter_queryset(queryset, params, fields):
+    """
+    Applies query parameter filters that map onto indexed columns.
+
+    Args:
+        queryset: Queryset to filter.
+        params: The request's query parameters.
+        fields: {query parameter: lookup}. Lookups ending in '__in' take a comma-separated
+            list; 'since'/'until' take datetimes, 'min_*'/'max_*' numbers and lookups on
+            '*_id' or 'pk' integers.
+
+    Returns:
+        The filtered queryset.
+    """
+    lookups = {}
+    for name, lookup in fields.items():
+        value = params.get(name)
+        if value in (None, ''):
+            continue
+        if lookup.endswith('__in'):
+            value = parse_list(value)
+            if lookup[:-len('__in')].endswith(('_id', 'pk')):
+                value = [parse_int(item, name) for item in value]
+        elif name in ('since', 'until'):
+            value = parse_time(value, name)
+        elif name.startswith(('min_', 'max_')):
+            value = parse_float(value, name)
+        elif lookup.endswith(('_id', 'pk')):
+            value = parse_int(value, name)
+        lookups[lookup] = value
+    return queryset.filter(**lookups)
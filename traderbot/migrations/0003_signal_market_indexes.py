@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('traderbot', '0002_remove_signal_market_remove_signal_signal_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='market',
+            index=models.Index(fields=['symbol', 'time_frame', 'timestamp'], name='market_symbol_tf_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='signal',
+            index=models.Index(fields=['symbol', 'type', 'timestamp'], name='signal_symbol_type_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='signal',
+            index=models.Index(fields=['symbol', 'timestamp'], name='signal_symbol_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='signal',
+            index=models.Index(fields=['timestamp'], name='signal_timestamp_idx'),
+        ),
+    ]
@@ -10,6 +10,41 @@ class BaseModel(models.Model):
         abstract = True
 
 
+class MarketQuerySet(models.QuerySet):
+    def in_range(self, start=None, end=None):
+        """Rows with start <= timestamp < end, newest first (either bound may be None)."""
+        return _time_range(self, start, end)
+
+
+class SignalQuerySet(models.QuerySet):
+    def in_range(self, start=None, end=None):
+        """Signals with start <= timestamp < end, newest first (either bound may be None)."""
+        return _time_range(self, start, end)
+
+    def latest_per_symbol(self, symbols=None):
+        """
+        The newest signal of every symbol (or of the given symbols), exactly one row per symbol.
+
+        Each symbol's row is one seek on the (symbol, timestamp) index, newest first with
+        ties on timestamp resolved to the last one saved; the rows are then fetched by pk.
+        """
+        if symbols is None:
+            symbols = self.order_by().exclude(symbol=None).values_list('symbol', flat=True).distinct()
+        newest = [
+            self.filter(symbol=symbol).order_by('-timestamp', '-pk').values_list('pk', flat=True).first()
+            for symbol in symbols
+        ]
+        return self.filter(pk__in=[pk for pk in newest if pk is not None]).order_by('symbol')
+
+
+def _time_range(queryset, start, end):
+    if start is not None:
+        queryset = queryset.filter(timestamp__gte=start)
+    if end is not None:
+        queryset = queryset.filter(timestamp__lt=end)
+    return queryset.order_by('-timestamp')
+
+
 class Market(BaseModel):
     name = models.CharField(max_length=255)
     symbol = models.CharField(max_length=255)
@@ -21,12 +56,17 @@ class Market(BaseModel):
     volume = models.FloatField()
     is_active = models.BooleanField(default=True)
 
+    objects = MarketQuerySet.as_manager()
+
     def __str__(self):
         return self.name
     
     class Meta:
         verbose_name = "Market"
         verbose_name_plural = "Markets"
+        indexes = [
+            models.Index(fields=['symbol', 'time_frame', 'timestamp'], name='market_symbol_tf_ts_idx'),
+        ]
 
 
 class Trade(BaseModel):
@@ -57,12 +97,19 @@ class Signal(BaseModel):
     strength = models.FloatField(null=True)
     is_active = models.BooleanField(default=True, null=True)
 
+    objects = SignalQuerySet.as_manager()
+
     def __str__(self):
         return self.symbol
     
     class Meta:
         verbose_name = "Signal"
         verbose_name_plural = "Signals"
+        indexes = [
+            models.Index(fields=['symbol', 'type', 'timestamp'], name='signal_symbol_type_ts_idx'),
+            models.Index(fields=['symbol', 'timestamp'], name='signal_symbol_ts_idx'),
+            models.Index(fields=['timestamp'], name='signal_timestamp_idx'),
+        ]
 
 class Indicator(BaseModel):
     market = models.ForeignKey(Market, on_delete=models.CASCADE)
@@ -0,0 +1,15 @@
+from rest_framework.pagination import CursorPagination
+
+
+class TimestampCursorPagination(CursorPagination):
+    """
+    Newest first, paged by an opaque cursor on the timestamp index.
+
+    Unlike page numbers, a cursor never needs COUNT(*) or OFFSET, so every page
+    costs the same however large the table grows. The id tie-breaker is the
+    index's implicit rowid, so the ordering is still served by the index.
+    """
+    ordering = ('-timestamp', '-id')
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
@@ -18,4 +18,11 @@ class TradeSerializer(ModelSerializer):
 class SignalSerializer(ModelSerializer):
     class Meta:
         model = Signal
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+
+class SignalSummarySerializer(ModelSerializer):
+    """The fields a dashboard polls for, without the bookkeeping columns."""
+    class Meta:
+        model = Signal
+        fields = ('id', 'symbol', 'type', 'price', 'strength', 'timestamp')
+        read_only_fields = fields
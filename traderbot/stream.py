@@ -0,0 +1,200 @@
+"""
+Live signal stream: an in-process broadcast hub and the server-sent-events
+endpoint that serves it.
+
+The bot publishes every new signal to `hub`; each client of
+/api/stream/signals gets it over SSE as soon as it is published, instead of
+polling the signals endpoint. Events carry an increasing id, so a client
+that reconnects with Last-Event-ID (or ?cursor=) first gets the events it
+missed from the hub's recent history, then the live ones.
+"""
+import asyncio
+import json
+import threading
+from collections import deque
+from urllib.parse import parse_qs
+from .filters import parse_list
+
+STREAM_PATH = '/api/stream/signals'
+# Seconds between keep-alive comments on an idle stream
+HEARTBEAT = 15
+
+
+class Subscription:
+    """
+    One client's view of the hub: the backlog it asked to replay, then live events.
+
+    Events are delivered to the subscriber's own event loop, so the hub can be
+    published to from another thread. A subscriber that falls more than
+    `queue_size` events behind is disconnected rather than slowing the
+    publisher; it can reconnect from its last event id.
+    """
+
+    def __init__(self, hub, symbols, types, queue_size):
+        self.hub = hub
+        self.symbols = symbols
+        self.types = types
+        self.backlog = deque()
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.loop = asyncio.get_running_loop()
+        self.lagged = False
+
+    def wants(self, event):
+        return (not self.symbols or event['symbol'] in self.symbols) and (not self.types or event['type'] in self.types)
+
+    def push(self, event):
+        if self.lagged:
+            return
+        if self.queue.full():
+            self.lagged = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+            return
+        self.queue.put_nowait(event)
+
+    async def next(self):
+        """The next event, or None once the subscriber has been dropped."""
+        if self.backlog:
+            return self.backlog.popleft()
+        return await self.queue.get()
+
+    def close(self):
+        self.hub.unsubscribe(self)
+
+
+class SignalHub:
+    """
+    Fans published signals out to every subscriber and keeps the last `history` for replay.
+    """
+
+    def __init__(self, history=1000, queue_size=1000):
+        self.history = deque(maxlen=history)
+        self.queue_size = queue_size
+        self.seq = 0
+        self.published = 0
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def publish(self, event):
+        """
+        Adds an event (a dict with at least 'symbol' and 'type') and delivers it to matching subscribers.
+
+        Returns:
+            The event id.
+        """
+        with self._lock:
+            self.seq += 1
+            event = {'id': self.seq, **event}
+            self.history.append(event)
+            self.published += 1
+            subscribers = [s for s in self._subscribers if s.wants(event)]
+        for subscriber in subscribers:
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber.push, event)
+            except RuntimeError:
+                # The subscriber's loop has closed
+                self.unsubscribe(subscriber)
+        return event['id']
+
+    def subscribe(self, symbols=None, types=None, after=None):
+        """
+        Registers a subscriber; must be called from the loop that will read it.
+
+        Args:
+            symbols: Only stream these symbols (all when empty).
+            types: Only stream these signal types (all when empty).
+            after: Replay the buffered events with a larger id first. An id ahead of
+                the hub (published before a restart) replays the whole history.
+
+        Returns:
+            A Subscription; close() it when the client goes away.
+        """
+        with self._lock:
+            if after is not None and after > self.seq:
+                after = 0
+            subscription = Subscription(self, set(symbols or ()), set(types or ()), self.queue_size)
+            if after is not None:
+                subscription.backlog.extend(e for e in self.history if e['id'] > after and subscription.wants(e))
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def __len__(self):
+        return len(self._subscribers)
+
+
+hub = SignalHub()
+
+
+def _format(event):
+    return f"id: {event['id']}\nevent: signal\ndata: {json.dumps(event)}\n\n".encode()
+
+
+async def signal_stream(scope, receive, send):
+    """
+    ASGI app for GET /api/stream/signals[?symbol=A,B][&type=BUY,SELL][&cursor=N].
+
+    Streams signals as text/event-stream until the client disconnects. The
+    cursor (or the Last-Event-ID header browsers send when reconnecting) replays
+    buffered events newer than that id before the live ones.
+    """
+    if scope['method'] != 'GET':
+        await send({'type': 'http.response.start', 'status': 405, 'headers': [(b'allow', b'GET')]})
+        await send({'type': 'http.response.body', 'body': b''})
+        return
+
+    query = parse_qs(scope.get('query_string', b'').decode())
+    headers = dict(scope.get('headers', []))
+    cursor = query.get('cursor', [headers.get(b'last-event-id', b'').decode()])[0]
+    try:
+        after = int(cursor) if cursor else None
+    except ValueError:
+        await send({'type': 'http.response.start', 'status': 400, 'headers': [(b'content-type', b'text/plain')]})
+        await send({'type': 'http.response.body', 'body': f"Invalid cursor: {cursor}".encode()})
+        return
+
+    subscription = hub.subscribe(
+        symbols=parse_list(query.get('symbol', [''])[0]),
+        types=parse_list(query.get('type', [''])[0]),
+        after=after,
+    )
+    disconnected = asyncio.ensure_future(_wait_for_disconnect(receive))
+    try:
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+            ],
+        })
+        await send({'type': 'http.response.body', 'body': b': connected\n\n', 'more_body': True})
+        while not disconnected.done():
+            next_event = asyncio.ensure_future(subscription.next())
+            await asyncio.wait({next_event, disconnected}, timeout=HEARTBEAT, return_when=asyncio.FIRST_COMPLETED)
+            if not next_event.done():
+                next_event.cancel()
+                if not disconnected.done():
+                    await send({'type': 'http.response.body', 'body': b': keep-alive\n\n', 'more_body': True})
+                continue
+            event = next_event.result()
+            if event is None:
+                # Too slow to keep up; the client reconnects from its last event id
+                break
+            await send({'type': 'http.response.body', 'body': _format(event), 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+    except OSError:
+        pass
+    finally:
+        subscription.close()
+        disconnected.cancel()
+
+
+async def _wait_for_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
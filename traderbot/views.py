@@ -1,20 +1,78 @@
 from django.shortcuts import render
 from rest_framework import viewsets
+from .cache import CachedResponseMixin
+from .filters import filter_queryset
 from .models import Market, Trade, Signal
-from .serializers import MarketSerializer, TradeSerializer, SignalSerializer
+from .pagination import TimestampCursorPagination
+from .serializers import MarketSerializer, TradeSerializer, SignalSerializer, SignalSummarySerializer
 
 
 # Create your views here.
 
-class MarketViewSet(viewsets.ModelViewSet):
+class FilteredViewSet(CachedResponseMixin, viewsets.ModelViewSet):
+    """
+    Newest-first cursor pages, filtered in SQL by the query parameters in `filter_fields`
+    ({query parameter: lookup}, see filters.filter_queryset). List and detail
+    responses are cached until the model is written to (see cache.py).
+    """
+    pagination_class = TimestampCursorPagination
+    filter_fields = {}
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            queryset = filter_queryset(queryset, self.request.query_params, self.filter_fields)
+        return queryset
+
+
+class MarketViewSet(FilteredViewSet):
     queryset = Market.objects.all()
     serializer_class = MarketSerializer
+    filter_fields = {
+        'symbol': 'symbol__in',
+        'time_frame': 'time_frame',
+        'since': 'timestamp__gte',
+        'until': 'timestamp__lt',
+    }
 
 
-class TradeViewSet(viewsets.ModelViewSet):
+class TradeViewSet(FilteredViewSet):
     queryset = Trade.objects.all()
     serializer_class = TradeSerializer
+    filter_fields = {
+        'market': 'market_id',
+        'symbol': 'market__symbol__in',
+        'since': 'timestamp__gte',
+        'until': 'timestamp__lt',
+    }
+
 
-class SignalViewSet(viewsets.ModelViewSet):
+class SignalViewSet(FilteredViewSet):
+    """
+    ?symbol=A,B&type=BUY&since=...&until=...&min_strength=0.7 filter the list;
+    ?view=summary returns only the fields a dashboard needs.
+    """
     queryset = Signal.objects.all()
     serializer_class = SignalSerializer
+    filter_fields = {
+        'symbol': 'symbol__in',
+        'type': 'type__in',
+        'since': 'timestamp__gte',
+        'until': 'timestamp__lt',
+        'min_strength': 'strength__gte',
+    }
+
+    def summary(self):
+        return self.action == 'list' and self.request.query_params.get('view') == 'summary'
+
+    def get_serializer_class(self):
+        if self.summary():
+            return SignalSummarySerializer
+        return super().get_serializer_class()
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.summary():
+            # Don't load the columns the summary doesn't serialize
+            queryset = queryset.only(*SignalSummarySerializer.Meta.fields)
+        return queryset
@@ -0,0 +1,86 @@
+import pandas as pd
+from utils.scheduler import TIMEFRAME_SECONDS
+
+
+def history_bars(timeframes, minutes):
+    """
+    Bars per timeframe that cover `minutes` of history, for CandleCache(max_bars=...).
+    """
+    return {tf: max(minutes * 60 // TIMEFRAME_SECONDS[tf], 1) for tf in timeframes}
+
+
+class CandleCache:
+    """
+    Keeps candle history in memory per (symbol, timeframe) so each cycle only
+    has to download the bars that are newer than the last cached one.
+
+    The last cached bar is usually still forming when it is fetched, so every
+    update re-requests it and the fresh copy replaces the cached one.
+
+    `max_bars` caps the bars kept per (symbol, timeframe): one number for every
+    timeframe, or a {timeframe: bars} dict (see history_bars) so every
+    timeframe keeps the same span of time.
+    """
+
+    def __init__(self, max_bars=3600):
+        self.max_bars = max_bars
+        self._frames = {}
+
+    def last_time(self, symbol, timeframe):
+        """
+        Returns the open time (epoch seconds) of the newest cached bar, or None
+        if nothing is cached yet for this symbol and timeframe.
+        """
+        frame = self._frames.get((symbol, timeframe))
+        if frame is None or frame.empty:
+            return None
+        return int(frame['time'].iloc[-1])
+
+    def update(self, symbol, timeframe, rates):
+        """
+        Merges freshly fetched rates into the cached history.
+
+        Args:
+            symbol: Market symbol.
+            timeframe: MT5 timeframe constant.
+            rates: Rates array as returned by mt5.copy_rates_* (may be None or empty).
+
+        Returns:
+            A copy of the merged history, trimmed to max_bars, safe for the caller to modify.
+        """
+        key = (symbol, timeframe)
+        frame = self._frames.get(key)
+        new = pd.DataFrame(rates) if rates is not None else pd.DataFrame()
+
+        if frame is None or frame.empty:
+            merged = new
+        elif new.empty:
+            merged = frame
+        else:
+            # Drop every cached bar the new batch covers, including the bar that was still forming
+            keep = frame['time'] < new['time'].iloc[0]
+            merged = pd.concat([frame[keep], new], ignore_index=True)
+
+        max_bars = self.bars(timeframe)
+        if len(merged) > max_bars:
+            merged = merged.iloc[-max_bars:].reset_index(drop=True)
+
+        self._frames[key] = merged
+        return merged.copy()
+
+    def bars(self, timeframe):
+        """The number of bars kept for a timeframe."""
+        if isinstance(self.max_bars, dict):
+            return self.max_bars[timeframe]
+        return self.max_bars
+
+    def get(self, symbol, timeframe):
+        frame = self._frames.get((symbol, timeframe))
+        return None if frame is None else frame.copy()
+
+    def clear(self, symbol=None):
+        if symbol is None:
+            self._frames.clear()
+            return
+        for key in [key for key in self._frames if key[0] == symbol]:
+            del self._frames[key]
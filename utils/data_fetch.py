@@ -1,2 +1,22 @@
-def fetch_data(mar):
-    pass
\ No newline at end of file
+from config import Config
+from utils.storage import CandleStore
+
+
+def fetch_data(market, start=None, end=None, timeframes=None, store=None):
+    """
+    Loads a market's candle history from the local candle store instead of the terminal.
+
+    Args:
+        market: Market symbol.
+        start, end: Range of bar open times (epoch seconds or datetimes); None leaves that side open.
+        timeframes: MT5 timeframe constants (defaults to Config.TIME_FRAMES).
+        store: CandleStore to read from (defaults to the one at Config.CANDLE_STORE_PATH).
+
+    Returns:
+        A list of DataFrames, one per timeframe, like TradingBot.fetch_all_timeframes.
+    """
+    if store is None:
+        store = CandleStore(Config.CANDLE_STORE_PATH)
+    if timeframes is None:
+        timeframes = Config.TIME_FRAMES
+    return [store.read_frame(market, timeframe, start, end) for timeframe in timeframes]
@@ -0,0 +1,160 @@
+import asyncio
+import threading
+from collections import OrderedDict
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.dispatch import Signal
+from utils.metrics import metrics
+
+# Sent once per model after each flush commits (bulk_create doesn't send post_save)
+rows_written = Signal()
+
+
+class WriteBehindQueue:
+    """
+    Collects unsaved model instances and writes them with bulk_create, one
+    transaction per flush, off the trading loop.
+
+    add() only queues a row, so the caller doesn't wait for the database.
+    A flush starts in the background once `batch_size` rows are pending or
+    when flush_soon() is called (once per cycle). If rows pile up to
+    `max_pending`, add() waits for a flush to finish (back-pressure) instead
+    of letting the queue grow without bound.
+
+    A batch stays queued until its transaction commits, so a cancelled flush
+    leaves it for flush_sync(). A failed batch is retried `max_retries` times,
+    `retry_delay` seconds apart (doubling); after that it is written row by
+    row and the rows that still fail are logged and dropped.
+
+    Duplicates are dropped by key: a row whose key has already been queued is
+    ignored. Only the most recent `max_keys` keys are remembered.
+    """
+
+    def __init__(self, batch_size=500, max_pending=10000, max_keys=100000, max_retries=3, retry_delay=0.5):
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self.max_keys = max_keys
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.written = 0
+        self.dropped = 0
+        self._pending = []
+        self._keys = OrderedDict()
+        self._task = None
+        # Held while a batch is written; _committed is the last batch that reached the database
+        self._lock = threading.Lock()
+        self._committed = None
+
+    def __len__(self):
+        return len(self._pending)
+
+    def seen(self, key):
+        return key in self._keys
+
+    def _remember(self, key):
+        self._keys[key] = None
+        if len(self._keys) > self.max_keys:
+            self._keys.popitem(last=False)
+
+    async def add(self, instance, key=None):
+        """
+        Queues an unsaved model instance.
+
+        Returns:
+            False if a row with the same key was already queued, True otherwise.
+        """
+        if key is not None:
+            if key in self._keys:
+                return False
+            self._remember(key)
+        while len(self._pending) >= self.max_pending:
+            await asyncio.shield(self.flush_soon())
+        self._pending.append(instance)
+        if len(self._pending) >= self.batch_size:
+            self.flush_soon()
+        return True
+
+    def flush_soon(self):
+        """Starts a background flush unless one is already running."""
+        if self._pending and (self._task is None or self._task.done()):
+            self._task = asyncio.get_running_loop().create_task(self._flush_pending())
+        return self._task
+
+    async def flush(self):
+        """Writes everything queued so far and waits for it."""
+        while self._pending or (self._task is not None and not self._task.done()):
+            task = self.flush_soon()
+            if task is not None:
+                await asyncio.shield(task)
+
+    async def _flush_pending(self):
+        failures = 0
+        while self._pending:
+            # The batch stays in _pending until it has been committed
+            batch = self._pending[:]
+            try:
+                with metrics.span("db_flush"):
+                    if failures < self.max_retries:
+                        await sync_to_async(self._write)(batch)
+                    else:
+                        await sync_to_async(self._write_rows)(batch)
+            except Exception as e:
+                failures += 1
+                print("Error writing", len(batch), "rows (attempt", failures, "):", e)
+                await asyncio.sleep(self.retry_delay * 2 ** (failures - 1))
+                continue
+            del self._pending[:len(batch)]
+            self._committed = None
+            failures = 0
+
+    def flush_sync(self):
+        """
+        Blocking flush for shutdown paths that run after the event loop has stopped.
+        """
+        # Wait for a write still running on a worker thread, and don't write its batch twice
+        with self._lock:
+            committed, self._committed = self._committed, None
+        if committed is not None and self._pending[:len(committed)] == committed:
+            del self._pending[:len(committed)]
+        batch, self._pending = self._pending, []
+        if batch:
+            try:
+                self._write(batch)
+            except Exception as e:
+                print("Error writing", len(batch), "rows:", e)
+                self._write_rows(batch)
+            self._committed = None
+
+    def _write(self, batch):
+        # One bulk_create per model, in order of first appearance so parents are saved before children
+        by_model = OrderedDict()
+        for instance in batch:
+            by_model.setdefault(type(instance), []).append(instance)
+        with self._lock:
+            with transaction.atomic():
+                for model, instances in by_model.items():
+                    model.objects.bulk_create(instances, batch_size=self.batch_size)
+            self._committed = batch
+        self.written += len(batch)
+        for model, instances in by_model.items():
+            rows_written.send(sender=model, instances=instances)
+
+    def _write_rows(self, batch):
+        """
+        Writes a batch that keeps failing one row at a time; rows that still fail are logged and dropped.
+        """
+        written = OrderedDict()
+        with self._lock:
+            for instance in batch:
+                try:
+                    with transaction.atomic():
+                        type(instance).objects.bulk_create([instance])
+                except Exception as e:
+                    print("Dropping", type(instance).__name__, "row that can't be written:", e)
+                    self.dropped += 1
+                    continue
+                written.setdefault(type(instance), []).append(instance)
+            self._committed = batch
+        self.written += sum(len(instances) for instances in written.values())
+        for model, instances in written.items():
+            rows_written.send(sender=model, instances=instances)
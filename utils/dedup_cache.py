@@ -0,0 +1,111 @@
+import json
+import os
+import time
+from collections import OrderedDict
+
+
+class DedupCache:
+    """
+    Remembers recently emitted signal keys so the same signal isn't emitted and saved twice.
+
+    Keys are small tuples such as (symbol, type). Each one expires `ttl`
+    seconds after it was added (None keeps it until evicted), and once
+    `max_entries` keys are held the least recently used one (added or found)
+    is evicted, so memory stays bounded however long the bot runs. A hit
+    doesn't extend a key's ttl.
+
+    The live keys can be snapshotted to a JSON file and loaded on start-up, so
+    a restart doesn't emit again every signal that was already saved.
+    """
+
+    def __init__(self, max_entries=10000, ttl=None, path=None, clock=time.time):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        self.clock = clock
+        self._expires = OrderedDict()
+        self._dirty = False
+
+    def __len__(self):
+        return len(self._expires)
+
+    def __contains__(self, key):
+        expires = self._expires.get(key)
+        if expires is None:
+            if key not in self._expires:
+                return False
+            self._expires.move_to_end(key)
+            return True
+        if expires <= self.clock():
+            del self._expires[key]
+            self._dirty = True
+            return False
+        self._expires.move_to_end(key)
+        return True
+
+    def add(self, key):
+        self._expires.pop(key, None)
+        self._expires[key] = None if self.ttl is None else self.clock() + self.ttl
+        if len(self._expires) > self.max_entries:
+            self._expires.popitem(last=False)
+        self._dirty = True
+
+    def discard(self, key):
+        if self._expires.pop(key, False) is not False:
+            self._dirty = True
+
+    def purge(self):
+        """Drops every expired key."""
+        now = self.clock()
+        expired = [key for key, expires in self._expires.items() if expires is not None and expires <= now]
+        for key in expired:
+            del self._expires[key]
+        self._dirty = self._dirty or bool(expired)
+        return len(expired)
+
+    def save(self, path=None):
+        """
+        Writes the live keys as JSON, replacing the file atomically. Does nothing
+        if nothing changed since the last save or load.
+        """
+        path = path or self.path
+        if not path or not self._dirty:
+            return
+        self.purge()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        temporary = path + '.tmp'
+        with open(temporary, 'w') as handle:
+            json.dump({'saved': self.clock(), 'entries': [[list(key), expires] for key, expires in self._expires.items()]}, handle)
+        os.replace(temporary, path)
+        self._dirty = False
+
+    def load(self, path=None):
+        """
+        Restores the keys of a snapshot that haven't expired yet.
+
+        A snapshot saved after the current time (e.g. by a live run, read by a
+        replay running in the past) is ignored.
+
+        Returns:
+            The number of keys restored.
+        """
+        path = path or self.path
+        if not path or not os.path.exists(path):
+            return 0
+        try:
+            with open(path) as handle:
+                snapshot = json.load(handle)
+        except (OSError, ValueError) as e:
+            print("Ignoring signal cache snapshot", path, ":", e)
+            return 0
+        now = self.clock()
+        if snapshot.get('saved', 0) > now:
+            return 0
+        for key, expires in snapshot.get('entries', []):
+            if expires is None or expires > now:
+                self._expires[tuple(key)] = expires
+        while len(self._expires) > self.max_entries:
+            self._expires.popitem(last=False)
+        self._dirty = False
+        return len(self._expires)
@@ -0,0 +1,166 @@
+import itertools
+import numpy as np
+import pandas as pd
+
+
+def weight_grid(step=0.1, timeframes=3):
+    """
+    All non-negative weight vectors on a `step` grid that sum to 1.
+
+    Returns:
+    - A (timeframes x K) array, one weight vector per column.
+    """
+    units = int(round(1 / step))
+    columns = [
+        (*head, units - sum(head))
+        for head in itertools.product(range(units + 1), repeat=timeframes - 1)
+        if sum(head) <= units
+    ]
+    return np.array(columns, dtype=float).T / units
+
+
+def align_to_bars(frame_times, values, target_times):
+    """
+    As-of join: for every target bar, the value of the latest frame bar that closed by the
+    time the target bar closes (NaN if there is none yet).
+    """
+    def close_times(times):
+        times = np.asarray(times)
+        step = np.median(np.diff(times)) if len(times) > 1 else 0
+        return times + step
+
+    index = np.searchsorted(close_times(frame_times), close_times(target_times), side='right') - 1
+    aligned = np.where(index >= 0, values[np.maximum(index, 0)], np.nan)
+    return aligned
+
+
+def trade_direction(strength, buy_level, sell_level):
+    """
+    Buy and sell masks of strengths against broadcastable levels: a buy above the buy
+    level, otherwise a sell below the sell level.
+
+    Returns:
+    - (buy, sell) boolean arrays.
+    """
+    # Strengths move in 0.05 steps, so weighted sums often land exactly on a level;
+    # rounding keeps the comparison independent of the product's summation order
+    strength = np.round(strength, 10)
+    buy = strength > buy_level
+    sell = ~buy & (strength < sell_level)
+    return buy, sell
+
+
+def direction_accuracy(combined, close, threshold=0.65, lookahead=5):
+    """
+    Scores a (bars x K) matrix of combined strengths against forward price moves.
+
+    Returns:
+    - (accuracy, correct, total) arrays of length K.
+    """
+    if lookahead < 1:
+        raise ValueError(f"lookahead must be at least 1 bar, got {lookahead}")
+    future_move = (close[lookahead:] - close[:-lookahead])[:, None]
+    buy, sell = trade_direction(combined[:len(close) - lookahead], threshold, 1 - threshold)
+    correct = ((buy & (future_move > 0)) | (sell & (future_move < 0))).sum(axis=0)
+    total = (buy | sell).sum(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        accuracy = np.where(total > 0, correct / total, 0.0)
+    return accuracy, correct, total
+
+
+def decision_returns(decisions, close, lookahead=5):
+    """
+    Scores per-bar trade decisions (1 buy, -1 sell, 0 hold) against the price `lookahead` bars later.
+
+    Returns:
+    - A dict with the number of signals, hits, accuracy and the mean/total signed return.
+    """
+    close = np.asarray(close, dtype=float)
+    decisions = np.asarray(decisions)[:max(len(close) - lookahead, 0)]
+    forward = (close[lookahead:] - close[:-lookahead]) / close[:-lookahead] if lookahead else np.zeros(len(close))
+    traded = decisions != 0
+    returns = decisions[traded] * forward[traded]
+    signals = int(traded.sum())
+    hits = int((returns > 0).sum())
+    return {
+        'signals': signals,
+        'hits': hits,
+        'accuracy': hits / signals if signals else 0.0,
+        'mean_return': float(returns.mean()) if signals else 0.0,
+        'total_return': float(returns.sum()),
+    }
+
+
+def forward_change(close, lookahead):
+    """
+    Relative price change from each bar to the bar `lookahead` bars later
+    (NaN for the last `lookahead` bars, which have no future price yet).
+    """
+    close = np.asarray(close, dtype=float)
+    n = len(close)
+    change = np.full(n, np.nan)
+    if lookahead < n:
+        current = close[:n - lookahead]
+        change[:n - lookahead] = (close[lookahead:] - current) / current
+    return change
+
+
+def signal_scores(signal, close, buy_levels, sell_levels, lookaheads, min_moves=0.0):
+    """
+    Scores a strength signal against forward price moves for many settings and lookaheads at once.
+
+    Bars are classified by trade_direction, as in direction_accuracy. A buy (sell) is
+    correct when the price `lookahead` bars later is more than `min_move` (relative)
+    above (below) the current close.
+
+    Args:
+    - signal: Strength per bar aligned with close, or a single value applied to every bar.
+    - close: Close prices.
+    - buy_levels, sell_levels, min_moves: Broadcastable arrays, one entry per setting.
+    - lookaheads: Bars ahead to score against.
+
+    Returns:
+    - A dict of (settings x lookaheads) arrays: 'signals', 'correct', 'accuracy',
+      'mean_return' and 'total_return' (signed relative returns of the signalled trades).
+    """
+    close = np.asarray(close, dtype=float)
+    signal = np.broadcast_to(np.asarray(signal, dtype=float), close.shape)
+    buy_levels, sell_levels, min_moves = np.broadcast_arrays(
+        *(np.atleast_1d(np.asarray(levels, dtype=float)) for levels in (buy_levels, sell_levels, min_moves))
+    )
+    lookaheads = np.atleast_1d(lookaheads)
+
+    # (settings x bars) trade direction: 1 buy, -1 sell, 0 none
+    buy, sell = trade_direction(signal, buy_levels[:, None], sell_levels[:, None])
+    direction = buy.astype(int) - sell.astype(int)
+
+    shape = (len(buy_levels), len(lookaheads))
+    signals = np.zeros(shape, dtype=int)
+    correct = np.zeros(shape, dtype=int)
+    total_return = np.zeros(shape)
+    for column, lookahead in enumerate(lookaheads):
+        change = forward_change(close, int(lookahead))
+        traded = (direction != 0) & ~np.isnan(change)
+        signed = np.where(traded, direction * np.nan_to_num(change), 0.0)
+        signals[:, column] = traded.sum(axis=1)
+        correct[:, column] = (traded & (signed > min_moves[:, None])).sum(axis=1)
+        total_return[:, column] = signed.sum(axis=1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        accuracy = np.where(signals > 0, correct / signals, 0.0)
+        mean_return = np.where(signals > 0, total_return / signals, 0.0)
+    return {
+        'signals': signals,
+        'correct': correct,
+        'accuracy': accuracy,
+        'mean_return': mean_return,
+        'total_return': total_return,
+    }
+
+
+def scores_frame(scores, settings, lookaheads, name='threshold'):
+    """
+    signal_scores output as a DataFrame indexed by (setting, lookahead).
+    """
+    index = pd.MultiIndex.from_product([np.atleast_1d(settings), np.atleast_1d(lookaheads)], names=[name, 'lookahead'])
+    return pd.DataFrame({key: values.ravel() for key, values in scores.items()}, index=index)
@@ -1,43 +1,222 @@
 import asyncio
+import numpy as np
+import pandas as pd
+
+
+def _rolling_from_cumsum(csum, period):
+    """
+    Turns a cumulative sum (with a leading 0) into rolling window sums.
+    The first period-1 entries are NaN, like pandas' rolling().
+    """
+    n = len(csum) - 1
+    out = np.full(n, np.nan)
+    if period <= 0 or n < period:
+        return out
+    out[period - 1:] = csum[period:] - csum[:-period]
+    return out
+
+
+def _cumsum(values):
+    return np.concatenate(([0.0], np.cumsum(values)))
+
+
+def ema_kernel(values, span):
+    """
+    Recursive EMA (adjust=False) over a float array.
+
+    Uses pandas' compiled ewm recursion, which is what detect_trend and macd
+    have always used, so results are bit-for-bit identical.
+    """
+    return pd.Series(values, copy=False).ewm(span=span, adjust=False).mean().to_numpy()
+
+
+class IndicatorEngine:
+    """
+    NumPy-backed indicator engine.
+
+    Takes the close/high/low arrays once and computes rolling indicators with
+    O(n) cumulative-sum and recursive-EMA kernels. The cumulative sums are
+    shared between every SMA/std period and each result is memoised, so asking
+    for the same indicator twice costs nothing.
+
+    All outputs are float arrays aligned with the input (NaN where the window
+    is not yet full).
+    """
+
+    def __init__(self, close, high=None, low=None):
+        self.close = np.asarray(close, dtype=float)
+        self.high = None if high is None else np.asarray(high, dtype=float)
+        self.low = None if low is None else np.asarray(low, dtype=float)
+        self._cache = {}
+
+    @classmethod
+    def from_frame(cls, df):
+        high = df['high'].to_numpy(dtype=float) if 'high' in df else None
+        low = df['low'].to_numpy(dtype=float) if 'low' in df else None
+        return cls(df['close'].to_numpy(dtype=float), high, low)
+
+    def __len__(self):
+        return len(self.close)
+
+    def _memo(self, key, func):
+        if key not in self._cache:
+            self._cache[key] = func()
+        return self._cache[key]
+
+    def _sums(self):
+        # Offset by the first price so the sum of squares keeps its precision on large prices
+        def build():
+            ref = self.close[0] if len(self.close) else 0.0
+            shifted = self.close - ref
+            return ref, _cumsum(shifted), _cumsum(shifted * shifted)
+        return self._memo('sums', build)
+
+    def sma(self, period):
+        def build():
+            ref, csum, _ = self._sums()
+            return _rolling_from_cumsum(csum, period) / period + ref
+        return self._memo(('sma', period), build)
+
+    def std(self, period, ddof=1):
+        """Rolling standard deviation (sample std by default, like pandas)."""
+        def build():
+            _, csum, csum_sq = self._sums()
+            total = _rolling_from_cumsum(csum, period)
+            total_sq = _rolling_from_cumsum(csum_sq, period)
+            if period - ddof <= 0:
+                return np.full(len(self.close), np.nan)
+            var = (total_sq - total * total / period) / (period - ddof)
+            return np.sqrt(np.maximum(var, 0.0))
+        return self._memo(('std', period, ddof), build)
+
+    def bollinger_bands(self, period=20, std=2):
+        """Returns (middle, upper, lower) bands."""
+        def build():
+            mid = self.sma(period)
+            dev = self.std(period) * std
+            return mid, mid + dev, mid - dev
+        return self._memo(('bb', period, std), build)
+
+    def rsi(self, period=14):
+        """RSI from simple rolling means of gains and losses."""
+        def build():
+            # The first bar has no change and counts as a zero gain/loss, as in the pandas version
+            delta = np.diff(self.close, prepend=self.close[:1])
+            gain = _rolling_from_cumsum(_cumsum(np.where(delta > 0, delta, 0.0)), period) / period
+            loss = _rolling_from_cumsum(_cumsum(np.where(delta < 0, -delta, 0.0)), period) / period
+            with np.errstate(divide='ignore', invalid='ignore'):
+                return 100 - (100 / (1 + gain / loss))
+        return self._memo(('rsi', period), build)
+
+    def wilder_averages(self, period=14):
+        """
+        Wilder-smoothed average gain and loss: the first value is the simple mean
+        of the first `period` changes, then avg += (x - avg) / period.
+        """
+        def build():
+            n = len(self.close)
+            avg_gain, avg_loss = np.full(n, np.nan), np.full(n, np.nan)
+            if n <= period:
+                return avg_gain, avg_loss
+            delta = np.diff(self.close)
+            for out, moves in ((avg_gain, np.where(delta > 0, delta, 0.0)), (avg_loss, np.where(delta < 0, -delta, 0.0))):
+                seeded = np.concatenate(([moves[:period].mean()], moves[period:]))
+                out[period:] = pd.Series(seeded).ewm(alpha=1 / period, adjust=False).mean().to_numpy()
+            return avg_gain, avg_loss
+        return self._memo(('wilder', period), build)
+
+    def wilder_rsi(self, period=14):
+        def build():
+            avg_gain, avg_loss = self.wilder_averages(period)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                return 100 - (100 / (1 + avg_gain / avg_loss))
+        return self._memo(('wilder_rsi', period), build)
+
+    def ema(self, span):
+        return self._memo(('ema', span), lambda: ema_kernel(self.close, span))
+
+    def macd(self, short=12, long=26, signal=9):
+        """Returns (macd, signal) lines."""
+        def build():
+            macd = self.ema(short) - self.ema(long)
+            return macd, ema_kernel(macd, signal)
+        return self._memo(('macd', short, long, signal), build)
+
+    def true_range(self):
+        def build():
+            if self.high is None or self.low is None:
+                raise KeyError("true range needs 'high' and 'low' prices")
+            tr = self.high - self.low
+            if len(tr) > 1:
+                prev_close = self.close[:-1]
+                tr[1:] = np.maximum.reduce([
+                    tr[1:],
+                    np.abs(self.high[1:] - prev_close),
+                    np.abs(self.low[1:] - prev_close),
+                ])
+            return tr
+        return self._memo('tr', build)
+
+    def atr(self, period=14):
+        return self._memo(('atr', period), lambda: _rolling_from_cumsum(_cumsum(self.true_range()), period) / period)
+
+    def compute(self, sma=(), std=(), rsi=(), ema=(), macd=(), atr=()):
+        """
+        Computes every requested indicator in one call.
+
+        Args:
+            sma: Periods for simple moving averages.
+            std: Periods for rolling standard deviations.
+            rsi: Periods for RSI.
+            ema: Spans for exponential moving averages.
+            macd: (short, long, signal) tuples.
+            atr: Periods for ATR.
+
+        Returns:
+            A dict of {indicator name: {parameter: array}}.
+        """
+        return {
+            'sma': {period: self.sma(period) for period in sma},
+            'std': {period: self.std(period) for period in std},
+            'rsi': {period: self.rsi(period) for period in rsi},
+            'ema': {span: self.ema(span) for span in ema},
+            'macd': {params: self.macd(*params) for params in macd},
+            'atr': {period: self.atr(period) for period in atr},
+        }
 
 
 class Indicator:
+    """
+    pandas front-end over IndicatorEngine. Every method returns Series aligned
+    with the DataFrame index and computed over the whole frame.
+    """
 
     def __init__(self, df):
         self.df = df
+        self._engine = None
+
+    @property
+    def engine(self):
+        if self._engine is None:
+            self._engine = IndicatorEngine.from_frame(self.df)
+        return self._engine
+
+    def _series(self, values):
+        return pd.Series(values, index=self.df.index)
 
     def rsi(self, period=14):
-        data = self.df.head(period)
-        delta = data['close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-        rs = gain / loss
-        return 100 - (100 / (1 + rs))
-    
+        return self._series(self.engine.rsi(period))
+
     def macd(self, short=12, long=26, signal=9):
-        short_ema = self.df['close'].ewm(span=short, adjust=False).mean()
-        long_ema = self.df['close'].ewm(span=long, adjust=False).mean()
-        macd = short_ema - long_ema
-        signal = macd.ewm(span=signal, adjust=False).mean()
-        return macd, signal
-    
+        macd, signal = self.engine.macd(short, long, signal)
+        return self._series(macd), self._series(signal)
+
     def bollinger_bands(self, period=20, std=2):
-        data = self.df.head(period)
-        sma = data['Close'].rolling(window=period).mean()
-        std_dev = data['Close'].rolling(window=period).std()
-        upper_band = sma + (std_dev * std)
-        lower_band = sma - (std_dev * std)
-        return upper_band, lower_band
-    
+        _, upper_band, lower_band = self.engine.bollinger_bands(period, std)
+        return self._series(upper_band), self._series(lower_band)
+
     def moving_average(self, period=10):
-        data = self.df.head(period)
-        return data['close'].rolling(window=period).mean()
+        return self._series(self.engine.sma(period))
 
     def calculate_atr(self, period=14):
-        df = self.df
-        df['high_low'] = df['high'] - df['low']
-        df['high_close'] = abs(df['high'] - df['close'].shift())
-        df['low_close'] = abs(df['low'] - df['close'].shift())
-        tr = df[['high_low', 'high_close', 'low_close']].max(axis=1)
-        atr = tr.rolling(window=period).mean()
-        return atr
+        return self._series(self.engine.atr(period))
@@ -0,0 +1,147 @@
+import bisect
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+
+# Upper bounds (ms) of the histogram buckets; the last bucket is open-ended
+BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+
+class LatencyHistogram:
+    """
+    Latencies of one stage: lifetime count, total and bucket counts, plus the
+    last `window` samples for rolling percentiles.
+    """
+
+    def __init__(self, window=2048):
+        self.samples = deque(maxlen=window)
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        ms = seconds * 1000
+        self.samples.append(ms)
+        self.buckets[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, ms)
+
+    def summary(self):
+        window = np.fromiter(self.samples, dtype=float, count=len(self.samples))
+        p50, p95, p99 = np.percentile(window, [50, 95, 99]) if len(window) else (0.0, 0.0, 0.0)
+        return {
+            'count': self.count,
+            'total_s': round(self.total, 6),
+            'last_ms': round(window[-1], 3) if len(window) else None,
+            'p50_ms': round(float(p50), 3),
+            'p95_ms': round(float(p95), 3),
+            'p99_ms': round(float(p99), 3),
+            'max_ms': round(self.max, 3),
+            'buckets': {
+                **{f'le_{bound:g}ms': count for bound, count in zip(BUCKETS_MS, self.buckets)},
+                'inf': self.buckets[-1],
+            },
+        }
+
+
+class Metrics:
+    """
+    Timing spans aggregated per stage.
+
+    Stages are plain names ('cycle', 'fetch', 'strategy', 'mt5.order_send', ...).
+    Spans measure wall time, so an awaited stage includes the time spent waiting
+    on the terminal or the database. A snapshot can be dumped to a JSON file
+    (at most every `dump_interval` seconds) or served over HTTP with serve().
+    """
+
+    def __init__(self, window=2048, dump_path=None, dump_interval=60):
+        self.window = window
+        self.dump_path = dump_path
+        self.dump_interval = dump_interval
+        self._stages = {}
+        self._lock = threading.Lock()
+        self._last_dump = 0.0
+        self._server = None
+        self.started = time.time()
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            histogram = self._stages.get(stage)
+            if histogram is None:
+                histogram = self._stages[stage] = LatencyHistogram(self.window)
+            histogram.observe(seconds)
+
+    @contextmanager
+    def span(self, stage):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started)
+
+    def snapshot(self):
+        with self._lock:
+            stages = {stage: histogram.summary() for stage, histogram in sorted(self._stages.items())}
+        return {'started': self.started, 'time': time.time(), 'stages': stages}
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+
+    def dump(self, path=None):
+        """
+        Writes the snapshot as JSON, replacing the file atomically.
+        """
+        path = path or self.dump_path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        temporary = path + '.tmp'
+        with open(temporary, 'w') as handle:
+            json.dump(self.snapshot(), handle, indent=2)
+        os.replace(temporary, path)
+        self._last_dump = time.monotonic()
+
+    def maybe_dump(self):
+        if self.dump_path and time.monotonic() - self._last_dump >= self.dump_interval:
+            self.dump()
+
+    def serve(self, port, host='127.0.0.1'):
+        """
+        Serves the snapshot as JSON on http://host:port/metrics from a daemon thread.
+        """
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip('/') not in ('', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = json.dumps(metrics.snapshot()).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, name='metrics', daemon=True).start()
+        return self._server
+
+    def close(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+metrics = Metrics()
@@ -0,0 +1,36 @@
+"""
+Chooses the MetaTrader5 implementation the bot talks to.
+
+MT5_BACKEND=replay selects the offline simulator in utils.mt5_replay; anything
+else (the default) imports the real MetaTrader5 package. Modules import `mt5`
+from here instead of importing MetaTrader5 directly, and read the time and
+sleep through now()/sleep() so a replay runs on its virtual clock.
+"""
+import asyncio
+import os
+from datetime import datetime
+
+REPLAY = os.environ.get('MT5_BACKEND', 'live').lower() == 'replay'
+
+if REPLAY:
+    from utils import mt5_replay as mt5
+else:
+    import MetaTrader5 as mt5
+
+
+def now(tz=None):
+    if REPLAY:
+        return mt5.clock.now(tz)
+    return datetime.now(tz=tz)
+
+
+async def sleep(seconds):
+    if REPLAY:
+        await mt5.clock.sleep(seconds)
+    else:
+        await asyncio.sleep(seconds)
+
+
+def finished():
+    """True when a replay has run out of stored history (never for the live terminal)."""
+    return REPLAY and mt5.finished()
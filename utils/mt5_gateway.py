@@ -0,0 +1,79 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from utils.mt5_backend import mt5
+from utils.metrics import metrics as default_metrics
+
+
+class MT5Gateway:
+    """
+    Routes every MetaTrader5 terminal call through a single worker thread.
+
+    The terminal API is blocking and not thread-safe, so calls are serialised on
+    one executor thread and exposed to the event loop as awaitables. While a
+    call is in flight the loop keeps running strategy code for other symbols.
+
+    A call that times out is abandoned by the awaiting coroutine, but the
+    terminal call itself still runs to completion on the worker thread and
+    later calls queue behind it.
+
+    Every call is timed as the metrics stage 'mt5.<name>', including the time
+    spent queued behind other calls.
+    """
+
+    def __init__(self, timeout=10, module=mt5, metrics=default_metrics):
+        self.timeout = timeout
+        self.mt5 = module
+        self.metrics = metrics
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mt5")
+
+    async def call(self, name, *args, timeout=None, **kwargs):
+        """
+        Runs mt5.<name>(*args, **kwargs) on the terminal thread.
+
+        Args:
+            name: Name of the MetaTrader5 function.
+            timeout: Seconds to wait before raising asyncio.TimeoutError (defaults to self.timeout).
+
+        Returns:
+            Whatever the MetaTrader5 function returns.
+        """
+        loop = asyncio.get_running_loop()
+        func = partial(getattr(self.mt5, name), *args, **kwargs)
+        with self.metrics.span("mt5." + name):
+            future = loop.run_in_executor(self._executor, func)
+            return await asyncio.wait_for(future, self.timeout if timeout is None else timeout)
+
+    def call_sync(self, name, *args, timeout=None, **kwargs):
+        """
+        Blocking variant of call() for code that runs outside the event loop.
+        """
+        with self.metrics.span("mt5." + name):
+            future = self._executor.submit(getattr(self.mt5, name), *args, **kwargs)
+            return future.result(timeout=self.timeout if timeout is None else timeout)
+
+    async def copy_rates_range(self, symbol, timeframe, start, end, timeout=None):
+        return await self.call("copy_rates_range", symbol, timeframe, start, end, timeout=timeout)
+
+    async def copy_rates_from(self, symbol, timeframe, start, count, timeout=None):
+        return await self.call("copy_rates_from", symbol, timeframe, start, count, timeout=timeout)
+
+    async def symbol_info_tick(self, symbol, timeout=None):
+        return await self.call("symbol_info_tick", symbol, timeout=timeout)
+
+    async def symbol_info(self, symbol, timeout=None):
+        return await self.call("symbol_info", symbol, timeout=timeout)
+
+    async def positions_get(self, symbol=None, timeout=None):
+        if symbol is None:
+            return await self.call("positions_get", timeout=timeout)
+        return await self.call("positions_get", symbol=symbol, timeout=timeout)
+
+    async def order_send(self, request, timeout=None):
+        return await self.call("order_send", request, timeout=timeout)
+
+    async def account_info(self, timeout=None):
+        return await self.call("account_info", timeout=timeout)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
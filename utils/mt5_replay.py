@@ -0,0 +1,494 @@
+"""
+Offline stand-in for the MetaTrader5 package.
+
+Replays candles from a CandleStore on a virtual clock and simulates market
+fills, positions and the account balance, with the same call surface the bot
+uses (initialize, login, copy_rates_*, symbol_info_tick, positions_get,
+order_send, ...). Select it with MT5_BACKEND=replay (see utils.mt5_backend).
+
+The clock only moves when VirtualClock.sleep() or advance() is called, so a
+replay is deterministic. With MT5_REPLAY_SPEED=0 (the default) sleeps return
+immediately; a positive speed also waits seconds / speed of real time.
+
+Prices at the current virtual time come from the stored M1 bars: the bid is
+the open of the M1 bar that contains the current time (or the last close if
+there is none), and the forming bar of every timeframe is built from the M1
+bars that have closed so far, so no price from the future is ever returned.
+
+Environment:
+    MT5_REPLAY_STORE: CandleStore root (defaults to CANDLE_STORE_PATH, then data/candles).
+    MT5_REPLAY_START: Start of the replay, epoch seconds or ISO time (defaults to
+        the first stored bar plus MT5_REPLAY_WARMUP minutes, 3600 by default).
+    MT5_REPLAY_SPEED: Virtual seconds per real second (0 = as fast as possible).
+    MT5_REPLAY_BALANCE: Starting balance of the simulated account.
+"""
+import asyncio
+import os
+from collections import namedtuple
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+from utils.storage import CandleStore
+
+TIMEFRAME_M1 = 1
+TIMEFRAME_M5 = 5
+TIMEFRAME_M15 = 15
+TIMEFRAME_M30 = 30
+TIMEFRAME_H1 = 16385
+TIMEFRAME_H4 = 16388
+TIMEFRAME_D1 = 16408
+
+TIMEFRAME_SECONDS = {
+    TIMEFRAME_M1: 60,
+    TIMEFRAME_M5: 300,
+    TIMEFRAME_M15: 900,
+    TIMEFRAME_M30: 1800,
+    TIMEFRAME_H1: 3600,
+    TIMEFRAME_H4: 14400,
+    TIMEFRAME_D1: 86400,
+}
+
+ORDER_TYPE_BUY = 0
+ORDER_TYPE_SELL = 1
+POSITION_TYPE_BUY = 0
+POSITION_TYPE_SELL = 1
+TRADE_ACTION_DEAL = 1
+ORDER_TIME_GTC = 0
+ORDER_FILLING_FOK = 0
+ORDER_FILLING_IOC = 1
+SYMBOL_TRADE_EXECUTION_INSTANT = 1
+SYMBOL_TRADE_EXECUTION_MARKET = 2
+
+TRADE_RETCODE_REQUOTE = 10004
+TRADE_RETCODE_DONE = 10009
+TRADE_RETCODE_INVALID = 10013
+TRADE_RETCODE_INVALID_VOLUME = 10014
+TRADE_RETCODE_MARKET_CLOSED = 10018
+TRADE_RETCODE_POSITION_CLOSED = 10036
+
+RES_S_OK = 1
+RES_E_NOT_FOUND = -4
+RES_E_INTERNAL_FAIL_INIT = -10003
+
+Tick = namedtuple('Tick', 'time bid ask last volume time_msc flags volume_real')
+SymbolInfo = namedtuple(
+    'SymbolInfo',
+    'name visible digits point spread trade_exemode trade_contract_size volume_min volume_max volume_step',
+)
+TradePosition = namedtuple(
+    'TradePosition',
+    'ticket time time_msc type magic identifier volume price_open sl tp price_current swap profit symbol comment',
+)
+OrderSendResult = namedtuple(
+    'OrderSendResult',
+    'retcode deal order volume price bid ask comment request_id retcode_external request',
+)
+AccountInfo = namedtuple(
+    'AccountInfo',
+    'login server currency leverage balance equity profit margin margin_free',
+)
+TradeDeal = namedtuple('TradeDeal', 'ticket order time type position_id volume price profit symbol comment')
+
+RATES_DTYPE = np.dtype(list(CandleStore.COLUMNS.items()))
+
+# Contract details used for every symbol unless overridden through configure(symbols=...)
+DEFAULT_SYMBOL = {
+    'digits': 4,
+    'point': 0.0001,
+    'trade_exemode': SYMBOL_TRADE_EXECUTION_MARKET,
+    'trade_contract_size': 1.0,
+    'volume_min': 0.2,
+    'volume_max': 50.0,
+    'volume_step': 0.01,
+}
+
+
+class VirtualClock:
+    """
+    Replay time in epoch seconds. It only moves forward through advance() and sleep().
+    """
+
+    def __init__(self, start=0, speed=0):
+        self.time = float(start)
+        self.speed = speed
+
+    def timestamp(self):
+        return self.time
+
+    def now(self, tz=None):
+        return datetime.fromtimestamp(self.time, tz=tz or timezone.utc)
+
+    def advance(self, seconds):
+        self.time += seconds
+
+    async def sleep(self, seconds):
+        self.advance(seconds)
+        await asyncio.sleep(seconds / self.speed if self.speed else 0)
+
+
+class ReplayTerminal:
+    """
+    Simulated terminal state: market data from the store, positions, deals and balance.
+    """
+
+    def __init__(self, store, clock, balance=10000.0, symbols=None, login=0, server='replay'):
+        self.store = store
+        self.clock = clock
+        self.balance = float(balance)
+        self.symbols = symbols or {}
+        self.login = login
+        self.server = server
+        self.initialized = False
+        self.error = (RES_S_OK, 'Success')
+        self.positions = {}
+        self.deals = []
+        self._ticket = 0
+
+    # Market data
+
+    def symbol(self, symbol):
+        spec = {**DEFAULT_SYMBOL, **self.symbols.get(symbol, {})}
+        return SymbolInfo(name=symbol, visible=True, spread=self._price(symbol)[1], **spec)
+
+    def _price(self, symbol):
+        # (bid, spread) now: the open of the M1 bar containing now, else the latest stored close
+        bar_open = int(self.clock.timestamp() // 60 * 60)
+        current = self.store.read(symbol, TIMEFRAME_M1, bar_open, bar_open, columns=['open', 'spread'])
+        if len(current['open']):
+            return float(current['open'][0]), int(current['spread'][0])
+        closed = self.store.read(symbol, TIMEFRAME_M1, bar_open - 86400, bar_open - 60, columns=['close', 'spread'])
+        if len(closed['close']):
+            return float(closed['close'][-1]), int(closed['spread'][-1])
+        return None, 0
+
+    def tick(self, symbol):
+        bid, spread = self._price(symbol)
+        if bid is None:
+            return None
+        info = {**DEFAULT_SYMBOL, **self.symbols.get(symbol, {})}
+        ask = round(bid + spread * info['point'], info['digits'])
+        now = self.clock.timestamp()
+        return Tick(time=int(now), bid=bid, ask=ask, last=bid, volume=0, time_msc=int(now * 1000), flags=0, volume_real=0.0)
+
+    def rates_range(self, symbol, timeframe, start, end):
+        step = TIMEFRAME_SECONDS[timeframe]
+        now = self.clock.timestamp()
+        end = min(_epoch(end), now)
+        start = _epoch(start)
+        data = self.store.read(symbol, timeframe, start, end)
+        closed = data['time'] + step <= now
+        rates = np.empty(int(closed.sum()), dtype=RATES_DTYPE)
+        for column in RATES_DTYPE.names:
+            rates[column] = data[column][closed]
+
+        forming = self._forming_bar(symbol, step)
+        if forming is not None and start <= forming['time'] <= end and (len(rates) == 0 or forming['time'] > rates['time'][-1]):
+            rates = np.concatenate([rates, forming[None]])
+        return rates
+
+    def _forming_bar(self, symbol, step):
+        now = self.clock.timestamp()
+        bar_open = int(now // step * step)
+        price, spread = self._price(symbol)
+        if price is None:
+            return None
+        # M1 bars of this bar that have already closed
+        closed = self.store.read(symbol, TIMEFRAME_M1, bar_open, int(now // 60 * 60) - 60)
+        bar = np.zeros((), dtype=RATES_DTYPE)
+        bar['time'] = bar_open
+        bar['open'] = closed['open'][0] if len(closed['open']) else price
+        bar['high'] = closed['high'].max(initial=price)
+        bar['low'] = closed['low'].min(initial=price)
+        bar['close'] = price
+        bar['tick_volume'] = closed['tick_volume'].sum()
+        bar['spread'] = spread
+        return bar
+
+    def rates_from(self, symbol, timeframe, date_from, count):
+        step = TIMEFRAME_SECONDS[timeframe]
+        end = min(_epoch(date_from), self.clock.timestamp())
+        first_day = self.store.days(symbol, timeframe)[:1]
+        earliest = int(pd.Timestamp(first_day[0], tz='UTC').timestamp()) if first_day else end
+        span = count * step
+        while True:
+            rates = self.rates_range(symbol, timeframe, end - span, end)
+            if len(rates) >= count or end - span <= earliest:
+                return rates[-count:] if count else rates[:0]
+            span *= 2
+
+    # Trading
+
+    def _position_view(self, position):
+        tick = self.tick(position['symbol'])
+        current = position['price_open'] if tick is None else (tick.bid if position['type'] == POSITION_TYPE_BUY else tick.ask)
+        return TradePosition(price_current=current, profit=self._profit(position, current), **position)
+
+    def _profit(self, position, price):
+        size = {**DEFAULT_SYMBOL, **self.symbols.get(position['symbol'], {})}['trade_contract_size']
+        direction = 1 if position['type'] == POSITION_TYPE_BUY else -1
+        return round((price - position['price_open']) * direction * position['volume'] * size, 2)
+
+    def open_positions(self, symbol=None, ticket=None):
+        return tuple(
+            self._position_view(position)
+            for position in self.positions.values()
+            if (symbol is None or position['symbol'] == symbol) and (ticket is None or position['ticket'] == ticket)
+        )
+
+    def send(self, request):
+        def result(retcode, comment, deal=0, order=0, volume=0.0, price=0.0):
+            return OrderSendResult(
+                retcode=retcode, deal=deal, order=order, volume=volume, price=price,
+                bid=tick.bid if tick else 0.0, ask=tick.ask if tick else 0.0, comment=comment,
+                request_id=0, retcode_external=0, request=request,
+            )
+
+        symbol = request.get('symbol')
+        tick = self.tick(symbol) if symbol else None
+        if request.get('action') != TRADE_ACTION_DEAL or request.get('type') not in (ORDER_TYPE_BUY, ORDER_TYPE_SELL):
+            return result(TRADE_RETCODE_INVALID, 'Invalid request')
+        if tick is None:
+            return result(TRADE_RETCODE_MARKET_CLOSED, 'Market closed')
+
+        info = self.symbol(symbol)
+        volume = float(request.get('volume', 0))
+        steps = (volume - info.volume_min) / info.volume_step
+        if volume < info.volume_min or volume > info.volume_max or abs(steps - round(steps)) > 1e-6:
+            return result(TRADE_RETCODE_INVALID_VOLUME, 'Invalid volume')
+
+        price = tick.ask if request['type'] == ORDER_TYPE_BUY else tick.bid
+        requested = request.get('price')
+        if info.trade_exemode == SYMBOL_TRADE_EXECUTION_INSTANT and requested:
+            if abs(price - requested) > request.get('deviation', 0) * info.point:
+                return result(TRADE_RETCODE_REQUOTE, 'Requote', price=price)
+
+        self._ticket += 1
+        ticket = self._ticket
+        now = self.clock.timestamp()
+
+        if request.get('position'):
+            position = self.positions.get(request['position'])
+            if position is None or position['symbol'] != symbol:
+                return result(TRADE_RETCODE_POSITION_CLOSED, 'Position doesn\'t exist')
+            if request['type'] == position['type']:
+                return result(TRADE_RETCODE_INVALID, 'Invalid request')
+            volume = min(volume, position['volume'])
+            profit = self._profit({**position, 'volume': volume}, price)
+            self.balance = round(self.balance + profit, 2)
+            position['volume'] = round(position['volume'] - volume, 8)
+            if position['volume'] <= 0:
+                del self.positions[position['ticket']]
+            self.deals.append(TradeDeal(ticket, ticket, int(now), request['type'], position['ticket'], volume, price, profit, symbol, request.get('comment', '')))
+            return result(TRADE_RETCODE_DONE, 'Request executed', deal=ticket, order=ticket, volume=volume, price=price)
+
+        self.positions[ticket] = {
+            'ticket': ticket,
+            'time': int(now),
+            'time_msc': int(now * 1000),
+            'type': request['type'],
+            'magic': request.get('magic', 0),
+            'identifier': ticket,
+            'volume': volume,
+            'price_open': price,
+            'sl': request.get('sl', 0.0),
+            'tp': request.get('tp', 0.0),
+            'swap': 0.0,
+            'symbol': symbol,
+            'comment': request.get('comment', ''),
+        }
+        self.deals.append(TradeDeal(ticket, ticket, int(now), request['type'], ticket, volume, price, 0.0, symbol, request.get('comment', '')))
+        return result(TRADE_RETCODE_DONE, 'Request executed', deal=ticket, order=ticket, volume=volume, price=price)
+
+    def account(self):
+        profit = round(sum(position.profit for position in self.open_positions()), 2)
+        equity = round(self.balance + profit, 2)
+        return AccountInfo(
+            login=self.login, server=self.server, currency='USD', leverage=1000,
+            balance=self.balance, equity=equity, profit=profit, margin=0.0, margin_free=equity,
+        )
+
+    def last_bar_time(self):
+        """Open time of the newest stored M1 bar across all symbols, or None."""
+        last = None
+        for symbol in _stored_symbols(self.store):
+            value = self.store.last_time(symbol, TIMEFRAME_M1)
+            if value is not None:
+                last = value if last is None else max(last, value)
+        return last
+
+
+def _epoch(value):
+    if isinstance(value, datetime):
+        return value.timestamp()
+    return float(value)
+
+
+def _parse_time(value):
+    if value is None or value == '':
+        return None
+    try:
+        return _epoch(value)
+    except (TypeError, ValueError):
+        stamp = pd.Timestamp(value)
+        return (stamp if stamp.tzinfo else stamp.tz_localize('UTC')).timestamp()
+
+
+def _stored_symbols(store):
+    if not os.path.isdir(store.root):
+        return []
+    return sorted(name for name in os.listdir(store.root) if os.path.isdir(os.path.join(store.root, name)))
+
+
+def _default_start(store, warmup_minutes):
+    firsts = []
+    for symbol in _stored_symbols(store):
+        first_day = next(store.iter_range(symbol, TIMEFRAME_M1, columns=['time']), None)
+        if first_day is not None:
+            firsts.append(int(first_day['time'][0]))
+    return (min(firsts) if firsts else 0) + warmup_minutes * 60
+
+
+_terminal = None
+clock = VirtualClock()
+
+
+def configure(store=None, start=None, speed=None, balance=None, symbols=None, warmup_minutes=None):
+    """
+    (Re)creates the simulated terminal. Unset arguments fall back to the MT5_REPLAY_* environment variables.
+
+    Args:
+        store: CandleStore or store root to replay from.
+        start: Start of the replay (epoch seconds, datetime or ISO string).
+        speed: Virtual seconds per real second; 0 runs as fast as possible.
+        balance: Starting account balance.
+        symbols: {symbol: {field: value}} overrides of DEFAULT_SYMBOL.
+        warmup_minutes: History kept before the default start.
+    """
+    global _terminal
+    if store is None:
+        store = os.environ.get('MT5_REPLAY_STORE') or os.environ.get('CANDLE_STORE_PATH') or 'data/candles'
+    if not isinstance(store, CandleStore):
+        store = CandleStore(store)
+    if speed is None:
+        speed = float(os.environ.get('MT5_REPLAY_SPEED', 0))
+    if balance is None:
+        balance = float(os.environ.get('MT5_REPLAY_BALANCE', 10000))
+    if warmup_minutes is None:
+        warmup_minutes = int(os.environ.get('MT5_REPLAY_WARMUP', 3600))
+    start = _parse_time(os.environ.get('MT5_REPLAY_START') if start is None else start)
+    if start is None:
+        start = _default_start(store, warmup_minutes)
+
+    clock.time = float(start)
+    clock.speed = speed
+    _terminal = ReplayTerminal(store, clock, balance=balance, symbols=symbols)
+    return _terminal
+
+
+def terminal():
+    if _terminal is None:
+        configure()
+    return _terminal
+
+
+def finished():
+    """True once the clock has passed the newest stored M1 bar."""
+    last = terminal().last_bar_time()
+    return last is None or clock.timestamp() >= last + 60
+
+
+def _ready():
+    if terminal().initialized:
+        return True
+    terminal().error = (RES_E_INTERNAL_FAIL_INIT, 'IPC initialize failed')
+    return False
+
+
+# MetaTrader5 API
+
+def initialize(path=None, login=None, password=None, server=None, timeout=None, portable=False):
+    terminal().initialized = True
+    terminal().error = (RES_S_OK, 'Success')
+    if login is not None:
+        terminal().login = login
+    return True
+
+
+def login(login, password=None, server=None, timeout=None):
+    if not _ready():
+        return False
+    terminal().login = login
+    terminal().server = server or terminal().server
+    return True
+
+
+def shutdown():
+    terminal().initialized = False
+    return True
+
+
+def last_error():
+    return terminal().error
+
+
+def version():
+    return (500, 0, 'replay')
+
+
+def account_info():
+    return terminal().account() if _ready() else None
+
+
+def symbol_info(symbol):
+    return terminal().symbol(symbol) if _ready() else None
+
+
+def symbol_select(symbol, enable=True):
+    return _ready()
+
+
+def symbol_info_tick(symbol):
+    if not _ready():
+        return None
+    tick = terminal().tick(symbol)
+    if tick is None:
+        terminal().error = (RES_E_NOT_FOUND, 'Terminal: Not found')
+    return tick
+
+
+def copy_rates_range(symbol, timeframe, date_from, date_to):
+    return terminal().rates_range(symbol, timeframe, date_from, date_to) if _ready() else None
+
+
+def copy_rates_from(symbol, timeframe, date_from, count):
+    return terminal().rates_from(symbol, timeframe, date_from, count) if _ready() else None
+
+
+def copy_rates_from_pos(symbol, timeframe, start_pos, count):
+    if not _ready():
+        return None
+    rates = terminal().rates_from(symbol, timeframe, clock.timestamp(), start_pos + count)
+    return rates[:len(rates) - start_pos] if start_pos else rates
+
+
+def positions_get(symbol=None, group=None, ticket=None):
+    return terminal().open_positions(symbol=symbol, ticket=ticket) if _ready() else None
+
+
+def positions_total():
+    return len(terminal().positions) if _ready() else None
+
+
+def order_send(request):
+    return terminal().send(request) if _ready() else None
+
+
+def history_deals_get(date_from=None, date_to=None, group=None, ticket=None, position=None):
+    if not _ready():
+        return None
+    start = 0 if date_from is None else _epoch(date_from)
+    end = clock.timestamp() if date_to is None else _epoch(date_to)
+    return tuple(
+        deal for deal in terminal().deals
+        if start <= deal.time <= end and (position is None or deal.position_id == position)
+    )
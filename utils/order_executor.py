@@ -0,0 +1,217 @@
+import asyncio
+import time
+from utils.mt5_backend import mt5
+from utils.metrics import metrics as default_metrics
+
+# Retcodes after which the order is re-priced from a fresh tick and sent again
+REQUOTE_RETCODES = (
+    getattr(mt5, 'TRADE_RETCODE_REQUOTE', 10004),
+    getattr(mt5, 'TRADE_RETCODE_PRICE_CHANGED', 10020),
+    getattr(mt5, 'TRADE_RETCODE_PRICE_OFF', 10021),
+)
+
+
+class SymbolSpec:
+    """
+    The trading rules of a symbol from mt5.symbol_info, fetched once per symbol.
+    """
+
+    def __init__(self, info):
+        self.digits = info.digits
+        self.point = info.point
+        self.volume_min = info.volume_min
+        self.volume_max = info.volume_max
+        self.volume_step = info.volume_step
+        # Minimum distance of stops from the price, in points (not every terminal build reports it)
+        self.stops_level = getattr(info, 'trade_stops_level', 0)
+
+    def volume(self, volume):
+        """Rounds a volume down to the volume step, within the symbol's limits."""
+        steps = int(round((volume - self.volume_min) / self.volume_step, 8))
+        volume = self.volume_min + max(steps, 0) * self.volume_step
+        return round(min(volume, self.volume_max), 8)
+
+    def price(self, price):
+        return round(price, self.digits)
+
+    def stop(self, stop, price, below):
+        """Moves a stop loss / take profit at least stops_level points away from the price."""
+        distance = self.stops_level * self.point
+        return self.price(min(stop, price - distance) if below else max(stop, price + distance))
+
+
+class OrderIntent:
+    """
+    One order for the executor: opens a `side` ("BUY"/"SELL") position, or closes
+    `position` (a ticket) when it's given.
+
+    Once executed, `result` holds the last order_send result (None if the terminal
+    call failed), `attempts` the number of sends and `latency` the seconds from
+    submit() to the final result.
+    """
+
+    def __init__(self, symbol, side, volume, price=None, position=None, sl=None, tp=None, comment=""):
+        self.symbol = symbol
+        self.side = side
+        self.volume = volume
+        self.price = price
+        self.position = position
+        self.sl = sl
+        self.tp = tp
+        self.comment = comment
+        self.result = None
+        self.attempts = 0
+        self.latency = None
+        self.submitted = None
+        self.future = None
+
+    @property
+    def kind(self):
+        return "open" if self.position is None else "close"
+
+
+class OrderExecutor:
+    """
+    Places orders from an asyncio queue so the trading loop never waits on them.
+
+    submit() only queues an OrderIntent. A worker task takes every queued
+    intent at once (up to `batch_size`), loads the symbol rules it hasn't seen
+    yet, fetches one tick per symbol of the batch and sends the orders in
+    order. A requote is re-priced from a fresh tick and sent again, up to
+    `max_retries` sends per order.
+
+    Every order's latency from submit() to its final result is recorded as the
+    metrics stage 'order.open' or 'order.close'.
+    """
+
+    def __init__(self, gateway, max_retries=3, deviation=20, batch_size=32, magic=234000, metrics=default_metrics):
+        self.gateway = gateway
+        self.max_retries = max_retries
+        self.deviation = deviation
+        self.batch_size = batch_size
+        self.magic = magic
+        self.metrics = metrics
+        self.specs = {}
+        self._queue = None
+        self._task = None
+
+    def submit(self, intent):
+        """
+        Queues an order.
+
+        Returns:
+            A future resolved with the intent once it has been executed.
+        """
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done():
+            self._queue = self._queue or asyncio.Queue()
+            self._task = loop.create_task(self._run())
+        intent.submitted = time.perf_counter()
+        intent.future = loop.create_future()
+        self._queue.put_nowait(intent)
+        return intent.future
+
+    def pending(self):
+        return 0 if self._queue is None else self._queue.qsize()
+
+    async def drain(self):
+        """Waits until every submitted order has been executed."""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def close(self):
+        """Waits for the queued orders, then stops the worker task."""
+        await self.drain()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def spec(self, symbol):
+        if symbol not in self.specs:
+            info = await self.gateway.symbol_info(symbol)
+            if info is None:
+                return None
+            self.specs[symbol] = SymbolSpec(info)
+        return self.specs[symbol]
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                await self._execute(batch)
+            except Exception as e:
+                print("Error executing", len(batch), "orders:", e)
+            finally:
+                for intent in batch:
+                    if not intent.future.done():
+                        intent.future.set_result(intent)
+                    self._queue.task_done()
+
+    async def _execute(self, batch):
+        symbols = list(dict.fromkeys(intent.symbol for intent in batch))
+        await asyncio.gather(*(self.spec(symbol) for symbol in symbols))
+        ticks = dict(zip(symbols, await asyncio.gather(*(self.gateway.symbol_info_tick(symbol) for symbol in symbols))))
+        for intent in batch:
+            await self._send(intent, ticks[intent.symbol])
+
+    def request(self, intent, tick, retry=False):
+        """
+        The order_send request of an intent. Market orders are priced at the tick unless the
+        intent carries its own price (first attempt only).
+        """
+        spec = self.specs.get(intent.symbol)
+        buy = intent.side == "BUY"
+        price = intent.price if intent.price is not None and not retry else (tick.ask if buy else tick.bid)
+        request = {
+            "action": mt5.TRADE_ACTION_DEAL,
+            "symbol": intent.symbol,
+            "volume": spec.volume(intent.volume) if spec else intent.volume,
+            "type": mt5.ORDER_TYPE_BUY if buy else mt5.ORDER_TYPE_SELL,
+            "price": spec.price(price) if spec else price,
+            "deviation": self.deviation,
+            "magic": self.magic,
+            "comment": intent.comment,
+            "type_time": mt5.ORDER_TIME_GTC,
+        }
+        if intent.position is not None:
+            request["position"] = intent.position
+        if intent.sl is not None:
+            request["sl"] = spec.stop(intent.sl, price, below=buy) if spec else intent.sl
+        if intent.tp is not None:
+            request["tp"] = spec.stop(intent.tp, price, below=not buy) if spec else intent.tp
+        return request
+
+    async def _send(self, intent, tick):
+        result = None
+        while intent.attempts < self.max_retries:
+            if tick is None:
+                print(f"No price for {intent.symbol}, order not sent")
+                break
+            intent.attempts += 1
+            try:
+                result = await self.gateway.order_send(self.request(intent, tick, retry=intent.attempts > 1))
+            except Exception as e:
+                print(f"order_send failed for {intent.symbol}: {e}")
+                result = None
+                break
+            if result is None or result.retcode not in REQUOTE_RETCODES:
+                break
+            tick = await self.gateway.symbol_info_tick(intent.symbol)
+
+        intent.result = result
+        intent.latency = time.perf_counter() - intent.submitted
+        self.metrics.observe("order." + intent.kind, intent.latency)
+        if result is None:
+            return
+        if result.retcode != mt5.TRADE_RETCODE_DONE:
+            print(f"Order failed for {intent.symbol}, retcode={result.retcode}, attempts={intent.attempts}")
+        elif intent.kind == "open":
+            print(f"{intent.side} Order successfully placed for {intent.symbol} at price {result.price}!")
+        else:
+            print(f"Close order successfully placed: {result.order}")
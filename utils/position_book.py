@@ -0,0 +1,50 @@
+class PositionBook:
+    """
+    Open positions from one positions_get call per cycle, indexed by symbol and direction.
+
+    Close decisions read the book instead of asking the terminal for every
+    signal. A position is taken out of the book as soon as its close is
+    queued, so later decisions in the same cycle don't close it again.
+    Positions opened during the cycle appear at the next refresh().
+    """
+
+    def __init__(self, gateway):
+        self.gateway = gateway
+        self._positions = {}
+
+    async def refresh(self):
+        """Replaces the book with the terminal's open positions."""
+        positions = await self.gateway.positions_get()
+        self.load(positions or ())
+        return len(self)
+
+    def load(self, positions):
+        self._positions = {}
+        for position in positions:
+            self._positions.setdefault(position.symbol, {}).setdefault(position.type, {})[position.ticket] = position
+
+    def get(self, symbol=None, type=None):
+        """
+        Open positions of a symbol (all symbols when None), optionally only of one
+        direction (mt5.POSITION_TYPE_BUY or mt5.POSITION_TYPE_SELL).
+        """
+        if symbol is None:
+            books = self._positions.values()
+        else:
+            books = [self._positions.get(symbol, {})]
+        return [
+            position
+            for book in books
+            for direction, positions in book.items()
+            if type is None or direction == type
+            for position in positions.values()
+        ]
+
+    def has(self, symbol, type):
+        return bool(self._positions.get(symbol, {}).get(type))
+
+    def remove(self, position):
+        self._positions.get(position.symbol, {}).get(position.type, {}).pop(position.ticket, None)
+
+    def __len__(self):
+        return sum(len(positions) for book in self._positions.values() for positions in book.values())
@@ -0,0 +1,55 @@
+from utils import mt5_backend
+from utils.mt5_backend import mt5
+
+TIMEFRAME_SECONDS = {
+    mt5.TIMEFRAME_M1: 60,
+    mt5.TIMEFRAME_M5: 300,
+    mt5.TIMEFRAME_M15: 900,
+    mt5.TIMEFRAME_M30: 1800,
+    mt5.TIMEFRAME_H1: 3600,
+    mt5.TIMEFRAME_H4: 14400,
+    mt5.TIMEFRAME_D1: 86400,
+}
+
+
+class BarScheduler:
+    """
+    Wakes the trading loop when a bar closes and tells it which timeframes closed one.
+
+    Boundaries are multiples of the bar length in epoch time, so the loop
+    starts at the same point of every bar however long the previous cycle
+    took. Bars up to H1 close at the same instants in every whole-hour
+    server timezone; H4 and D1 bars assume the server's day starts at 00:00 UTC.
+    """
+
+    def __init__(self, timeframes, delay=1):
+        """
+        Args:
+            timeframes: MT5 timeframe constants to track.
+            delay: Seconds to wait after a boundary so the terminal has the closed bar.
+        """
+        self.periods = {tf: TIMEFRAME_SECONDS[tf] for tf in timeframes}
+        self.delay = delay
+        self._bars = {}
+
+    def due(self, now=None):
+        """
+        The timeframes whose bar closed since the last call (all of them on the first call).
+        """
+        now = (now or mt5_backend.now()).timestamp() - self.delay
+        due = []
+        for tf, period in self.periods.items():
+            bar = int(now // period)
+            if self._bars.get(tf) != bar:
+                self._bars[tf] = bar
+                due.append(tf)
+        return due
+
+    def seconds_until_next(self, now=None):
+        """Seconds until the next bar of the shortest timeframe closes (plus the delay)."""
+        now = (now or mt5_backend.now()).timestamp()
+        period = min(self.periods.values())
+        return (now - self.delay) // period * period + period + self.delay - now
+
+    async def wait(self):
+        await mt5_backend.sleep(self.seconds_until_next())
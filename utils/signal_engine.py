@@ -0,0 +1,55 @@
+from utils.streaming import StreamingIndicators
+from utils.strategies import Strategy
+from ResistanceSupportDectector.features import FeatureCache
+
+
+class SignalEngine:
+    """
+    The CPU-bound half of signal generation: runs the strategy over a symbol's
+    timeframes and keeps the per-(symbol, timeframe) state that makes the next
+    cycle cheaper (streaming indicators, features and the last evaluation).
+
+    It talks to neither the terminal nor the database, so the same engine runs
+    inside TradingBot or in a shard worker process.
+    """
+
+    def __init__(self, timeframes):
+        self.timeframes = list(timeframes)
+        self.streams = {}
+        self.features = FeatureCache()
+        # (symbol, timeframe) -> (rsiStrategy result, MyStrategy strength) of the last evaluation
+        self.evaluations = {}
+
+    async def evaluate(self, symbol, data, timeframes=None):
+        """
+        Args:
+            symbol: Market symbol.
+            data: One candle DataFrame per timeframe, in self.timeframes order.
+            timeframes: Timeframes with a newly closed bar (all by default); the
+                others reuse their last evaluation.
+
+        Returns:
+            [decision, strength] as returned by Strategy.process_multiple_timeframes.
+        """
+        features = []
+        evaluations = []
+        for tf, df in zip(self.timeframes, data):
+            cached = self.evaluations.get((symbol, tf))
+            if cached is not None and timeframes is not None and tf not in timeframes:
+                features.append(None)
+                evaluations.append(cached)
+                continue
+            stream = self.streams.setdefault((symbol, tf), StreamingIndicators())
+            features.append(self.features.frame(symbol, tf, df, stream=stream))
+            evaluations.append(None)
+        result = await Strategy.process_multiple_timeframes(data, features=features, evaluations=evaluations)
+        for tf, evaluation in zip(self.timeframes, evaluations):
+            self.evaluations[(symbol, tf)] = evaluation
+        return result
+
+    def forget(self, symbol):
+        """Drops everything held for a symbol."""
+        self.features.clear(symbol)
+        for cache in (self.streams, self.evaluations):
+            for key in [key for key in cache if key[0] == symbol]:
+                del cache[key]
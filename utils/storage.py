@@ -0,0 +1,190 @@
+import os
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+
+
+class CandleStore:
+    """
+    On-disk candle history per (symbol, timeframe), stored column by column.
+
+    Layout: <root>/<symbol>/<timeframe>/<YYYYMMDD>/<column>.bin, one raw
+    little-endian array per column and one directory per UTC day of bar open
+    times. Files are only ever appended to, so a read memory-maps them and
+    returns views instead of copies.
+
+    The time column is written last, so its length is the number of complete
+    bars in a partition even if a write was interrupted.
+    """
+
+    # Same fields as the rates array returned by mt5.copy_rates_*
+    COLUMNS = {
+        'time': np.dtype('<i8'),
+        'open': np.dtype('<f8'),
+        'high': np.dtype('<f8'),
+        'low': np.dtype('<f8'),
+        'close': np.dtype('<f8'),
+        'tick_volume': np.dtype('<u8'),
+        'spread': np.dtype('<i4'),
+        'real_volume': np.dtype('<u8'),
+    }
+
+    def __init__(self, root):
+        self.root = root
+        self._last_times = {}
+
+    def _series_dir(self, symbol, timeframe):
+        return os.path.join(self.root, symbol.replace(os.sep, '_'), str(timeframe))
+
+    def _column_path(self, symbol, timeframe, day, column):
+        return os.path.join(self._series_dir(symbol, timeframe), day, column + '.bin')
+
+    @staticmethod
+    def _day(timestamp):
+        return datetime.fromtimestamp(int(timestamp), tz=timezone.utc).strftime('%Y%m%d')
+
+    def days(self, symbol, timeframe):
+        """Sorted day partitions (YYYYMMDD) stored for a symbol and timeframe."""
+        path = self._series_dir(symbol, timeframe)
+        if not os.path.isdir(path):
+            return []
+        return sorted(day for day in os.listdir(path) if day.isdigit())
+
+    def _column(self, symbol, timeframe, day, column, length=None):
+        path = self._column_path(symbol, timeframe, day, column)
+        dtype = self.COLUMNS[column]
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        if size < dtype.itemsize:
+            return np.empty(0, dtype=dtype)
+        # Only whole items; an interrupted append can leave a partial one, which the next append truncates
+        values = np.memmap(path, dtype=dtype, mode='r', shape=(size // dtype.itemsize,))
+        return values if length is None else values[:length]
+
+    def last_time(self, symbol, timeframe):
+        """
+        Returns the open time (epoch seconds) of the newest stored bar, or None if nothing is stored.
+        """
+        key = (symbol, timeframe)
+        if key not in self._last_times:
+            last = None
+            for day in reversed(self.days(symbol, timeframe)):
+                times = self._column(symbol, timeframe, day, 'time')
+                if len(times):
+                    last = int(times[-1])
+                    break
+            self._last_times[key] = last
+        return self._last_times[key]
+
+    def append(self, symbol, timeframe, rates):
+        """
+        Appends closed bars to the store.
+
+        Args:
+            symbol: Market symbol.
+            timeframe: MT5 timeframe constant.
+            rates: Rates array from mt5.copy_rates_* or a DataFrame with the same columns,
+                sorted by time. Bars that are not newer than the last stored bar are skipped.
+
+        Returns:
+            The number of bars written.
+        """
+        if rates is None or len(rates) == 0:
+            return 0
+        times = np.asarray(rates['time'], dtype=np.int64)
+        last = self.last_time(symbol, timeframe)
+        start = 0 if last is None else int(np.searchsorted(times, last, side='right'))
+        if start >= len(times):
+            return 0
+
+        times = times[start:]
+        columns = {
+            column: np.asarray(rates[column])[start:].astype(dtype, copy=False)
+            for column, dtype in self.COLUMNS.items()
+            if column != 'time' and column in _names(rates)
+        }
+        day_numbers = times // 86400
+        for day_number in np.unique(day_numbers):
+            rows = day_numbers == day_number
+            day = self._day(day_number * 86400)
+            os.makedirs(os.path.dirname(self._column_path(symbol, timeframe, day, 'time')), exist_ok=True)
+            written = len(self._column(symbol, timeframe, day, 'time'))
+            for column, dtype in self.COLUMNS.items():
+                if column == 'time':
+                    continue
+                values = columns.get(column)
+                values = np.zeros(int(rows.sum()), dtype=dtype) if values is None else values[rows]
+                _write_column(self._column_path(symbol, timeframe, day, column), values, written * dtype.itemsize)
+            _write_column(self._column_path(symbol, timeframe, day, 'time'), times[rows], written * 8)
+
+        self._last_times[(symbol, timeframe)] = int(times[-1])
+        return len(times)
+
+    def read(self, symbol, timeframe, start=None, end=None, columns=None):
+        """
+        Reads bars whose open time is in [start, end].
+
+        Args:
+            start, end: Epoch seconds or datetimes; None leaves that side open.
+            columns: Columns to read (defaults to all).
+
+        Returns:
+            A dict of {column: array}. When the range lies within one day partition the
+            arrays are read-only views onto the memory-mapped files; longer ranges are
+            concatenated from the per-day views.
+        """
+        chunks = list(self.iter_range(symbol, timeframe, start, end, columns))
+        columns = list(self.COLUMNS) if columns is None else list(columns)
+        if not chunks:
+            return {column: np.empty(0, dtype=self.COLUMNS[column]) for column in columns}
+        if len(chunks) == 1:
+            return chunks[0]
+        return {column: np.concatenate([chunk[column] for chunk in chunks]) for column in columns}
+
+    def iter_range(self, symbol, timeframe, start=None, end=None, columns=None):
+        """
+        Yields one dict of memory-mapped column views per day partition overlapping [start, end].
+        """
+        start, end = _epoch(start), _epoch(end)
+        columns = list(self.COLUMNS) if columns is None else list(columns)
+        first_day = None if start is None else self._day(start)
+        last_day = None if end is None else self._day(end)
+        for day in self.days(symbol, timeframe):
+            if (first_day is not None and day < first_day) or (last_day is not None and day > last_day):
+                continue
+            times = self._column(symbol, timeframe, day, 'time')
+            lo = 0 if start is None else int(np.searchsorted(times, start, side='left'))
+            hi = len(times) if end is None else int(np.searchsorted(times, end, side='right'))
+            if lo >= hi:
+                continue
+            yield {
+                column: (times if column == 'time' else self._column(symbol, timeframe, day, column, len(times)))[lo:hi]
+                for column in columns
+            }
+
+    def read_frame(self, symbol, timeframe, start=None, end=None, columns=None):
+        """
+        Same as read(), as a DataFrame shaped like the ones built from mt5.copy_rates_range.
+        """
+        return pd.DataFrame(self.read(symbol, timeframe, start, end, columns), copy=False)
+
+
+def _names(rates):
+    names = getattr(getattr(rates, 'dtype', None), 'names', None)
+    return names if names is not None else list(rates.columns)
+
+
+def _epoch(value):
+    if value is None or isinstance(value, (int, float, np.integer, np.floating)):
+        return value
+    if isinstance(value, datetime):
+        return int(value.timestamp())
+    return int(pd.Timestamp(value).timestamp())
+
+
+def _write_column(path, values, offset):
+    # Truncate anything past the last complete bar (an interrupted append) before appending
+    with open(path, 'ab') as handle:
+        if handle.tell() != offset:
+            handle.truncate(offset)
+            handle.seek(offset)
+        handle.write(np.ascontiguousarray(values).tobytes())
@@ -1,9 +1,8 @@
-from utils.indicators import Indicator
 #from ResistanceSupportDectector.detector import generate_buy_signal
-from ResistanceSupportDectector.detector import is_support_resistance, is_price_near_ma, is_bollinger_band_support_resistance, is_price_near_bollinger_band
 import asyncio
-from ResistanceSupportDectector.spikeDectector import detect_spikes
+from ResistanceSupportDectector.features import FeatureFrame
 from ResistanceSupportDectector.aiStartegy import MyStrategy, combine_timeframe_signals
+from ResistanceSupportDectector.strength import decide
 
 class Strategy:
     @classmethod
@@ -26,7 +25,7 @@ class Strategy:
 
 
     @classmethod
-    async def rsiStrategy(cls, df, ma_period=10, tolerance=0.02, breakout_threshold=0.015):
+    async def rsiStrategy(cls, df, ma_period=10, tolerance=0.02, breakout_threshold=0.015, stream=None, features=None, std_dev=2):
         """
         Generates a buy signal based on MA10 behavior and price proximity.
 
@@ -35,30 +34,33 @@ class Strategy:
             ma_period: Length of the moving average.
             tolerance: Percentage tolerance for considering price near MA.
             breakout_threshold: Percentage threshold for price breakout.
+            stream: Optional StreamingIndicators for this frame; last-bar MA and band values are read from it.
+            features: Optional FeatureFrame shared with MyStrategy for the same frame.
+            std_dev: Number of standard deviations for the Bollinger Bands.
 
         Returns:
             True if a buy signal is generated, False otherwise.
         """
-        spikes = detect_spikes(df)
-        # print(len(spikes))
-        indicator = Indicator(df)
-        ma48 = indicator.moving_average(48)
+        if features is None:
+            features = FeatureFrame(df, stream=stream)
+        last_price = features.price
+        last_ma48 = features.last_sma(48)
         # check m0ving average 10 behavior
-        ma10_behavior = await is_support_resistance(df, ma_period)
-        price_near_ma10 = await is_price_near_ma(df, ma_period, tolerance)
-        breakout_10 = df['close'].iloc[-1] > ma48.iloc[-1] * (1 + breakout_threshold)
+        ma10_behavior = features.support_resistance(ma_period)
+        price_near_ma10 = features.near_ma(ma_period, tolerance)
+        breakout_10 = last_price > last_ma48 * (1 + breakout_threshold)
 
         # check moving average 48 behavior
 
         ma48_period = 48
-        ma48_behavior = await is_support_resistance(df, 48)
-        price_near_ma48 = await is_price_near_ma(df, ma48_period, tolerance)
-        breakout_48 = df['close'].iloc[-1] > ma48.iloc[-1] * (1 + breakout_threshold)
+        ma48_behavior = features.support_resistance(ma48_period)
+        price_near_ma48 = features.near_ma(ma48_period, tolerance)
+        breakout_48 = last_price > last_ma48 * (1 + breakout_threshold)
 
         # check bolling band behavior
         #ma48_period = 48
-        bb_behavior = await is_bollinger_band_support_resistance(df)
-        price_near_bb = await is_price_near_bollinger_band(df)
+        bb_behavior = features.bb_support_resistance(std_dev=std_dev)
+        price_near_bb = features.near_bb(std_dev=std_dev)
         #breakout_48 = df['close'].iloc[-1] > ma48.iloc[-1] * (1 + breakout_threshold)
 
 
@@ -87,7 +89,9 @@ class Strategy:
         
 
     @classmethod
-    async def process_multiple_timeframes(cls, dataframes, ma_period=10, tolerance=0.02, breakout_threshold=0.015, std_dev=2):
+    async def process_multiple_timeframes(cls, dataframes, ma_period=10, tolerance=0.02, breakout_threshold=0.015, std_dev=2, streams=None, features=None,
+                                          buy_threshold=0.65, strong_buy_threshold=0.7, sell_threshold=0.52, strong_sell_threshold=0.4,
+                                          strategy_params=None, evaluations=None):
         """
         Processes multiple timeframes to generate a buy or sell signal.
 
@@ -97,6 +101,16 @@ class Strategy:
             tolerance: Percentage tolerance for considering price near MA.
             breakout_threshold: Percentage threshold for price breakout.
             std_dev: Number of standard deviations for Bollinger Bands.
+            streams: Optional list of StreamingIndicators, one per DataFrame.
+            features: Optional list of FeatureFrames, one per DataFrame (built here when not given).
+            buy_threshold: Combined strength to buy when rsiStrategy says BUY on every timeframe.
+            strong_buy_threshold: Combined strength to buy regardless of rsiStrategy.
+            sell_threshold: Combined strength to sell when rsiStrategy says SELL on every timeframe.
+            strong_sell_threshold: Combined strength to sell regardless of rsiStrategy.
+            strategy_params: Optional MyStrategy.PARAMS overrides.
+            evaluations: Optional list with one (rsiStrategy result, MyStrategy strength) per
+                timeframe to reuse; None entries are evaluated and filled in, so the caller
+                can keep the list for timeframes whose bar hasn't closed since.
 
         Returns:
             "BUY", "SELL", or "HOLD" based on the combined signals from all timeframes.
@@ -104,13 +118,27 @@ class Strategy:
         
         tasks = []
         task2 = []
-        for df in dataframes:
-            startegy = MyStrategy(df)
-            task2.append(asyncio.create_task(cls.rsiStrategy(df, ma_period, tolerance, breakout_threshold)))
+        if evaluations is None:
+            evaluations = [None] * len(dataframes)
+        if streams is None:
+            streams = [None] * len(dataframes)
+        if features is None:
+            features = [None] * len(dataframes)
+        stale = [index for index, evaluation in enumerate(evaluations) if evaluation is None]
+        for index in stale:
+            df = dataframes[index]
+            frame_features = features[index]
+            if frame_features is None:
+                frame_features = FeatureFrame(df, stream=streams[index])
+            # Both strategies read the same FeatureFrame, so shared features are computed once
+            startegy = MyStrategy(df, features=frame_features, **(strategy_params or {}))
+            task2.append(asyncio.create_task(cls.rsiStrategy(df, ma_period, tolerance, breakout_threshold, features=frame_features, std_dev=std_dev)))
             tasks.append(asyncio.create_task(startegy.run()))
 
-        result2 = await asyncio.gather(*task2)
-        results = await asyncio.gather(*tasks)
+        for index, rsi_result, strength in zip(stale, await asyncio.gather(*task2), await asyncio.gather(*tasks)):
+            evaluations[index] = (rsi_result, strength)
+        result2 = [evaluation[0] for evaluation in evaluations]
+        results = [evaluation[1] for evaluation in evaluations]
         strength, signal = await combine_timeframe_signals(results)
                 #Check if all signals are the same
         # if all(result == "BUY" for result in results):
@@ -119,19 +147,10 @@ class Strategy:
         #     return -1
         # else:
         #     return 0
-        print("stregth", strength)
 
 
-        if strength >= 0.65 and all(result == "BUY" for result in result2):
-            return [1, strength]
-        elif strength >= 0.7:
-            return [1, strength]
-        elif strength <= 0.52 and all(result == "SELL" for result in result2):
-            return [-1, strength]
-        elif strength <= 0.4:
-            return [-1, strength]
-        else:
-            return [0, strength]
+        decision = decide(strength, result2, buy_threshold, strong_buy_threshold, sell_threshold, strong_sell_threshold)
+        return [decision, strength]
         
 
         # Check if all signals are the same
@@ -0,0 +1,338 @@
+import math
+from collections import deque
+import numpy as np
+from utils.indicators import IndicatorEngine, ema_kernel
+
+
+def _rsi_from_averages(avg_gain, avg_loss):
+    # Same edge cases as the vectorised version: no losses -> 100, no movement -> NaN
+    if avg_loss == 0:
+        return math.nan if avg_gain == 0 else 100.0
+    return 100 - (100 / (1 + avg_gain / avg_loss))
+
+
+class RunningSMA:
+    """
+    Simple moving average updated in O(1) per bar.
+
+    The running sum is re-added from the window once per period so float
+    drift cannot build up over weeks of updates.
+    """
+
+    def __init__(self, period):
+        self.period = period
+        self.reset()
+
+    def reset(self):
+        self.window = deque()
+        self.total = 0.0
+        self._updates = 0
+
+    def _next_total(self, x):
+        total = self.total + x
+        if len(self.window) == self.period:
+            total -= self.window[0]
+        return total
+
+    @property
+    def value(self):
+        return self.total / self.period if len(self.window) == self.period else math.nan
+
+    def peek(self, x):
+        """Value the SMA would have if x were the next bar, without committing it."""
+        if len(self.window) + 1 < self.period:
+            return math.nan
+        return self._next_total(x) / self.period
+
+    def update(self, x):
+        self.total = self._next_total(x)
+        if len(self.window) == self.period:
+            self.window.popleft()
+        self.window.append(x)
+        self._updates += 1
+        if self._updates >= self.period:
+            self.total = math.fsum(self.window)
+            self._updates = 0
+        return self.value
+
+    def seed(self, values):
+        self.reset()
+        for x in np.asarray(values, dtype=float)[-self.period:].tolist():
+            self.window.append(x)
+        self.total = math.fsum(self.window)
+        return self
+
+
+class RollingVariance:
+    """
+    Windowed Welford variance updated in O(1) per bar. Sample variance by
+    default (ddof=1), like pandas' rolling().std().
+    """
+
+    def __init__(self, period, ddof=1):
+        self.period = period
+        self.ddof = ddof
+        self.reset()
+
+    def reset(self):
+        self.window = deque()
+        self.mean = 0.0
+        self.m2 = 0.0
+        self._updates = 0
+
+    def _next_state(self, x):
+        if len(self.window) < self.period:
+            n = len(self.window) + 1
+            delta = x - self.mean
+            mean = self.mean + delta / n
+            return mean, self.m2 + delta * (x - mean)
+        old = self.window[0]
+        mean = self.mean + (x - old) / self.period
+        return mean, self.m2 + (x - old) * (x - mean + old - self.mean)
+
+    def _std(self, count, m2):
+        if count < self.period or self.period - self.ddof <= 0:
+            return math.nan
+        return math.sqrt(max(m2, 0.0) / (self.period - self.ddof))
+
+    @property
+    def value(self):
+        return self._std(len(self.window), self.m2)
+
+    def peek(self, x):
+        _, m2 = self._next_state(x)
+        return self._std(min(len(self.window) + 1, self.period), m2)
+
+    def update(self, x):
+        self.mean, self.m2 = self._next_state(x)
+        if len(self.window) == self.period:
+            self.window.popleft()
+        self.window.append(x)
+        self._updates += 1
+        if self._updates >= self.period:
+            self._recompute()
+        return self.value
+
+    def _recompute(self):
+        values = np.fromiter(self.window, dtype=float)
+        self.mean = float(values.mean()) if len(values) else 0.0
+        self.m2 = float(((values - self.mean) ** 2).sum())
+        self._updates = 0
+
+    def seed(self, values):
+        self.reset()
+        self.window.extend(np.asarray(values, dtype=float)[-self.period:].tolist())
+        self._recompute()
+        return self
+
+
+class EMA:
+    """Exponential moving average with adjust=False semantics."""
+
+    def __init__(self, span):
+        self.span = span
+        self.alpha = 2 / (span + 1)
+        self.reset()
+
+    def reset(self):
+        self.value = math.nan
+
+    def peek(self, x):
+        if math.isnan(self.value):
+            return x
+        return self.value + self.alpha * (x - self.value)
+
+    def update(self, x):
+        self.value = self.peek(x)
+        return self.value
+
+    def seed(self, values):
+        self.reset()
+        values = np.asarray(values, dtype=float)
+        if len(values):
+            self.value = float(ema_kernel(values, self.span)[-1])
+        return self
+
+
+class RollingRSI:
+    """
+    RSI from simple rolling means of gains and losses, matching
+    IndicatorEngine.rsi / Indicator.rsi.
+    """
+
+    def __init__(self, period=14):
+        self.period = period
+        self.gains = RunningSMA(period)
+        self.losses = RunningSMA(period)
+        self.prev = None
+
+    def reset(self):
+        self.gains.reset()
+        self.losses.reset()
+        self.prev = None
+
+    def _delta(self, x):
+        return 0.0 if self.prev is None else x - self.prev
+
+    @property
+    def value(self):
+        return _rsi_from_averages(self.gains.value, self.losses.value)
+
+    def peek(self, x):
+        delta = self._delta(x)
+        return _rsi_from_averages(self.gains.peek(max(delta, 0.0)), self.losses.peek(max(-delta, 0.0)))
+
+    def update(self, x):
+        delta = self._delta(x)
+        self.gains.update(max(delta, 0.0))
+        self.losses.update(max(-delta, 0.0))
+        self.prev = x
+        return self.value
+
+    def seed(self, values):
+        self.reset()
+        values = np.asarray(values, dtype=float)
+        if len(values):
+            delta = np.diff(values, prepend=values[:1])
+            self.gains.seed(np.where(delta > 0, delta, 0.0))
+            self.losses.seed(np.where(delta < 0, -delta, 0.0))
+            self.prev = float(values[-1])
+        return self
+
+
+class WilderRSI:
+    """RSI with Wilder smoothing, matching IndicatorEngine.wilder_rsi."""
+
+    def __init__(self, period=14):
+        self.period = period
+        self.reset()
+
+    def reset(self):
+        self.prev = None
+        self.count = 0
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+
+    def _next_state(self, x):
+        if self.prev is None:
+            return 0, 0.0, 0.0
+        delta = x - self.prev
+        gain, loss = max(delta, 0.0), max(-delta, 0.0)
+        count = self.count + 1
+        if count < self.period:
+            # Still collecting the first window; keep plain sums
+            return count, self.avg_gain + gain, self.avg_loss + loss
+        if count == self.period:
+            return count, (self.avg_gain + gain) / self.period, (self.avg_loss + loss) / self.period
+        return (
+            count,
+            self.avg_gain + (gain - self.avg_gain) / self.period,
+            self.avg_loss + (loss - self.avg_loss) / self.period,
+        )
+
+    def _value(self, count, avg_gain, avg_loss):
+        if count < self.period:
+            return math.nan
+        return _rsi_from_averages(avg_gain, avg_loss)
+
+    @property
+    def value(self):
+        return self._value(self.count, self.avg_gain, self.avg_loss)
+
+    def peek(self, x):
+        return self._value(*self._next_state(x))
+
+    def update(self, x):
+        self.count, self.avg_gain, self.avg_loss = self._next_state(x)
+        self.prev = x
+        return self.value
+
+    def seed(self, values):
+        self.reset()
+        values = np.asarray(values, dtype=float)
+        if len(values) <= self.period:
+            for x in values.tolist():
+                self.update(x)
+            return self
+        avg_gain, avg_loss = IndicatorEngine(values).wilder_averages(self.period)
+        self.count = len(values) - 1
+        self.avg_gain = float(avg_gain[-1])
+        self.avg_loss = float(avg_loss[-1])
+        self.prev = float(values[-1])
+        return self
+
+
+class StreamingIndicators:
+    """
+    Incremental indicator state for one (symbol, timeframe) frame.
+
+    Only closed bars are committed. The last row of a fetched frame is the bar
+    that is still forming, so its values are peeked rather than committed,
+    which keeps the state in step with a batch computation over the same
+    history while costing O(1) per new bar.
+
+    The values match IndicatorEngine over the same frame to within float
+    rounding (a relative error around 1e-12), not bit for bit: the running
+    sums and Welford variance accumulate in a different order than the batch
+    cumulative sums. EMAs depend on the frame's first bar, so they are
+    re-seeded from the frame whenever its front has been trimmed (e.g. by
+    CandleCache's max_bars), which costs one compiled O(n) pass per trim.
+    """
+
+    def __init__(self, sma_periods=(10, 48, 20), std_periods=(20,), rsi_period=14, ema_spans=(50, 200)):
+        self.sma = {period: RunningSMA(period) for period in sma_periods}
+        self.std = {period: RollingVariance(period) for period in std_periods}
+        self.rsi = RollingRSI(rsi_period)
+        self.ema = {span: EMA(span) for span in ema_spans}
+        self.last_time = None
+        self.first_time = None
+
+    def _indicators(self):
+        return [*self.sma.values(), *self.std.values(), self.rsi, *self.ema.values()]
+
+    def update(self, close):
+        for indicator in self._indicators():
+            indicator.update(close)
+
+    def seed(self, closes):
+        for indicator in self._indicators():
+            indicator.seed(closes)
+
+    def peek(self, close):
+        """
+        Returns the indicator values for a bar closing at `close` without committing it.
+        """
+        return {
+            'sma': {period: sma.peek(close) for period, sma in self.sma.items()},
+            'std': {period: std.peek(close) for period, std in self.std.items()},
+            'rsi': self.rsi.peek(close),
+            'ema': {span: ema.peek(close) for span, ema in self.ema.items()},
+        }
+
+    def sync(self, df):
+        """
+        Commits the closed bars of df that have not been seen yet and returns the
+        values for the last (forming) bar.
+
+        Reseeds from the frame when the state cannot be continued from it, e.g.
+        on first use or after a gap larger than the frame.
+        """
+        times = df['time'].to_numpy()
+        closes = df['close'].to_numpy(dtype=float)
+        closed = len(df) - 1
+
+        if self.last_time is None or closed <= 0 or self.last_time < times[0]:
+            self.seed(closes[:max(closed, 0)])
+        else:
+            start = int(np.searchsorted(times[:closed], self.last_time, side='right'))
+            for close in closes[start:closed].tolist():
+                self.update(close)
+            if times[0] != self.first_time:
+                # The frame lost bars at the front; a batch EMA restarts at its first bar
+                for ema in self.ema.values():
+                    ema.seed(closes[:closed])
+
+        self.first_time = times[0]
+        if closed > 0:
+            self.last_time = times[closed - 1]
+        return self.peek(float(closes[-1]))